@@ -0,0 +1,94 @@
+#include <gtest/gtest.h>
+#include "../acknowledger.h"
+
+unsigned int number_of_acknowledgements = 0;
+uint8 last_acknowledgement = 0;
+
+void acknowledge(uint8 bytes_read) {
+    number_of_acknowledgements++;
+    last_acknowledgement = bytes_read;
+}
+
+class AcknowledgerTest : public ::testing::Test {
+    public:
+        uint8 bytes_per_acknowledgement;
+        Acknowledger acknowledger;
+
+        AcknowledgerTest() {
+            bytes_per_acknowledgement = 4;
+            acknowledger = Acknowledger(bytes_per_acknowledgement);
+
+            number_of_acknowledgements = 0;
+            last_acknowledgement = 0;
+        }
+
+    protected:
+        void read_bytes(unsigned int number_of_bytes) {
+            for (unsigned int i = 0; i < number_of_bytes; i++) {
+                acknowledger.on_byte_read(acknowledge);
+            }
+        }
+};
+
+TEST_F(AcknowledgerTest, NoBytesRead) {
+    EXPECT_EQ(acknowledger.get_bytes_read(), 0);
+    EXPECT_EQ(acknowledger.get_bytes_unacknowledged(), 0);
+    EXPECT_EQ(number_of_acknowledgements, 0);
+}
+
+TEST_F(AcknowledgerTest, FewerBytesThanBytesPerAcknowledgement) {
+    read_bytes(bytes_per_acknowledgement - 1);
+
+    EXPECT_EQ(acknowledger.get_bytes_read(), bytes_per_acknowledgement - 1);
+    EXPECT_EQ(acknowledger.get_bytes_unacknowledged(), bytes_per_acknowledgement - 1);
+    EXPECT_EQ(number_of_acknowledgements, 0);
+}
+
+TEST_F(AcknowledgerTest, ExactlyBytesPerAcknowledgement) {
+    read_bytes(bytes_per_acknowledgement);
+
+    EXPECT_EQ(number_of_acknowledgements, 1);
+    EXPECT_EQ(last_acknowledgement, bytes_per_acknowledgement);
+    EXPECT_EQ(acknowledger.get_bytes_unacknowledged(), 0);
+}
+
+TEST_F(AcknowledgerTest, AcknowledgementsAreCumulative) {
+    read_bytes(bytes_per_acknowledgement * 3);
+
+    EXPECT_EQ(number_of_acknowledgements, 3);
+    EXPECT_EQ(last_acknowledgement, bytes_per_acknowledgement * 3);
+}
+
+TEST_F(AcknowledgerTest, FlushAcknowledgesRemainingBytes) {
+    read_bytes(bytes_per_acknowledgement + 1);
+    acknowledger.flush(acknowledge);
+
+    EXPECT_EQ(number_of_acknowledgements, 2);
+    EXPECT_EQ(last_acknowledgement, bytes_per_acknowledgement + 1);
+    EXPECT_EQ(acknowledger.get_bytes_unacknowledged(), 0);
+}
+
+TEST_F(AcknowledgerTest, FlushWithNothingToAcknowledge) {
+    read_bytes(bytes_per_acknowledgement);
+    acknowledger.flush(acknowledge);
+    acknowledger.flush(acknowledge);
+
+    EXPECT_EQ(number_of_acknowledgements, 1);
+}
+
+TEST_F(AcknowledgerTest, BytesReadWrapsAround) {
+    const unsigned int NUMBER_OF_BYTES = 256 + 8;
+    read_bytes(NUMBER_OF_BYTES);
+
+    EXPECT_EQ(acknowledger.get_bytes_read(), 8);
+    EXPECT_EQ(last_acknowledgement, 8);
+}
+
+TEST_F(AcknowledgerTest, ZeroBytesPerAcknowledgementAcknowledgesEveryByte) {
+    acknowledger = Acknowledger(0);
+
+    read_bytes(3);
+
+    EXPECT_EQ(number_of_acknowledgements, 3);
+    EXPECT_EQ(last_acknowledgement, 3);
+}
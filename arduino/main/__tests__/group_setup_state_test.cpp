@@ -3,10 +3,10 @@
 
 uint16* group_received_led_ranges = nullptr;
 uint8 group_received_number_of_led_ranges = 0;
-uint8 group_received_number_of_groups_received = 0;
-uint8 group_received_group_number = 0;
+uint16 group_received_number_of_groups_received = 0;
+uint16 group_received_group_number = 0;
 
-void on_group_received(uint16* led_ranges, uint8 number_of_led_ranges, uint8 band_number) {
+void on_group_received(uint16* led_ranges, uint8 number_of_led_ranges, uint16 band_number) {
     group_received_led_ranges = led_ranges;
     group_received_number_of_led_ranges = number_of_led_ranges;
     group_received_group_number = band_number;
@@ -36,7 +36,7 @@ bool are_equal(uint16* array_1, uint16* array_2, unsigned int length) {
 
 class GroupSetupStateTest : public ::testing::Test {
     public:
-        uint8 number_of_expected_groups;
+        uint16 number_of_expected_groups;
         GroupSetupState* group_setup_state = nullptr;
 
         GroupSetupStateTest() {
@@ -89,7 +89,7 @@ class GroupSetupStateTest : public ::testing::Test {
             }
         }
 
-        void set_group_setup_state(uint8 the_number_of_expected_groups) {
+        void set_group_setup_state(uint16 the_number_of_expected_groups) {
             delete group_setup_state;
             group_setup_state = new GroupSetupState(the_number_of_expected_groups);
             number_of_expected_groups = the_number_of_expected_groups;
@@ -397,4 +397,28 @@ TEST_F(GroupSetupStateTest, test_groups) {
     assert_on_state(GroupSetupStateState::END_OF_MESSAGE);
     update_state(GroupSetupState::END_OF_MESSAGE_CODE);
     assert_on_state(GroupSetupStateState::END);
-}
\ No newline at end of file
+}
+TEST_F(GroupSetupStateTest, MoreThan255Groups) {
+    const uint16 NUMBER_OF_GROUPS = 300;
+    set_group_setup_state(NUMBER_OF_GROUPS);
+
+    update_state(GroupSetupState::START_OF_MESSAGE_CODE);
+
+    for (uint16 group = 0; group < NUMBER_OF_GROUPS; group++) {
+        assert_on_state(GroupSetupStateState::NUMBER_OF_LED_RANGES);
+
+        uint8 number_of_led_ranges = 0;
+        uint8 checksum = 0;
+
+        update_state(number_of_led_ranges);
+        update_state(checksum);
+
+        EXPECT_EQ(group_received_group_number, group);
+    }
+
+    EXPECT_EQ(group_received_number_of_groups_received, NUMBER_OF_GROUPS);
+    assert_on_state(GroupSetupStateState::END_OF_MESSAGE);
+
+    update_state(GroupSetupState::END_OF_MESSAGE_CODE);
+    assert_on_state(GroupSetupStateState::END);
+}
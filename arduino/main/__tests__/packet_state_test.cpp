@@ -1,4 +1,7 @@
 #include <gtest/gtest.h>
+#include <cstdint>
+#include <cstdlib>
+#include <new>
 #include "../packet_state.h"
 
 bool on_EOM_was_called = false;
@@ -40,9 +43,7 @@ class PacketStateTest : public ::testing::Test {
         unsigned int bytes_per_packet;
         PacketState packet_state;
 
-        PacketStateTest() {
-            bytes_per_packet = 4;
-            packet_state = PacketState(bytes_per_packet);
+        PacketStateTest() : bytes_per_packet(4), packet_state(bytes_per_packet) {
 
             on_EOM_was_called = false;
             EOM_packets = nullptr;
@@ -399,4 +400,646 @@ TEST_F(PacketStateTest, TwoCompleteStateTransitions_ZeroPacketsOnFirst) {
 
     test_packets(packets_2, number_of_packets);
     test_end_state(packets_2, number_of_packets);
-}
\ No newline at end of file
+}
+bool on_EOF_was_called = false;
+
+void on_end_of_frame() {
+    on_EOF_was_called = true;
+}
+
+class PacketStateFrameTest : public ::testing::Test {
+    public:
+        static const unsigned int NUMBER_OF_LEDS = 4;
+        static const unsigned int FRAME_BUFFER_LENGTH = NUMBER_OF_LEDS * PacketState::BYTES_PER_PIXEL;
+
+        uint8 frame_buffer[FRAME_BUFFER_LENGTH];
+        PacketState packet_state;
+
+        PacketStateFrameTest() : packet_state(4, frame_buffer, FRAME_BUFFER_LENGTH) {
+            for (unsigned int i = 0; i < FRAME_BUFFER_LENGTH; i++) {
+                frame_buffer[i] = 0x00;
+            }
+
+            on_EOM_was_called = false;
+            on_EOF_was_called = false;
+        }
+
+    protected:
+        void update_state(uint8 byte) {
+            packet_state.update_state(byte, on_end_of_message, on_end_of_frame);
+        }
+
+        uint8 send_header(uint16 start_led, uint16 number_of_leds) {
+            uint8 header[] = {(uint8)(start_led & 0x00FF), (uint8)(start_led >> 8),
+                              (uint8)(number_of_leds & 0x00FF), (uint8)(number_of_leds >> 8)};
+
+            update_state(PacketState::FRAME_START_OF_MESSAGE_CODE);
+            send_bytes(header, sizeof(header));
+
+            return get_checksum(header, 0, sizeof(header));
+        }
+
+        void send_bytes(uint8 bytes[], unsigned int length) {
+            for (unsigned int i = 0; i < length; i++) {
+                update_state(bytes[i]);
+            }
+        }
+};
+
+TEST_F(PacketStateFrameTest, StartOfMessage_to_FrameStartLed) {
+    update_state(PacketState::FRAME_START_OF_MESSAGE_CODE);
+
+    EXPECT_EQ(packet_state.get_state(), PacketStateState::FRAME_START_LED_LOWER_BYTE);
+}
+
+TEST_F(PacketStateFrameTest, FrameIgnoredWithoutFrameBuffer) {
+    PacketState packet_state_without_frame_buffer(4);
+
+    packet_state_without_frame_buffer.update_state(PacketState::FRAME_START_OF_MESSAGE_CODE, on_end_of_message, on_end_of_frame);
+
+    EXPECT_EQ(packet_state_without_frame_buffer.get_state(), PacketStateState::START_OF_MESSAGE);
+}
+
+TEST_F(PacketStateFrameTest, FullFrame) {
+    uint8 check_sum = send_header(0, NUMBER_OF_LEDS);
+    ASSERT_EQ(packet_state.get_state(), PacketStateState::FRAME_PIXEL);
+
+    uint8 pixels[] = {0x10, 0x11, 0x12,
+                      0x20, 0x21, 0x22,
+                      0x30, 0x31, 0x32,
+                      0x40, 0x41, 0x42};
+
+    send_bytes(pixels, sizeof(pixels));
+    ASSERT_EQ(packet_state.get_state(), PacketStateState::FRAME_CHECK_SUM);
+
+    update_state(check_sum + get_checksum(pixels, 0, sizeof(pixels)));
+    ASSERT_EQ(packet_state.get_state(), PacketStateState::FRAME_END_OF_MESSAGE);
+
+    update_state(PacketState::END_OF_MESSAGE_CODE);
+
+    EXPECT_TRUE(on_EOF_was_called);
+    EXPECT_FALSE(on_EOM_was_called);
+    EXPECT_TRUE(are_equal(frame_buffer, pixels, FRAME_BUFFER_LENGTH));
+    EXPECT_EQ(packet_state.get_state(), PacketStateState::START_OF_MESSAGE);
+}
+
+TEST_F(PacketStateFrameTest, PartialFrame) {
+    uint8 check_sum = send_header(2, 1);
+
+    uint8 pixels[] = {0x30, 0x31, 0x32};
+
+    send_bytes(pixels, sizeof(pixels));
+    update_state(check_sum + get_checksum(pixels, 0, sizeof(pixels)));
+    update_state(PacketState::END_OF_MESSAGE_CODE);
+
+    uint8 expected_frame_buffer[] = {0x00, 0x00, 0x00,
+                                     0x00, 0x00, 0x00,
+                                     0x30, 0x31, 0x32,
+                                     0x00, 0x00, 0x00};
+
+    EXPECT_TRUE(on_EOF_was_called);
+    EXPECT_TRUE(are_equal(frame_buffer, expected_frame_buffer, FRAME_BUFFER_LENGTH));
+}
+
+TEST_F(PacketStateFrameTest, EmptyFrame) {
+    uint8 check_sum = send_header(0, 0);
+    ASSERT_EQ(packet_state.get_state(), PacketStateState::FRAME_CHECK_SUM);
+
+    update_state(check_sum);
+    update_state(PacketState::END_OF_MESSAGE_CODE);
+
+    EXPECT_TRUE(on_EOF_was_called);
+}
+
+TEST_F(PacketStateFrameTest, FrameLargerThanFrameBuffer) {
+    send_header(1, NUMBER_OF_LEDS);
+
+    EXPECT_EQ(packet_state.get_state(), PacketStateState::START_OF_MESSAGE);
+    EXPECT_FALSE(on_EOF_was_called);
+}
+
+TEST_F(PacketStateFrameTest, CheckSumFailure) {
+    uint8 check_sum = send_header(0, 1);
+
+    uint8 pixels[] = {0x10, 0x11, 0x12};
+
+    send_bytes(pixels, sizeof(pixels));
+    update_state(check_sum + get_checksum(pixels, 0, sizeof(pixels)) + 0x01);
+
+    EXPECT_EQ(packet_state.get_state(), PacketStateState::START_OF_MESSAGE);
+
+    update_state(PacketState::END_OF_MESSAGE_CODE);
+    EXPECT_FALSE(on_EOF_was_called);
+}
+
+TEST_F(PacketStateFrameTest, FrameIsWrittenStraightIntoFrameBuffer) {
+    uint8 check_sum = send_header(0, 1);
+
+    uint8 pixels[] = {0x10, 0x11, 0x12};
+
+    send_bytes(pixels, sizeof(pixels));
+
+    // The pixels are in place before the check sum, but the frame is only shown once it passes.
+    EXPECT_TRUE(are_equal(frame_buffer, pixels, sizeof(pixels)));
+    EXPECT_FALSE(on_EOF_was_called);
+
+    update_state(check_sum + get_checksum(pixels, 0, sizeof(pixels)));
+    update_state(PacketState::END_OF_MESSAGE_CODE);
+
+    EXPECT_TRUE(on_EOF_was_called);
+}
+
+TEST_F(PacketStateFrameTest, FrameThenPackets) {
+    uint8 check_sum = send_header(0, 1);
+
+    uint8 pixels[] = {0x10, 0x11, 0x12};
+
+    send_bytes(pixels, sizeof(pixels));
+    update_state(check_sum + get_checksum(pixels, 0, sizeof(pixels)));
+    update_state(PacketState::END_OF_MESSAGE_CODE);
+
+    ASSERT_TRUE(on_EOF_was_called);
+
+    uint8 packet[] = {0x01, 0x10, 0x20, 0x30};
+
+    update_state(PacketState::START_OF_MESSAGE_CODE);
+    update_state(0x01);
+    send_bytes(packet, sizeof(packet));
+    update_state(get_checksum(packet, 0, sizeof(packet)));
+    update_state(PacketState::END_OF_MESSAGE_CODE);
+
+    EXPECT_TRUE(on_EOM_was_called);
+    EXPECT_EQ(EOM_number_of_packets, 1);
+    EXPECT_TRUE(are_equal(EOM_packets, packet, sizeof(packet)));
+}
+
+TEST_F(PacketStateFrameTest, PacketsThenFrame) {
+    uint8 packet[] = {0x01, 0x10, 0x20, 0x30};
+
+    update_state(PacketState::START_OF_MESSAGE_CODE);
+    update_state(0x01);
+    send_bytes(packet, sizeof(packet));
+    update_state(get_checksum(packet, 0, sizeof(packet)));
+    update_state(PacketState::END_OF_MESSAGE_CODE);
+
+    ASSERT_TRUE(on_EOM_was_called);
+    ASSERT_FALSE(on_EOF_was_called);
+
+    uint8 check_sum = send_header(3, 1);
+
+    uint8 pixels[] = {0x40, 0x41, 0x42};
+
+    send_bytes(pixels, sizeof(pixels));
+    update_state(check_sum + get_checksum(pixels, 0, sizeof(pixels)));
+    update_state(PacketState::END_OF_MESSAGE_CODE);
+
+    EXPECT_TRUE(on_EOF_was_called);
+    EXPECT_TRUE(are_equal(&frame_buffer[3 * PacketState::BYTES_PER_PIXEL], pixels, sizeof(pixels)));
+    EXPECT_EQ(packet_state.get_state(), PacketStateState::START_OF_MESSAGE);
+}
+
+bool on_EOPM_was_called = false;
+uint8* EOPM_palette = nullptr;
+unsigned int EOPM_palette_size = 0;
+uint16* EOPM_runs = nullptr;
+unsigned int EOPM_number_of_runs = 0;
+
+void on_end_of_palette_message(uint8* palette, unsigned int palette_size, uint16* runs, unsigned int number_of_runs) {
+    on_EOPM_was_called = true;
+    EOPM_palette = palette;
+    EOPM_palette_size = palette_size;
+    EOPM_runs = runs;
+    EOPM_number_of_runs = number_of_runs;
+}
+
+static bool are_equal(uint16 array_1[], uint16 array_2[], unsigned int length) {
+    if (array_1 == nullptr || array_2 == nullptr) {
+        return (array_1 == nullptr && array_2 == nullptr);
+    }
+
+    for (unsigned int i = 0; i < length; i++) {
+        if (array_1[i] != array_2[i]) {
+            return false;
+        }
+    }
+
+    return true;
+}
+
+class PacketStatePaletteTest : public ::testing::Test {
+    public:
+        PacketState packet_state;
+
+        PacketStatePaletteTest() : packet_state(4) {
+
+            on_EOM_was_called = false;
+            on_EOPM_was_called = false;
+        }
+
+    protected:
+        void update_state(uint8 byte) {
+            packet_state.update_state(byte, on_end_of_message, nullptr, on_end_of_palette_message);
+        }
+
+        void send_bytes(uint8 bytes[], unsigned int length) {
+            for (unsigned int i = 0; i < length; i++) {
+                update_state(bytes[i]);
+            }
+        }
+
+        // Sends everything but the end of message code.
+        void send_palette_message(uint8 palette[], uint8 palette_size, uint8 runs[], uint8 number_of_runs, uint8 check_sum_offset) {
+            const unsigned int PALETTE_LENGTH = palette_size * PacketState::BYTES_PER_PIXEL;
+            const unsigned int RUNS_LENGTH = number_of_runs * PacketState::NUMBERS_PER_RUN;
+
+            update_state(PacketState::PALETTE_START_OF_MESSAGE_CODE);
+            update_state(palette_size);
+            send_bytes(palette, PALETTE_LENGTH);
+            update_state(number_of_runs);
+            send_bytes(runs, RUNS_LENGTH);
+
+            uint8 check_sum = (uint8)(palette_size + number_of_runs + get_checksum(palette, 0, PALETTE_LENGTH)
+                                      + get_checksum(runs, 0, RUNS_LENGTH) + check_sum_offset);
+            update_state(check_sum);
+        }
+};
+
+TEST_F(PacketStatePaletteTest, StartOfMessage_to_PaletteSize) {
+    update_state(PacketState::PALETTE_START_OF_MESSAGE_CODE);
+
+    EXPECT_EQ(packet_state.get_state(), PacketStateState::PALETTE_SIZE);
+}
+
+TEST_F(PacketStatePaletteTest, PaletteIgnoredWithoutCallback) {
+    packet_state.update_state(PacketState::PALETTE_START_OF_MESSAGE_CODE, on_end_of_message, nullptr);
+
+    EXPECT_EQ(packet_state.get_state(), PacketStateState::START_OF_MESSAGE);
+}
+
+TEST_F(PacketStatePaletteTest, PaletteMessage) {
+    uint8 palette[] = {0x10, 0x11, 0x12,
+                       0x20, 0x21, 0x22};
+    uint8 runs[] = {0x00, 0x03, 0x01,
+                    0x05, 0x02, 0x00,
+                    0x08, 0x01, 0x01};
+
+    uint16 expected_runs[] = {0, 3, 1,
+                              5, 2, 0,
+                              8, 1, 1};
+
+    send_palette_message(palette, 2, runs, 3, 0x00);
+    ASSERT_EQ(packet_state.get_state(), PacketStateState::PALETTE_END_OF_MESSAGE);
+
+    update_state(PacketState::END_OF_MESSAGE_CODE);
+
+    EXPECT_TRUE(on_EOPM_was_called);
+    EXPECT_FALSE(on_EOM_was_called);
+    EXPECT_EQ(EOPM_palette_size, 2);
+    EXPECT_EQ(EOPM_number_of_runs, 3);
+    EXPECT_TRUE(are_equal(EOPM_palette, palette, sizeof(palette)));
+    EXPECT_TRUE(are_equal(EOPM_runs, expected_runs, 9));
+    EXPECT_EQ(packet_state.get_state(), PacketStateState::START_OF_MESSAGE);
+}
+
+TEST_F(PacketStatePaletteTest, EmptyPaletteMessage) {
+    update_state(PacketState::PALETTE_START_OF_MESSAGE_CODE);
+    update_state(0x00);
+    ASSERT_EQ(packet_state.get_state(), PacketStateState::PALETTE_NUMBER_OF_RUNS);
+
+    update_state(0x00);
+    ASSERT_EQ(packet_state.get_state(), PacketStateState::PALETTE_CHECK_SUM);
+
+    update_state(0x00);
+    update_state(PacketState::END_OF_MESSAGE_CODE);
+
+    EXPECT_TRUE(on_EOPM_was_called);
+    EXPECT_EQ(EOPM_palette_size, 0);
+    EXPECT_EQ(EOPM_number_of_runs, 0);
+}
+
+TEST_F(PacketStatePaletteTest, PaletteIndexOutOfRange) {
+    uint8 palette[] = {0x10, 0x11, 0x12};
+    uint8 runs[] = {0x00, 0x01, 0x01};
+
+    update_state(PacketState::PALETTE_START_OF_MESSAGE_CODE);
+    update_state(0x01);
+    send_bytes(palette, sizeof(palette));
+    update_state(0x01);
+    send_bytes(runs, sizeof(runs));
+
+    EXPECT_EQ(packet_state.get_state(), PacketStateState::START_OF_MESSAGE);
+}
+
+TEST_F(PacketStatePaletteTest, CheckSumFailure) {
+    uint8 palette[] = {0x10, 0x11, 0x12};
+    uint8 runs[] = {0x00, 0x04, 0x00};
+
+    send_palette_message(palette, 1, runs, 1, 0x01);
+
+    EXPECT_EQ(packet_state.get_state(), PacketStateState::START_OF_MESSAGE);
+
+    update_state(PacketState::END_OF_MESSAGE_CODE);
+    EXPECT_FALSE(on_EOPM_was_called);
+}
+
+TEST_F(PacketStatePaletteTest, PaletteThenPackets) {
+    uint8 palette[] = {0x10, 0x11, 0x12};
+    uint8 runs[] = {0x00, 0x04, 0x00};
+
+    send_palette_message(palette, 1, runs, 1, 0x00);
+    update_state(PacketState::END_OF_MESSAGE_CODE);
+
+    ASSERT_TRUE(on_EOPM_was_called);
+
+    uint8 packet[] = {0x01, 0x10, 0x20, 0x30};
+
+    update_state(PacketState::START_OF_MESSAGE_CODE);
+    update_state(0x01);
+    send_bytes(packet, sizeof(packet));
+    update_state(get_checksum(packet, 0, sizeof(packet)));
+    update_state(PacketState::END_OF_MESSAGE_CODE);
+
+    EXPECT_TRUE(on_EOM_was_called);
+    EXPECT_EQ(EOM_number_of_packets, 1);
+    EXPECT_TRUE(are_equal(EOM_packets, packet, sizeof(packet)));
+}
+
+class PacketStateTwoByteNumbersTest : public ::testing::Test {
+    public:
+        static const unsigned int BYTES_PER_NUMBER = 2;
+        static const unsigned int BYTES_PER_PACKET = BYTES_PER_NUMBER + 3;
+
+        PacketState packet_state;
+
+        PacketStateTwoByteNumbersTest() : packet_state(BYTES_PER_PACKET, nullptr, 0, BYTES_PER_NUMBER) {
+
+            on_EOM_was_called = false;
+            on_EOPM_was_called = false;
+        }
+
+    protected:
+        void update_state(uint8 byte) {
+            packet_state.update_state(byte, on_end_of_message, nullptr, on_end_of_palette_message);
+        }
+
+        void send_bytes(uint8 bytes[], unsigned int length) {
+            for (unsigned int i = 0; i < length; i++) {
+                update_state(bytes[i]);
+            }
+        }
+};
+
+TEST_F(PacketStateTwoByteNumbersTest, NumberOfPacketsIsTwoBytes) {
+    update_state(PacketState::START_OF_MESSAGE_CODE);
+    update_state(0x02);
+
+    EXPECT_EQ(packet_state.get_state(), PacketStateState::NUMBER_OF_PACKETS);
+
+    update_state(0x00);
+
+    EXPECT_EQ(packet_state.get_state(), PacketStateState::PACKET);
+}
+
+TEST_F(PacketStateTwoByteNumbersTest, Packets) {
+    uint8 packets[] = {0x2C, 0x01, 0x10, 0x20, 0x30,  // group 300
+                       0x03, 0x00, 0x40, 0x50, 0x60}; // group 3
+
+    update_state(PacketState::START_OF_MESSAGE_CODE);
+    update_state(0x02);
+    update_state(0x00);
+
+    for (unsigned int packet = 0; packet < 2; packet++) {
+        send_bytes(&packets[packet * BYTES_PER_PACKET], BYTES_PER_PACKET);
+        update_state(get_checksum(packets, packet * BYTES_PER_PACKET, (packet + 1) * BYTES_PER_PACKET));
+    }
+
+    ASSERT_EQ(packet_state.get_state(), PacketStateState::END_OF_MESSAGE);
+    update_state(PacketState::END_OF_MESSAGE_CODE);
+
+    EXPECT_TRUE(on_EOM_was_called);
+    EXPECT_EQ(EOM_number_of_packets, 2);
+    EXPECT_TRUE(are_equal(EOM_packets, packets, sizeof(packets)));
+}
+
+TEST_F(PacketStateTwoByteNumbersTest, PaletteMessage) {
+    uint8 message[] = {0x01, 0x00,              // palette size
+                       0x10, 0x11, 0x12,        // palette
+                       0x01, 0x00,              // number of runs
+                       0x2C, 0x01, 0x02, 0x01, 0x00, 0x00}; // run: start group 300, 258 groups, palette index 0
+
+    update_state(PacketState::PALETTE_START_OF_MESSAGE_CODE);
+    send_bytes(message, sizeof(message));
+    ASSERT_EQ(packet_state.get_state(), PacketStateState::PALETTE_CHECK_SUM);
+
+    update_state(get_checksum(message, 0, sizeof(message)));
+    update_state(PacketState::END_OF_MESSAGE_CODE);
+
+    uint16 expected_runs[] = {300, 258, 0};
+
+    EXPECT_TRUE(on_EOPM_was_called);
+    EXPECT_EQ(EOPM_palette_size, 1);
+    EXPECT_EQ(EOPM_number_of_runs, 1);
+    EXPECT_TRUE(are_equal(EOPM_palette, &message[2], 3));
+    EXPECT_TRUE(are_equal(EOPM_runs, expected_runs, 3));
+}
+
+TEST_F(PacketStateTwoByteNumbersTest, PaletteIndexOutOfRange) {
+    uint8 message[] = {0x01, 0x00,
+                       0x10, 0x11, 0x12,
+                       0x01, 0x00,
+                       0x00, 0x00, 0x01, 0x00, 0x00, 0x01}; // palette index 256
+
+    update_state(PacketState::PALETTE_START_OF_MESSAGE_CODE);
+    send_bytes(message, sizeof(message));
+
+    EXPECT_EQ(packet_state.get_state(), PacketStateState::START_OF_MESSAGE);
+}
+
+class PacketStateMaximumCountTest : public ::testing::Test {
+    public:
+        static const unsigned int MAXIMUM_COUNT = 2;
+
+        PacketState packet_state;
+
+        PacketStateMaximumCountTest() : packet_state(4, nullptr, 0, 1, MAXIMUM_COUNT) {
+            on_EOM_was_called = false;
+            on_EOPM_was_called = false;
+        }
+
+    protected:
+        void update_state(uint8 byte) {
+            packet_state.update_state(byte, on_end_of_message, nullptr, on_end_of_palette_message);
+        }
+
+        void send_bytes(uint8 bytes[], unsigned int length) {
+            for (unsigned int i = 0; i < length; i++) {
+                update_state(bytes[i]);
+            }
+        }
+};
+
+TEST_F(PacketStateMaximumCountTest, MaximumNumberOfPackets) {
+    uint8 packets[] = {0x00, 0x10, 0x20, 0x30,
+                       0x01, 0x40, 0x50, 0x60};
+
+    update_state(PacketState::START_OF_MESSAGE_CODE);
+    update_state(MAXIMUM_COUNT);
+
+    for (unsigned int packet = 0; packet < MAXIMUM_COUNT; packet++) {
+        send_bytes(&packets[packet * 4], 4);
+        update_state(get_checksum(packets, packet * 4, (packet + 1) * 4));
+    }
+
+    update_state(PacketState::END_OF_MESSAGE_CODE);
+
+    EXPECT_TRUE(on_EOM_was_called);
+    EXPECT_EQ(EOM_number_of_packets, 2);
+    EXPECT_TRUE(are_equal(EOM_packets, packets, sizeof(packets)));
+}
+
+TEST_F(PacketStateMaximumCountTest, TooManyPackets) {
+    update_state(PacketState::START_OF_MESSAGE_CODE);
+    update_state(MAXIMUM_COUNT + 1);
+
+    EXPECT_EQ(packet_state.get_state(), PacketStateState::START_OF_MESSAGE);
+}
+
+TEST_F(PacketStateMaximumCountTest, TooManyPaletteColors) {
+    update_state(PacketState::PALETTE_START_OF_MESSAGE_CODE);
+    update_state(MAXIMUM_COUNT + 1);
+
+    EXPECT_EQ(packet_state.get_state(), PacketStateState::START_OF_MESSAGE);
+}
+
+TEST_F(PacketStateMaximumCountTest, TooManyRuns) {
+    update_state(PacketState::PALETTE_START_OF_MESSAGE_CODE);
+    update_state(0x00);
+    update_state(MAXIMUM_COUNT + 1);
+
+    EXPECT_EQ(packet_state.get_state(), PacketStateState::START_OF_MESSAGE);
+}
+
+TEST_F(PacketStateMaximumCountTest, MaximumPaletteMessage) {
+    uint8 message[] = {0x02,                        // palette size
+                       0x10, 0x11, 0x12,
+                       0x20, 0x21, 0x22,
+                       0x02,                        // number of runs
+                       0x00, 0x03, 0x01,
+                       0x05, 0x02, 0x00};
+
+    update_state(PacketState::PALETTE_START_OF_MESSAGE_CODE);
+    send_bytes(message, sizeof(message));
+    update_state(get_checksum(message, 0, sizeof(message)));
+    update_state(PacketState::END_OF_MESSAGE_CODE);
+
+    uint16 expected_runs[] = {0, 3, 1,
+                              5, 2, 0};
+
+    EXPECT_TRUE(on_EOPM_was_called);
+    EXPECT_TRUE(are_equal(EOPM_palette, &message[1], 6));
+    EXPECT_TRUE(are_equal(EOPM_runs, expected_runs, 6));
+}
+
+// Without exceptions, new returns nullptr when a microcontroller runs out of RAM. Allocations larger than
+// maximum_allocation_length do the same here.
+std::size_t maximum_allocation_length = SIZE_MAX;
+
+void* operator new[](std::size_t size, const std::nothrow_t&) noexcept {
+    return (size <= maximum_allocation_length) ? std::malloc(size > 0 ? size : 1) : nullptr;
+}
+
+class PacketStateAllocationTest : public ::testing::Test {
+    public:
+        static const unsigned int NUMBER_OF_LEDS = 2;
+        static const unsigned int FRAME_BUFFER_LENGTH = NUMBER_OF_LEDS * PacketState::BYTES_PER_PIXEL;
+
+        uint8 frame_buffer[FRAME_BUFFER_LENGTH] = {};
+
+        PacketStateAllocationTest() {
+            on_EOM_was_called = false;
+            on_EOF_was_called = false;
+        }
+
+        ~PacketStateAllocationTest() {
+            maximum_allocation_length = SIZE_MAX;
+        }
+
+    protected:
+        void send_bytes(PacketState& packet_state, uint8 bytes[], unsigned int length) {
+            for (unsigned int i = 0; i < length; i++) {
+                packet_state.update_state(bytes[i], on_end_of_message, on_end_of_frame, on_end_of_palette_message);
+            }
+        }
+};
+
+TEST_F(PacketStateAllocationTest, MaximumCountIsHalvedUntilBufferFits) {
+    // 8 runs and palette colors need 8 * 6 + 8 * 3 = 72 bytes; 4 need 36 bytes.
+    maximum_allocation_length = 40;
+
+    PacketState packet_state(4, frame_buffer, FRAME_BUFFER_LENGTH, 1, 8);
+
+    EXPECT_EQ(packet_state.get_maximum_count(), 4u);
+
+    uint8 too_many_packets[] = {PacketState::START_OF_MESSAGE_CODE, 0x05};
+    send_bytes(packet_state, too_many_packets, sizeof(too_many_packets));
+    EXPECT_EQ(packet_state.get_state(), PacketStateState::START_OF_MESSAGE);
+
+    uint8 packets[] = {0x00, 0x10, 0x20, 0x30,
+                       0x01, 0x40, 0x50, 0x60,
+                       0x02, 0x70, 0x80, 0x90,
+                       0x03, 0xA0, 0xB0, 0xC0};
+    uint8 start[] = {PacketState::START_OF_MESSAGE_CODE, 0x04};
+    send_bytes(packet_state, start, sizeof(start));
+
+    for (unsigned int packet = 0; packet < 4; packet++) {
+        uint8 check_sum = get_checksum(packets, packet * 4, (packet + 1) * 4);
+
+        send_bytes(packet_state, &packets[packet * 4], 4);
+        send_bytes(packet_state, &check_sum, 1);
+    }
+
+    uint8 end[] = {PacketState::END_OF_MESSAGE_CODE};
+    send_bytes(packet_state, end, sizeof(end));
+
+    EXPECT_TRUE(on_EOM_was_called);
+    EXPECT_TRUE(are_equal(EOM_packets, packets, sizeof(packets)));
+}
+
+TEST_F(PacketStateAllocationTest, FramesStillWorkWithoutRam) {
+    maximum_allocation_length = 0;
+
+    PacketState packet_state(4, frame_buffer, FRAME_BUFFER_LENGTH, 1, 8);
+
+    EXPECT_EQ(packet_state.get_maximum_count(), 0u);
+
+    uint8 packets[] = {PacketState::START_OF_MESSAGE_CODE, 0x01};
+    send_bytes(packet_state, packets, sizeof(packets));
+    EXPECT_EQ(packet_state.get_state(), PacketStateState::START_OF_MESSAGE);
+
+    uint8 pixels[] = {0x10, 0x11, 0x12,
+                      0x20, 0x21, 0x22};
+    uint8 header[] = {PacketState::FRAME_START_OF_MESSAGE_CODE, 0x00, 0x00, NUMBER_OF_LEDS, 0x00};
+    uint8 footer[] = {(uint8)(get_checksum(header, 1, sizeof(header)) + get_checksum(pixels, 0, sizeof(pixels))),
+                      PacketState::END_OF_MESSAGE_CODE};
+
+    send_bytes(packet_state, header, sizeof(header));
+    send_bytes(packet_state, pixels, sizeof(pixels));
+    send_bytes(packet_state, footer, sizeof(footer));
+
+    EXPECT_TRUE(on_EOF_was_called);
+    EXPECT_TRUE(are_equal(frame_buffer, pixels, FRAME_BUFFER_LENGTH));
+}
+
+TEST_F(PacketStateAllocationTest, PaletteSizeIsCapped) {
+    PacketState packet_state(5, nullptr, 0, 2, 300);
+
+    EXPECT_EQ(packet_state.get_maximum_count(), 300u);
+
+    uint8 too_large_palette[] = {PacketState::PALETTE_START_OF_MESSAGE_CODE, 0x01, 0x01}; // 257 colors
+    send_bytes(packet_state, too_large_palette, sizeof(too_large_palette));
+    EXPECT_EQ(packet_state.get_state(), PacketStateState::START_OF_MESSAGE);
+
+    uint8 largest_palette[] = {PacketState::PALETTE_START_OF_MESSAGE_CODE, 0x00, 0x01}; // 256 colors
+    send_bytes(packet_state, largest_palette, sizeof(largest_palette));
+    EXPECT_EQ(packet_state.get_state(), PacketStateState::PALETTE_COLOR);
+}
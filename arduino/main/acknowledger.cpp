@@ -0,0 +1,37 @@
+#include "acknowledger.h"
+
+Acknowledger::Acknowledger() {
+    bytes_per_acknowledgement = 1;
+    bytes_read = 0;
+    bytes_unacknowledged = 0;
+}
+
+Acknowledger::Acknowledger(uint8 the_bytes_per_acknowledgement) {
+    bytes_per_acknowledgement = (the_bytes_per_acknowledgement > 0) ? the_bytes_per_acknowledgement : 1;
+    bytes_read = 0;
+    bytes_unacknowledged = 0;
+}
+
+void Acknowledger::on_byte_read(void (*acknowledge)(uint8)) {
+    bytes_read++;
+    bytes_unacknowledged++;
+
+    if (bytes_unacknowledged >= bytes_per_acknowledgement) {
+        flush(acknowledge);
+    }
+}
+
+void Acknowledger::flush(void (*acknowledge)(uint8)) {
+    if (bytes_unacknowledged > 0) {
+        acknowledge(bytes_read);
+        bytes_unacknowledged = 0;
+    }
+}
+
+uint8 Acknowledger::get_bytes_read() {
+    return bytes_read;
+}
+
+uint8 Acknowledger::get_bytes_unacknowledged() {
+    return bytes_unacknowledged;
+}
@@ -0,0 +1,25 @@
+#ifndef ACKNOWLEDGER_H
+#define ACKNOWLEDGER_H
+
+#include "util.h"
+
+// Acknowledges bytes read from the host. Each acknowledgement is the total number of bytes read so far (mod 256),
+// so a single acknowledgement covers every byte read before it.
+class Acknowledger {
+    private:
+        uint8 bytes_per_acknowledgement;
+        uint8 bytes_read;
+        uint8 bytes_unacknowledged;
+
+    public:
+        Acknowledger();
+        Acknowledger(uint8 the_bytes_per_acknowledgement);
+
+        void on_byte_read(void (*acknowledge)(uint8));
+        void flush(void (*acknowledge)(uint8));
+
+        uint8 get_bytes_read();
+        uint8 get_bytes_unacknowledged();
+};
+
+#endif
@@ -1,7 +1,7 @@
 #include "util.h"
 #include "group_setup_state.h"
 
-GroupSetupState::GroupSetupState(uint8 number_of_expected_groups) {
+GroupSetupState::GroupSetupState(uint16 number_of_expected_groups) {
     state = GroupSetupStateState::START_OF_MESSAGE;
     band = nullptr;
 
@@ -17,7 +17,7 @@ GroupSetupState::~GroupSetupState() {
     band = nullptr;
 }
 
-void GroupSetupState::update_state(uint8 byte, void (*on_group_received)(uint16*, uint8, uint8)) {
+void GroupSetupState::update_state(uint8 byte, void (*on_group_received)(uint16*, uint8, uint16)) {
     if (state == GroupSetupStateState::START_OF_MESSAGE && byte == START_OF_MESSAGE_CODE) {
         state = GroupSetupStateState::NUMBER_OF_LED_RANGES;
     }
@@ -26,8 +26,8 @@ class GroupSetupState {
         GroupSetupStateState state;
         uint16* band;
 
-        uint8 groups_expected;
-        uint8 groups_received;
+        uint16 groups_expected;
+        uint16 groups_received;
 
         uint8 led_ranges_expected;
         uint8 led_ranges_received;
@@ -39,10 +39,10 @@ class GroupSetupState {
         uint8 end_led_upper_byte;
 
     public:
-        GroupSetupState(uint8 number_of_expected_groups);
+        GroupSetupState(uint16 number_of_expected_groups);
         ~GroupSetupState();
 
-        void update_state(uint8 byte, void (*on_group_received)(uint16*, uint8, uint8));
+        void update_state(uint8 byte, void (*on_group_received)(uint16*, uint8, uint16));
         GroupSetupStateState get_state();
 
     private:
@@ -3,57 +3,81 @@
 #include <FastLED_NeoPixel.h>
 #include "packet_state.h"
 #include "group_setup_state.h"
+#include "acknowledger.h"
 #include "array.h"
 
 #define SERIAL_BAUD_RATE 1999999
 #define NUMBER_OF_LEDS 300
 #define PIN_NUMBER 6
-#define BYTES_PER_PACKET 4
-#define DIVISOR 3
+
+// Protocol version 1 sends counts, groups and palette indices as 1 byte each; version 2 sends them as 2 bytes.
+#define PROTOCOL_VERSION 2
+
+// The host never has more than WINDOW_SIZE unacknowledged bytes in flight, so WINDOW_SIZE must not exceed
+// the serial receive buffer (64 bytes on most Arduinos) or incoming bytes will be dropped.
+#define WINDOW_SIZE 64
+#define BYTES_PER_ACKNOWLEDGEMENT 16
+
+void send_acknowledgement(uint8 bytes_read) {
+    Serial.write(bytes_read);
+}
 
 class SerialReader {
     private:
-        uint8 dividend;
-        uint8 divisor;
+        Acknowledger acknowledger;
 
     public:
-        SerialReader(uint8 divisor) {
-            dividend = 0;
-            this->divisor = divisor;
+        SerialReader(uint8 bytes_per_acknowledgement) {
+            acknowledger = Acknowledger(bytes_per_acknowledgement);
+        };
+
+        uint16 read_number(unsigned int bytes_per_number) {
+            uint16 number = 0;
+
+            for (unsigned int i = 0; i < bytes_per_number; i++) {
+                number |= (uint16)read() << (8 * i);
+            }
+
+            return number;
         };
 
         uint8 read() {
             while (!Serial.available()) {
-                ;
+                acknowledger.flush(send_acknowledgement);
             }
 
             uint8 byte_ = Serial.read();
 
-            if (dividend == 0) {
-                Serial.write(byte_);
-            }
-
-            dividend = (dividend + 1) % divisor;
+            acknowledger.on_byte_read(send_acknowledgement);
             return byte_;
         };
+
+        void flush() {
+            acknowledger.flush(send_acknowledgement);
+        };
 };
 
 
 SerialReader* serial_reader;
 
 u16Array* groups;
+uint16 number_of_groups = 0;
+
+unsigned int bytes_per_number = 1;
 
 FastLED_NeoPixel<NUMBER_OF_LEDS, PIN_NUMBER, NEO_GRB> led_strip; // Neopixel Strip
 // FastLED_NeoPixel<NUMBER_OF_LEDS, PIN_NUMBER, NEO_RGB> led_strip; // PL9823
 
-PacketState packet_state = PacketState(BYTES_PER_PACKET);
+// Set up once the number of groups is known. Full frames are written straight into the strip's pixel buffer
+// (RGB order, 3 bytes per LED).
+PacketState* packet_state = nullptr;
 GroupSetupState* group_setup_state = nullptr;
 
 
 void setup() {
     Serial.begin(SERIAL_BAUD_RATE, SERIAL_8N1);
 
-    serial_reader = new SerialReader(DIVISOR);
+    serial_reader = new SerialReader(BYTES_PER_ACKNOWLEDGEMENT);
 
     while (!Serial) { // For Arduino Wifi-Rev2
       ;
@@ -71,7 +95,17 @@ void setup() {
     Serial.write(LOW_ORDER_BYTE);
     Serial.write(HIGH_ORDER_BYTE);
 
-    Serial.write(DIVISOR);
+    // The host answers with the version both sides will use, which is never newer than ours.
+    Serial.write(PROTOCOL_VERSION);
+
+    while (!Serial.available()) {
+        ;
+    }
+
+    const uint8 protocol_version = Serial.read();
+    bytes_per_number = (protocol_version >= 2) ? 2 : 1;
+
+    Serial.write(WINDOW_SIZE);
 
     const uint8 brightness = serial_reader->read();
     led_strip.setBrightness(brightness);
@@ -79,15 +113,33 @@ void setup() {
     led_strip.begin();
     led_strip.show();
 
-    uint8 number_of_bands = serial_reader->read();
+    number_of_groups = serial_reader->read_number(bytes_per_number);
 
-    if (number_of_bands > 0) {
-        group_setup_state = new GroupSetupState(number_of_bands);
-        groups = new u16Array[number_of_bands];
+    if (number_of_groups > 0) {
+        group_setup_state = new GroupSetupState(number_of_groups);
+        groups = new u16Array[number_of_groups];
 
         while (group_setup_state->get_state() != GroupSetupStateState::END) {
             group_setup_state->update_state(serial_reader->read(), on_group_received);
         }
+
+        // The host never sends more packets, palette colors or runs than there are groups, and a strip never needs
+        // more groups than LEDs. Allocated after the groups, so PacketState gets by with whatever RAM is left.
+        const unsigned int MAXIMUM_COUNT = (number_of_groups < NUMBER_OF_LEDS) ? number_of_groups : NUMBER_OF_LEDS;
+
+        packet_state = new PacketState(bytes_per_number + 3, led_strip.getPixels(), NUMBER_OF_LEDS * PacketState::BYTES_PER_PIXEL,
+                                       bytes_per_number, MAXIMUM_COUNT);
+
+        // Since protocol version 2, the host is told how many packets, palette colors or runs fit in one message once
+        // the group setup has been acknowledged; that is fewer than MAXIMUM_COUNT if RAM ran out.
+        if (protocol_version >= 2) {
+            serial_reader->flush();
+
+            const uint16 ALLOCATED_COUNT = (uint16)packet_state->get_maximum_count();
+
+            Serial.write((uint8)ALLOCATED_COUNT);
+            Serial.write((uint8)(ALLOCATED_COUNT >> 8));
+        }
     }
     else {
         while(1);
@@ -97,34 +149,69 @@ void setup() {
 void loop() {
     if (Serial.available()) {
         uint8 serial_byte = serial_reader->read();
-        packet_state.update_state(serial_byte, on_end_of_message);
+        packet_state->update_state(serial_byte, on_end_of_message, on_end_of_frame, on_end_of_palette_message);
+    }
+    else {
+        serial_reader->flush();
+    }
+}
+
+void set_group_color(unsigned int group_number, uint32_t rgb) {
+    if (group_number >= number_of_groups) {
+        return;
+    }
+
+    u16Array* group = &groups[group_number];
+
+    for (unsigned int i = 0; i < group->get_length(); i += 2) {
+        uint16 start_led = group->get(i);
+        uint16 end_led= group->get(i + 1);
+
+        for (uint16 led = start_led; led < end_led; led++) {
+            led_strip.setPixelColor(led, rgb);
+        }
     }
 }
 
 void on_end_of_message(uint8* packets, unsigned int number_of_packets) {
+    const unsigned int BYTES_PER_PACKET = bytes_per_number + 3;
+
     for (unsigned int packet_number = 0; packet_number < number_of_packets; packet_number++) {
-        unsigned int packet_start = packet_number * BYTES_PER_PACKET;
+        uint8* packet = &packets[packet_number * BYTES_PER_PACKET];
+        uint8* color = &packet[bytes_per_number];
 
-        uint8 band_number = packets[packet_start];
-        u16Array* band = &groups[band_number];
+        unsigned int group_number = (bytes_per_number == 2) ? uint8_to_uint16(packet[1], packet[0]) : packet[0];
 
-        uint32_t rgb = led_strip.Color(packets[packet_start+1], packets[packet_start+2], packets[packet_start+3]);
+        set_group_color(group_number, led_strip.Color(color[0], color[1], color[2]));
+    }
 
-        for (unsigned int i = 0; i < band->get_length(); i += 2) {
-            uint16 start_led = band->get(i);
-            uint16 end_led= band->get(i + 1);
+    led_strip.show();
+}
 
-            for (uint16 led = start_led; led < end_led; led++) {
-                led_strip.setPixelColor(led, rgb);
-            }
+void on_end_of_palette_message(uint8* palette, unsigned int palette_size, uint16* runs, unsigned int number_of_runs) {
+    // PacketState has already checked every run's palette index against palette_size
+    for (unsigned int run_number = 0; run_number < number_of_runs; run_number++) {
+        unsigned int run_start = run_number * PacketState::NUMBERS_PER_RUN;
+
+        unsigned int start_group = runs[run_start];
+        unsigned int end_group = start_group + runs[run_start+1];
+        unsigned int color_start = runs[run_start+2] * PacketState::BYTES_PER_PIXEL;
+
+        uint32_t rgb = led_strip.Color(palette[color_start], palette[color_start+1], palette[color_start+2]);
+
+        for (unsigned int group_number = start_group; group_number < end_group; group_number++) {
+            set_group_color(group_number, rgb);
         }
     }
 
     led_strip.show();
 }
 
+void on_end_of_frame() {
+    led_strip.show();
+}
 
-void on_group_received(uint16* led_ranges, uint8 number_of_led_ranges, uint8 band_number) {
+void on_group_received(uint16* led_ranges, uint8 number_of_led_ranges, uint16 band_number) {
     unsigned int led_ranges_length = number_of_led_ranges * GroupSetupState::LEDS_PER_LED_RANGE;
     groups[band_number].set_length(led_ranges_length);
 
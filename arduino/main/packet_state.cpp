@@ -1,35 +1,161 @@
+#include <new>
 #include "packet_state.h"
 
-PacketState::PacketState() {
-    state = PacketStateState::START_OF_MESSAGE;
-    packets = nullptr;
-    packets_remaining = 0;
-    packet_bytes_remaining = 0;
-    bytes_per_packet = 0;
+PacketState::PacketState(unsigned int the_bytes_per_packet) : PacketState(the_bytes_per_packet, nullptr, 0, 1) {
+}
+
+PacketState::PacketState(unsigned int the_bytes_per_packet, uint8* the_frame_buffer, unsigned int the_frame_buffer_length)
+    : PacketState(the_bytes_per_packet, the_frame_buffer, the_frame_buffer_length, 1) {
+}
+
+PacketState::PacketState(unsigned int the_bytes_per_packet, uint8* the_frame_buffer, unsigned int the_frame_buffer_length,
+                         unsigned int the_bytes_per_number)
+    : PacketState(the_bytes_per_packet, the_frame_buffer, the_frame_buffer_length, the_bytes_per_number, DEFAULT_MAXIMUM_COUNT) {
 }
 
-PacketState::PacketState(unsigned int the_bytes_per_packet) {
+PacketState::PacketState(unsigned int the_bytes_per_packet, uint8* the_frame_buffer, unsigned int the_frame_buffer_length,
+                         unsigned int the_bytes_per_number, unsigned int the_maximum_count) {
     bytes_per_packet = the_bytes_per_packet;
     packet_bytes_remaining = 0;
+    bytes_per_number = the_bytes_per_number;
+    number_bytes_read = 0;
+    number = 0;
     state = PacketStateState::START_OF_MESSAGE;
-    packets = nullptr;
     packets_remaining = 0;
+    frame_buffer = the_frame_buffer;
+    frame_buffer_length = the_frame_buffer_length;
+    palette_size = 0;
+    number_of_runs = 0;
+
+    // Runs come first in the buffer, so they are aligned for uint16. Without exceptions, a failed allocation returns
+    // nullptr; then fewer packets, palette colors and runs are allowed until the buffer fits.
+    maximum_count = the_maximum_count;
+    message_buffer = nullptr;
+
+    while (true) {
+        const unsigned int PACKETS_LENGTH = maximum_count * bytes_per_packet;
+        const unsigned int RUNS_LENGTH = maximum_count * NUMBERS_PER_RUN * sizeof(uint16);
+        const unsigned int PALETTE_MESSAGE_LENGTH = RUNS_LENGTH + get_maximum_palette_size() * BYTES_PER_PIXEL;
+
+        message_buffer = new (std::nothrow) uint8[(PACKETS_LENGTH > PALETTE_MESSAGE_LENGTH) ? PACKETS_LENGTH : PALETTE_MESSAGE_LENGTH];
+
+        if (message_buffer != nullptr || maximum_count == 0) {
+            packets = message_buffer;
+            runs = reinterpret_cast<uint16*>(message_buffer);
+            palette = (message_buffer != nullptr) ? &message_buffer[RUNS_LENGTH] : nullptr;
+            break;
+        }
+
+        maximum_count /= 2;
+    }
 }
 
 PacketState::~PacketState() {
-    delete[] packets;
+    delete[] message_buffer;
 }
 
 void PacketState::update_state(uint8 byte, void (*on_end_of_message)(uint8*, unsigned int)) {
+    update_state(byte, on_end_of_message, nullptr);
+}
+
+void PacketState::update_state(uint8 byte, void (*on_end_of_message)(uint8*, unsigned int), void (*on_end_of_frame)()) {
+    update_state(byte, on_end_of_message, on_end_of_frame, nullptr);
+}
+
+void PacketState::update_state(uint8 byte, void (*on_end_of_message)(uint8*, unsigned int), void (*on_end_of_frame)(),
+                               void (*on_end_of_palette_message)(uint8*, unsigned int, uint16*, unsigned int)) {
     if (state == PacketStateState::START_OF_MESSAGE && byte == START_OF_MESSAGE_CODE) {
         state = PacketStateState::NUMBER_OF_PACKETS;
-    } else if (state == PacketStateState::NUMBER_OF_PACKETS) {
-        packets_expected = packets_remaining = byte;
-        packet_bytes_remaining = bytes_per_packet;
-        state = (packets_expected > 0x00) ? PacketStateState::PACKET : PacketStateState::END_OF_MESSAGE;
+    } else if (state == PacketStateState::START_OF_MESSAGE && byte == FRAME_START_OF_MESSAGE_CODE && frame_buffer != nullptr) {
+        message_check_sum = 0;
+        state = PacketStateState::FRAME_START_LED_LOWER_BYTE;
+    } else if (state == PacketStateState::FRAME_START_LED_LOWER_BYTE) {
+        frame_header[0] = byte;
+        message_check_sum += byte;
+        state = PacketStateState::FRAME_START_LED_UPPER_BYTE;
+    } else if (state == PacketStateState::FRAME_START_LED_UPPER_BYTE) {
+        frame_header[1] = byte;
+        message_check_sum += byte;
+        state = PacketStateState::FRAME_NUMBER_OF_LEDS_LOWER_BYTE;
+    } else if (state == PacketStateState::FRAME_NUMBER_OF_LEDS_LOWER_BYTE) {
+        frame_header[2] = byte;
+        message_check_sum += byte;
+        state = PacketStateState::FRAME_NUMBER_OF_LEDS_UPPER_BYTE;
+    } else if (state == PacketStateState::FRAME_NUMBER_OF_LEDS_UPPER_BYTE) {
+        frame_header[3] = byte;
+        message_check_sum += byte;
+        start_frame();
+    } else if (state == PacketStateState::FRAME_PIXEL) {
+        frame_buffer[frame_index] = byte;
+        message_check_sum += byte;
+        frame_index++;
+
+        if (frame_index == frame_end_index) {
+            state = PacketStateState::FRAME_CHECK_SUM;
+        }
+    } else if (state == PacketStateState::FRAME_CHECK_SUM) {
+        state = (byte == message_check_sum) ? PacketStateState::FRAME_END_OF_MESSAGE : PacketStateState::START_OF_MESSAGE;
+    } else if (state == PacketStateState::FRAME_END_OF_MESSAGE) {
+        if (byte == END_OF_MESSAGE_CODE) {
+            if (on_end_of_frame != nullptr) {
+                on_end_of_frame();
+            }
+
+            state = PacketStateState::START_OF_MESSAGE;
+        }
+    } else if (state == PacketStateState::START_OF_MESSAGE && byte == PALETTE_START_OF_MESSAGE_CODE && on_end_of_palette_message != nullptr) {
+        message_check_sum = 0;
+        state = PacketStateState::PALETTE_SIZE;
+    } else if (state == PacketStateState::PALETTE_SIZE) {
+        message_check_sum += byte;
+
+        if (read_number(byte)) {
+            start_palette(number);
+        }
+    } else if (state == PacketStateState::PALETTE_COLOR) {
+        palette[palette_byte_index] = byte;
+        message_check_sum += byte;
+        palette_byte_index++;
+
+        if (palette_byte_index == palette_size * BYTES_PER_PIXEL) {
+            state = PacketStateState::PALETTE_NUMBER_OF_RUNS;
+        }
+    } else if (state == PacketStateState::PALETTE_NUMBER_OF_RUNS) {
+        message_check_sum += byte;
+
+        if (read_number(byte)) {
+            start_runs(number);
+        }
+    } else if (state == PacketStateState::PALETTE_RUN) {
+        message_check_sum += byte;
+
+        if (read_number(byte)) {
+            runs[run_number_index] = (uint16)number;
+            run_number_index++;
 
-        delete[] packets;
-        packets = new uint8[packets_expected * bytes_per_packet];
+            if (run_number_index % NUMBERS_PER_RUN == 0 && number >= palette_size) {
+                state = PacketStateState::START_OF_MESSAGE; // The run's palette index is out of range
+            } else if (run_number_index == number_of_runs * NUMBERS_PER_RUN) {
+                state = PacketStateState::PALETTE_CHECK_SUM;
+            }
+        }
+    } else if (state == PacketStateState::PALETTE_CHECK_SUM) {
+        state = (byte == message_check_sum) ? PacketStateState::PALETTE_END_OF_MESSAGE : PacketStateState::START_OF_MESSAGE;
+    } else if (state == PacketStateState::PALETTE_END_OF_MESSAGE) {
+        if (byte == END_OF_MESSAGE_CODE) {
+            on_end_of_palette_message(palette, palette_size, runs, number_of_runs);
+            state = PacketStateState::START_OF_MESSAGE;
+        }
+    } else if (state == PacketStateState::NUMBER_OF_PACKETS) {
+        if (read_number(byte)) {
+            if (number > maximum_count) {
+                state = PacketStateState::START_OF_MESSAGE;
+            } else {
+                packets_expected = packets_remaining = number;
+                packet_bytes_remaining = bytes_per_packet;
+                state = (packets_expected > 0x00) ? PacketStateState::PACKET : PacketStateState::END_OF_MESSAGE;
+            }
+        }
     } else if (state == PacketStateState::PACKET) {
         const unsigned int PACKET_INDEX = bytes_per_packet - packet_bytes_remaining;
         packets[(get_packet_number() * bytes_per_packet) + PACKET_INDEX] = byte;
@@ -69,10 +195,74 @@ uint8 PacketState::get_check_sum() {
     return sum;
 }
 
+void PacketState::start_frame() {
+    const unsigned int START_LED = uint8_to_uint16(frame_header[1], frame_header[0]);
+    const unsigned int NUMBER_OF_LEDS = uint8_to_uint16(frame_header[3], frame_header[2]);
+
+    frame_index = START_LED * BYTES_PER_PIXEL;
+    frame_end_index = frame_index + NUMBER_OF_LEDS * BYTES_PER_PIXEL;
+
+    if (frame_end_index > frame_buffer_length) {
+        state = PacketStateState::START_OF_MESSAGE;
+    } else {
+        state = (NUMBER_OF_LEDS > 0) ? PacketStateState::FRAME_PIXEL : PacketStateState::FRAME_CHECK_SUM;
+    }
+}
+
+// Reads one byte of a little endian number that is bytes_per_number bytes long. Returns true once the whole number
+// has been read into number.
+bool PacketState::read_number(uint8 byte) {
+    if (number_bytes_read == 0) {
+        number = 0;
+    }
+
+    number |= (unsigned int)byte << (8 * number_bytes_read);
+    number_bytes_read++;
+
+    if (number_bytes_read < bytes_per_number) {
+        return false;
+    }
+
+    number_bytes_read = 0;
+    return true;
+}
+
+void PacketState::start_palette(unsigned int the_palette_size) {
+    if (the_palette_size > get_maximum_palette_size()) {
+        state = PacketStateState::START_OF_MESSAGE;
+        return;
+    }
+
+    palette_size = the_palette_size;
+    palette_byte_index = 0;
+
+    state = (palette_size > 0) ? PacketStateState::PALETTE_COLOR : PacketStateState::PALETTE_NUMBER_OF_RUNS;
+}
+
+void PacketState::start_runs(unsigned int the_number_of_runs) {
+    if (the_number_of_runs > maximum_count) {
+        state = PacketStateState::START_OF_MESSAGE;
+        return;
+    }
+
+    number_of_runs = the_number_of_runs;
+    run_number_index = 0;
+
+    state = (number_of_runs > 0) ? PacketStateState::PALETTE_RUN : PacketStateState::PALETTE_CHECK_SUM;
+}
+
 unsigned int PacketState::get_packet_number() {
     return packets_expected - packets_remaining;
 }
 
 PacketStateState PacketState::get_state() {
     return state;
+}
+
+unsigned int PacketState::get_maximum_count() {
+    return maximum_count;
+}
+
+unsigned int PacketState::get_maximum_palette_size() {
+    return (maximum_count < MAXIMUM_PALETTE_SIZE) ? maximum_count : MAXIMUM_PALETTE_SIZE;
 }
\ No newline at end of file
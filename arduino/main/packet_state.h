@@ -8,16 +8,60 @@ enum class PacketStateState {
     NUMBER_OF_PACKETS,
     PACKET,
     CHECK_SUM,
-    END_OF_MESSAGE
+    END_OF_MESSAGE,
+    FRAME_START_LED_LOWER_BYTE,
+    FRAME_START_LED_UPPER_BYTE,
+    FRAME_NUMBER_OF_LEDS_LOWER_BYTE,
+    FRAME_NUMBER_OF_LEDS_UPPER_BYTE,
+    FRAME_PIXEL,
+    FRAME_CHECK_SUM,
+    FRAME_END_OF_MESSAGE,
+    PALETTE_SIZE,
+    PALETTE_COLOR,
+    PALETTE_NUMBER_OF_RUNS,
+    PALETTE_RUN,
+    PALETTE_CHECK_SUM,
+    PALETTE_END_OF_MESSAGE
 };
 
+// Parses the messages the host sends after group setup. The first byte of a message is its type:
+//
+//      START_OF_MESSAGE_CODE         number_of_packets, (group, red, green, blue, check_sum) * number_of_packets, END_OF_MESSAGE_CODE
+//      FRAME_START_OF_MESSAGE_CODE   start_led (2 bytes), number_of_leds (2 bytes), (red, green, blue) * number_of_leds, check_sum, END_OF_MESSAGE_CODE
+//      PALETTE_START_OF_MESSAGE_CODE palette_size, (red, green, blue) * palette_size, number_of_runs,
+//                                    (start_group, number_of_groups, palette_index) * number_of_runs, check_sum, END_OF_MESSAGE_CODE
+//
+// Counts, groups and palette indices are bytes_per_number bytes each (little endian): 1 byte in protocol version 1
+// and 2 bytes in protocol version 2. Packets are handed over as raw bytes, so bytes_per_packet must be
+// bytes_per_number + 3. Palette runs are handed over as NUMBERS_PER_RUN numbers per run.
+//
+// Frame and palette check sums are the sum of every byte between the start of message code and the check sum.
+// Frame pixels are written straight into the frame buffer, so it needs no second copy; a frame whose check sum
+// fails is not shown, but its pixels stay in the frame buffer until they are overwritten.
+// A palette message colors each run of consecutive groups with one of the palette's colors.
+//
+// The host may pick a different message type for every frame. Messages with more than maximum_count packets or runs,
+// or more than MAXIMUM_PALETTE_SIZE palette colors, are dropped, so the buffers they are read into are allocated once,
+// up front. If that allocation fails, maximum_count is halved until it fits; get_maximum_count returns what was
+// allocated, so it can be reported to the host. PacketState owns those buffers and can't be copied.
 class PacketState {
     public:
         static const uint8 START_OF_MESSAGE_CODE = 0xFE;
+        static const uint8 FRAME_START_OF_MESSAGE_CODE = 0xFD;
+        static const uint8 PALETTE_START_OF_MESSAGE_CODE = 0xFC;
         static const uint8 END_OF_MESSAGE_CODE = 0xFF;
+        static const unsigned int BYTES_PER_PIXEL = 3;
+        static const unsigned int NUMBERS_PER_RUN = 3;
+        static const unsigned int DEFAULT_MAXIMUM_COUNT = 255;
+        static const unsigned int MAXIMUM_PALETTE_SIZE = 256;
 
     private:
         PacketStateState state;
+
+        // Only one message is read at a time, so packets, palettes and runs share one buffer.
+        uint8* message_buffer;
+        unsigned int maximum_count;
+
         uint8* packets;
 
         unsigned int packets_expected;
@@ -26,16 +70,50 @@ class PacketState {
         unsigned int bytes_per_packet;
         unsigned int packet_bytes_remaining;
 
+        unsigned int bytes_per_number;
+        unsigned int number_bytes_read;
+        unsigned int number;
+
+        uint8* frame_buffer;
+        unsigned int frame_buffer_length;
+
+        uint8 frame_header[4];
+        unsigned int frame_index;
+        unsigned int frame_end_index;
+        uint8 message_check_sum;
+
+        uint8* palette;
+        unsigned int palette_size;
+        uint16* runs;
+        unsigned int number_of_runs;
+        unsigned int palette_byte_index;
+        unsigned int run_number_index;
+
     public:
-        PacketState();
         PacketState(unsigned int the_bytes_per_packet);
+        PacketState(unsigned int the_bytes_per_packet, uint8* the_frame_buffer, unsigned int the_frame_buffer_length);
+        PacketState(unsigned int the_bytes_per_packet, uint8* the_frame_buffer, unsigned int the_frame_buffer_length,
+                    unsigned int the_bytes_per_number);
+        PacketState(unsigned int the_bytes_per_packet, uint8* the_frame_buffer, unsigned int the_frame_buffer_length,
+                    unsigned int the_bytes_per_number, unsigned int the_maximum_count);
+        PacketState(const PacketState&) = delete;
+        PacketState& operator=(const PacketState&) = delete;
         ~PacketState();
         void update_state(uint8 byte, void (*on_end_of_message)(uint8*, unsigned int));
+        void update_state(uint8 byte, void (*on_end_of_message)(uint8*, unsigned int), void (*on_end_of_frame)());
+        void update_state(uint8 byte, void (*on_end_of_message)(uint8*, unsigned int), void (*on_end_of_frame)(),
+                          void (*on_end_of_palette_message)(uint8*, unsigned int, uint16*, unsigned int));
         PacketStateState get_state();
+        unsigned int get_maximum_count();
 
     private:
         uint8 get_check_sum();
         unsigned int get_packet_number();
+        unsigned int get_maximum_palette_size();
+        bool read_number(uint8 byte);
+        void start_frame();
+        void start_palette(unsigned int the_palette_size);
+        void start_runs(unsigned int the_number_of_runs);
 };
 
 #endif
\ No newline at end of file
@@ -0,0 +1,127 @@
+import math
+import unittest
+
+import numpy
+from band_filters import AutomaticGainControl, EnvelopeFilter
+
+
+class TestEnvelopeFilter(unittest.TestCase):
+    SECONDS_PER_CHUNK = 0.01
+
+    def apply_chunks(self, envelope_filter: EnvelopeFilter, amplitudes, number_of_chunks: int) -> numpy.ndarray:
+        for _ in range(number_of_chunks):
+            filtered_amplitudes = envelope_filter.apply(numpy.array(amplitudes, dtype=numpy.float64), self.SECONDS_PER_CHUNK)
+
+        return filtered_amplitudes
+
+    def test_invalid_time_constants(self):
+        with self.assertRaises(ValueError):
+            EnvelopeFilter(1, -1, 100)
+
+        with self.assertRaises(ValueError):
+            EnvelopeFilter(1, 100, [100, -1])
+
+    def test_first_amplitudes_pass_through(self):
+        numpy.testing.assert_array_equal(EnvelopeFilter(2, 100, 100).apply(numpy.array([-10.0, 5.0]), self.SECONDS_PER_CHUNK),
+                                         [-10, 5])
+
+    def test_attack_time_constant(self):
+        envelope_filter = EnvelopeFilter(1, attack_milliseconds=100, release_milliseconds=1000)
+        envelope_filter.apply(numpy.array([0.0]), self.SECONDS_PER_CHUNK)
+
+        # After one time constant, a step is followed to 1 - 1 / e of its height.
+        FILTERED_AMPLITUDES = self.apply_chunks(envelope_filter, [10], 10)
+
+        self.assertAlmostEqual(FILTERED_AMPLITUDES[0], 10 * (1 - math.exp(-1)))
+
+    def test_release_time_constant(self):
+        envelope_filter = EnvelopeFilter(1, attack_milliseconds=100, release_milliseconds=1000)
+        envelope_filter.apply(numpy.array([10.0]), self.SECONDS_PER_CHUNK)
+
+        FILTERED_AMPLITUDES = self.apply_chunks(envelope_filter, [0], 100)
+
+        self.assertAlmostEqual(FILTERED_AMPLITUDES[0], 10 * math.exp(-1))
+
+    def test_time_constants_do_not_depend_on_chunk_length(self):
+        SHORT_CHUNKS = EnvelopeFilter(1, 100, 100)
+        LONG_CHUNKS = EnvelopeFilter(1, 100, 100)
+
+        for envelope_filter in (SHORT_CHUNKS, LONG_CHUNKS):
+            envelope_filter.apply(numpy.array([0.0]), self.SECONDS_PER_CHUNK)
+
+        for _ in range(4):
+            SHORT_AMPLITUDES = SHORT_CHUNKS.apply(numpy.array([10.0]), self.SECONDS_PER_CHUNK / 4)
+
+        LONG_AMPLITUDES = LONG_CHUNKS.apply(numpy.array([10.0]), self.SECONDS_PER_CHUNK)
+
+        numpy.testing.assert_allclose(SHORT_AMPLITUDES, LONG_AMPLITUDES)
+
+    def test_per_band_time_constants(self):
+        envelope_filter = EnvelopeFilter(2, attack_milliseconds=[0, 100], release_milliseconds=100)
+        envelope_filter.apply(numpy.array([0.0, 0.0]), self.SECONDS_PER_CHUNK)
+
+        FILTERED_AMPLITUDES = self.apply_chunks(envelope_filter, [10, 10], 1)
+
+        # A time constant of 0 follows immediately.
+        self.assertEqual(FILTERED_AMPLITUDES[0], 10)
+        self.assertAlmostEqual(FILTERED_AMPLITUDES[1], 10 * (1 - math.exp(-0.1)))
+
+
+class TestAutomaticGainControl(unittest.TestCase):
+    TARGET_DECIBELS = 0
+    SECONDS_PER_CHUNK = 0.05
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            AutomaticGainControl(1, self.TARGET_DECIBELS, quantile=0)
+
+        with self.assertRaises(ValueError):
+            AutomaticGainControl(1, self.TARGET_DECIBELS, half_life_seconds=0)
+
+        with self.assertRaises(ValueError):
+            AutomaticGainControl(1, self.TARGET_DECIBELS, minimum_decibels=10, maximum_decibels=10)
+
+    def test_no_quantiles_yet(self):
+        self.assertTrue(numpy.all(numpy.isnan(AutomaticGainControl(2, self.TARGET_DECIBELS).quantiles)))
+
+    def test_converges_to_target_on_steady_input(self):
+        DECIBELS_PER_BIN = 1
+        automatic_gain_control = AutomaticGainControl(2, [self.TARGET_DECIBELS, -10], decibels_per_bin=DECIBELS_PER_BIN)
+
+        for _ in range(100):
+            AMPLITUDES = automatic_gain_control.apply(numpy.array([-20.0, 15.0]), self.SECONDS_PER_CHUNK)
+
+        # Within half a bin, as the quantile is estimated at bin centers.
+        numpy.testing.assert_allclose(AMPLITUDES, [self.TARGET_DECIBELS, -10], atol=DECIBELS_PER_BIN / 2)
+
+    def test_gain_is_limited(self):
+        MAXIMUM_GAIN_DECIBELS = 30
+        automatic_gain_control = AutomaticGainControl(2, self.TARGET_DECIBELS, maximum_gain_decibels=MAXIMUM_GAIN_DECIBELS)
+
+        AMPLITUDES = automatic_gain_control.apply(numpy.array([-50.5, 50.5]), self.SECONDS_PER_CHUNK)
+
+        numpy.testing.assert_allclose(AMPLITUDES, [-50.5 + MAXIMUM_GAIN_DECIBELS, 50.5 - MAXIMUM_GAIN_DECIBELS])
+
+    def test_quantile_of_decaying_histogram(self):
+        # Every chunk is one half life, so older counts weigh 1, 1/2, 1/4, ... of the newest count.
+        HALF_LIFE_SECONDS = 1
+        automatic_gain_control = AutomaticGainControl(1, self.TARGET_DECIBELS, quantile=0.9, half_life_seconds=HALF_LIFE_SECONDS)
+
+        automatic_gain_control.apply(numpy.array([0.5]), HALF_LIFE_SECONDS)
+        self.assertEqual(automatic_gain_control.quantiles[0], 0.5)
+
+        # The quieter amplitude holds 1/1.5, then 1.5/1.75 of the weight: less than 0.9, so the louder one is the quantile.
+        for _ in range(2):
+            automatic_gain_control.apply(numpy.array([-29.5]), HALF_LIFE_SECONDS)
+            self.assertEqual(automatic_gain_control.quantiles[0], 0.5)
+
+        # Then 1.75/1.875 of the weight.
+        automatic_gain_control.apply(numpy.array([-29.5]), HALF_LIFE_SECONDS)
+        self.assertEqual(automatic_gain_control.quantiles[0], -29.5)
+
+    def test_amplitudes_outside_histogram_are_clipped(self):
+        automatic_gain_control = AutomaticGainControl(2, self.TARGET_DECIBELS, minimum_decibels=-60, maximum_decibels=120)
+
+        automatic_gain_control.apply(numpy.array([-numpy.inf, 500.0]), self.SECONDS_PER_CHUNK)
+
+        numpy.testing.assert_array_equal(automatic_gain_control.quantiles, [-59.5, 119.5])
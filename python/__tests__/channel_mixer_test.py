@@ -0,0 +1,60 @@
+import unittest
+
+import numpy
+from channel_mixer import check_band_channels, mix_channels
+
+
+class TestMixChannels(unittest.TestCase):
+    def setUp(self):
+        self.stereo = numpy.array([[100, -100],
+                                   [200, 0],
+                                   [-300, -301]], dtype=numpy.int16)
+
+    def test_mono_is_passed_through(self):
+        MONO = self.stereo[:, :1]
+
+        SAMPLES = mix_channels(MONO)
+
+        numpy.testing.assert_array_equal(SAMPLES, [100, 200, -300])
+        self.assertTrue(numpy.shares_memory(SAMPLES, MONO))
+
+    def test_stereo_is_averaged(self):
+        SAMPLES = mix_channels(self.stereo)
+
+        # Averaged as floats, so the int16 sum can't overflow and odd sums keep their half.
+        self.assertEqual(SAMPLES.dtype, numpy.float32)
+        numpy.testing.assert_array_equal(SAMPLES, [0, 100, -300.5])
+
+    def test_loud_stereo_does_not_overflow(self):
+        LOUD = numpy.full((2, 2), numpy.iinfo(numpy.int16).max, dtype=numpy.int16)
+
+        numpy.testing.assert_array_equal(mix_channels(LOUD), [numpy.iinfo(numpy.int16).max] * 2)
+
+    def test_channel_selection(self):
+        for channel in range(2):
+            with self.subTest(channel=channel):
+                SAMPLES = mix_channels(self.stereo, channel)
+
+                numpy.testing.assert_array_equal(SAMPLES, self.stereo[:, channel])
+                self.assertTrue(numpy.shares_memory(SAMPLES, self.stereo))
+
+    def test_invalid_channel(self):
+        for channel in (-1, 2):
+            with self.subTest(channel=channel):
+                with self.assertRaises(ValueError):
+                    mix_channels(self.stereo, channel)
+
+
+class TestCheckBandChannels(unittest.TestCase):
+    def test_valid_band_channels(self):
+        check_band_channels([0, 1, 1], 3, 2)
+
+    def test_one_channel_per_band(self):
+        with self.assertRaises(ValueError):
+            check_band_channels([0, 1], 3, 2)
+
+    def test_invalid_channel(self):
+        for band_channels in ([0, -1, 1], [0, 2, 1]):
+            with self.subTest(band_channels=band_channels):
+                with self.assertRaises(ValueError):
+                    check_band_channels(band_channels, 3, 2)
@@ -0,0 +1,92 @@
+import unittest
+
+import numpy
+from decimator import STOPBAND_DECIBELS, Decimator, get_decimation_factor
+
+SAMPLE_RATE = 44100
+MAXIMUM_FREQUENCY = 3000
+
+
+def get_amplitude(samples: numpy.ndarray, frequency: float, sample_rate: float) -> float:
+    '''
+        Returns:
+            `float`: The amplitude of the sine at `frequency` in `samples`, by a least squares fit.
+    '''
+    TIMES = numpy.arange(len(samples)) / sample_rate
+    BASIS = numpy.stack((numpy.sin(2 * numpy.pi * frequency * TIMES), numpy.cos(2 * numpy.pi * frequency * TIMES)), axis=1)
+    COEFFICIENTS, *_ = numpy.linalg.lstsq(BASIS, samples, rcond=None)
+
+    return float(numpy.hypot(*COEFFICIENTS))
+
+
+class TestGetDecimationFactor(unittest.TestCase):
+    def test_factor(self):
+        # 3 kHz must stay below 80% of the decimated Nyquist frequency: 44100 / 5 / 2 * 0.8 = 3528 Hz.
+        self.assertEqual(get_decimation_factor(SAMPLE_RATE, MAXIMUM_FREQUENCY), 5)
+
+    def test_no_decimation(self):
+        self.assertEqual(get_decimation_factor(SAMPLE_RATE, 20000), 1)
+
+    def test_invalid_maximum_frequency(self):
+        with self.assertRaises(ValueError):
+            get_decimation_factor(SAMPLE_RATE, 0)
+
+
+class TestDecimator(unittest.TestCase):
+    SECONDS = 1
+
+    def setUp(self):
+        self.decimator = Decimator(SAMPLE_RATE, MAXIMUM_FREQUENCY)
+
+    def decimate_sine(self, frequency: float) -> numpy.ndarray:
+        TIMES = numpy.arange(int(self.SECONDS * SAMPLE_RATE)) / SAMPLE_RATE
+        DECIMATED = self.decimator.decimate(numpy.sin(2 * numpy.pi * frequency * TIMES))
+
+        # Without the filter's start up, while its history is still zeros.
+        return DECIMATED[len(DECIMATED) // 4:]
+
+    def test_output_sample_rate(self):
+        self.assertEqual(self.decimator.factor, 5)
+        self.assertEqual(self.decimator.output_sample_rate, SAMPLE_RATE / 5)
+
+    def test_passband_ripple(self):
+        for frequency in (50, 500, 1000, 2000, MAXIMUM_FREQUENCY):
+            with self.subTest(frequency=frequency):
+                AMPLITUDE = get_amplitude(self.decimate_sine(frequency), frequency, self.decimator.output_sample_rate)
+
+                self.assertAlmostEqual(20 * numpy.log10(AMPLITUDE), 0, delta=0.1)
+
+    def test_stopband_attenuation(self):
+        # Everything that would alias onto the analysed frequencies: from output_sample_rate - MAXIMUM_FREQUENCY up.
+        for frequency in (self.decimator.output_sample_rate - MAXIMUM_FREQUENCY, 7000, 10000, 15000, 20000):
+            with self.subTest(frequency=frequency):
+                RMS = numpy.sqrt(numpy.mean(self.decimate_sine(frequency) ** 2))
+
+                self.assertLess(20 * numpy.log10(RMS * numpy.sqrt(2)), -STOPBAND_DECIBELS + 3)
+
+    def test_chunks_match_one_decimation(self):
+        SAMPLES = numpy.random.default_rng(0).normal(size=SAMPLE_RATE).astype(numpy.float32)
+        CHUNK_ENDS = numpy.cumsum([1, 4, 5, 7, 100, 1023, 2048, 4])
+
+        chunked_decimator = Decimator(SAMPLE_RATE, MAXIMUM_FREQUENCY)
+        CHUNKS = numpy.split(SAMPLES, CHUNK_ENDS)
+        CHUNKED = numpy.concatenate([chunked_decimator.decimate(chunk) for chunk in CHUNKS])
+
+        numpy.testing.assert_allclose(CHUNKED, self.decimator.decimate(SAMPLES), rtol=1e-5, atol=1e-6)
+
+    def test_multichannel(self):
+        SAMPLES = numpy.random.default_rng(0).normal(size=(4096, 2)).astype(numpy.float32)
+
+        DECIMATED = self.decimator.decimate(SAMPLES)
+
+        self.assertEqual(DECIMATED.shape, (4096 // 5 + 1, 2))
+
+        for channel in range(2):
+            with self.subTest(channel=channel):
+                numpy.testing.assert_allclose(DECIMATED[:, channel], Decimator(SAMPLE_RATE, MAXIMUM_FREQUENCY).decimate(SAMPLES[:, channel]),
+                                              rtol=1e-5, atol=1e-6)
+
+    def test_no_decimation_returns_samples(self):
+        SAMPLES = numpy.arange(10, dtype=numpy.int16)
+
+        self.assertIs(Decimator(SAMPLE_RATE, 20000).decimate(SAMPLES), SAMPLES)
@@ -0,0 +1,467 @@
+import threading
+import time
+import unittest
+from typing import List, Optional, Tuple
+from unittest.mock import patch
+
+from grouped_leds import (ADAPTIVE_ENCODING, ENCODINGS, FRAME_ENCODING, FRAME_START_OF_MESSAGE_CODE, GROUP_COLOR_START_OF_MESSAGE_CODE,
+                          PACKET_ENCODING, PALETTE_ENCODING, PALETTE_START_OF_MESSAGE_CODE, AsyncGroupedLeds, InterpolatedGroupedLeds,
+                          ProductionGroupedLeds, SerialGroupedLeds, split_group_led_ranges)
+from libraries.serial import PROTOCOL_VERSION_1, PROTOCOL_VERSION_2, FakeSerial, SerialException
+from serial_statistics import SerialStatistics
+from util import RGB
+
+WAIT_SECONDS = 2
+SLEEP = time.sleep
+
+
+class FakeGroupedLeds(ProductionGroupedLeds):
+    def __init__(self, number_of_groups: int):
+        '''
+            Records every call to `set_colors`. Calls block until `block` is set, if it is given, and raise `error` if it
+            is set. `calls_started` counts the calls, including those that are still blocked.
+        '''
+        super().__init__((0, number_of_groups), [[(group, group + 1)] for group in range(number_of_groups)])
+
+        self.calls: List[Tuple[List[Tuple[int, RGB]], Optional[float]]] = []
+        self.calls_started = 0
+        self.block: Optional[threading.Event] = None
+        self.error: Optional[Exception] = None
+
+        self.__lock = threading.Lock()
+
+    def set_colors(self, group_colors, capture_time=None):
+        group_colors = [(group, RGB(*color)) for group, color in group_colors]
+        self.calls_started += 1
+
+        if (self.block is not None):
+            self.block.wait(WAIT_SECONDS)
+
+        if (self.error is not None):
+            raise self.error
+
+        with self.__lock:
+            super().set_colors(group_colors, capture_time)
+            self.calls.append((group_colors, capture_time))
+
+    def get_colors(self) -> List[RGB]:
+        with self.__lock:
+            return [self.get_group_color(group) for group in range(self.number_of_groups)]
+
+
+def wait_until(condition) -> bool:
+    DEADLINE = time.monotonic() + WAIT_SECONDS
+
+    while (not condition()):
+        if (time.monotonic() >= DEADLINE):
+            return False
+
+        SLEEP(0.001)
+
+    return True
+
+
+def wait_for_error(set_colors) -> Optional[Exception]:
+    '''
+        Returns:
+            `Exception | None`: The error raised by calling `set_colors` once a background thread failed.
+    '''
+    errors: List[Exception] = []
+
+    def raises() -> bool:
+        try:
+            set_colors()
+            return False
+
+        except Exception as error:
+            errors.append(error)
+            return True
+
+    wait_until(raises)
+
+    return errors[0] if (len(errors) > 0) else None
+
+
+class TestInterpolatedGroupedLeds(unittest.TestCase):
+    NUMBER_OF_GROUPS = 2
+    FRAMES_PER_SECOND = 1000
+    SECONDS_PER_TRANSITION = 10
+
+    def setUp(self):
+        # A fake clock for the render thread, so transitions progress only when a test advances it. Sleeps are kept
+        # short, as the render thread would otherwise wait for the fake clock to catch up.
+        self.now = 0.0
+
+        for time_patch in (patch('grouped_leds.time.monotonic', new=lambda: self.now),
+                           patch('grouped_leds.time.sleep', new=lambda seconds: SLEEP(0.001))):
+            time_patch.start()
+            self.addCleanup(time_patch.stop)
+
+        self.fake_grouped_leds = FakeGroupedLeds(self.NUMBER_OF_GROUPS)
+        self.interpolated_grouped_leds = InterpolatedGroupedLeds(self.fake_grouped_leds, self.FRAMES_PER_SECOND,
+                                                                 self.SECONDS_PER_TRANSITION)
+        self.addCleanup(self.interpolated_grouped_leds.close)
+
+    def assert_shown(self, group: int, color: RGB):
+        wait_until(lambda: self.fake_grouped_leds.get_colors()[group] == color)
+
+        self.assertEqual(self.fake_grouped_leds.get_colors()[group], color)
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            InterpolatedGroupedLeds(self.fake_grouped_leds, 0, self.SECONDS_PER_TRANSITION)
+
+        with self.assertRaises(ValueError):
+            InterpolatedGroupedLeds(self.fake_grouped_leds, self.FRAMES_PER_SECOND, 0)
+
+        with self.assertRaises(ValueError):
+            InterpolatedGroupedLeds(self.fake_grouped_leds, self.FRAMES_PER_SECOND, self.SECONDS_PER_TRANSITION, 'invalid')
+
+    def test_reaches_exact_end_colors(self):
+        END_COLOR = RGB(255, 101, 7)
+
+        self.interpolated_grouped_leds.set_colors([(0, END_COLOR)])
+        self.now = self.SECONDS_PER_TRANSITION / 2
+        self.assert_shown(0, RGB(128, 50, 4))
+
+        self.now = self.SECONDS_PER_TRANSITION
+        self.assert_shown(0, END_COLOR)
+        self.assertEqual(self.fake_grouped_leds.get_colors()[1], RGB())
+
+    def test_new_colors_mid_transition_start_from_the_shown_colors(self):
+        self.interpolated_grouped_leds.set_colors([(0, RGB(200, 200, 200))])
+        self.now = self.SECONDS_PER_TRANSITION / 2
+        self.assert_shown(0, RGB(100, 100, 100))
+
+        # Blends from (100, 100, 100), not from black or from (200, 200, 200).
+        self.interpolated_grouped_leds.set_colors([(0, RGB(0, 0, 0))])
+        self.now += self.SECONDS_PER_TRANSITION / 4
+        self.assert_shown(0, RGB(75, 75, 75))
+
+        self.assertEqual(self.interpolated_grouped_leds.get_group_color(0), RGB(0, 0, 0))
+
+    def test_close_shows_end_colors(self):
+        END_COLOR = RGB(10, 20, 30)
+
+        self.interpolated_grouped_leds.set_colors([(1, END_COLOR)])
+        self.interpolated_grouped_leds.close()
+
+        self.assertEqual(self.fake_grouped_leds.get_colors()[1], END_COLOR)
+
+    def test_render_error_reaches_the_caller(self):
+        ERROR = RuntimeError('output failed')
+
+        self.fake_grouped_leds.error = ERROR
+        self.interpolated_grouped_leds.set_colors([(0, RGB(255, 255, 255))])
+        self.now = self.SECONDS_PER_TRANSITION
+
+        self.assertIs(wait_for_error(lambda: self.interpolated_grouped_leds.set_colors([(0, RGB())])), ERROR)
+
+        self.fake_grouped_leds.error = None
+
+
+class TestAsyncGroupedLeds(unittest.TestCase):
+    NUMBER_OF_GROUPS = 2
+
+    def setUp(self):
+        self.fake_grouped_leds = FakeGroupedLeds(self.NUMBER_OF_GROUPS)
+        self.async_grouped_leds = AsyncGroupedLeds(self.fake_grouped_leds)
+        self.addCleanup(self.async_grouped_leds.close)
+
+    def block_on_first_frame(self) -> threading.Event:
+        '''
+            Sets a first frame and waits until the background thread is blocked writing it.
+
+            Returns:
+                `threading.Event`: Unblocks the background thread once set.
+        '''
+        block = threading.Event()
+        self.addCleanup(block.set)
+
+        self.fake_grouped_leds.block = block
+        self.async_grouped_leds.set_colors([(0, RGB(1, 1, 1))], capture_time=1.0)
+        self.assertTrue(wait_until(lambda: self.fake_grouped_leds.calls_started == 1))
+
+        return block
+
+    def test_mailbox_keeps_only_the_latest_frame(self):
+        block = self.block_on_first_frame()
+
+        self.async_grouped_leds.set_colors([(0, RGB(2, 2, 2))], capture_time=2.0)
+        self.async_grouped_leds.set_colors([(0, RGB(3, 3, 3)), (1, RGB(4, 4, 4))], capture_time=3.0)
+
+        # Shown to callers right away, though not written yet.
+        self.assertEqual(self.async_grouped_leds.get_group_color(0), RGB(3, 3, 3))
+
+        block.set()
+        self.assertTrue(wait_until(lambda: self.async_grouped_leds.frames_written == 2))
+
+        self.assertEqual(self.fake_grouped_leds.calls, [([(0, RGB(1, 1, 1))], 1.0),
+                                                        ([(0, RGB(3, 3, 3)), (1, RGB(4, 4, 4))], 3.0)])
+        self.assertEqual(self.async_grouped_leds.frames_dropped, 1)
+
+    def test_close_writes_the_pending_frame_and_joins_the_thread(self):
+        block = self.block_on_first_frame()
+
+        self.async_grouped_leds.set_colors([(1, RGB(5, 5, 5))])
+
+        block.set()
+        self.async_grouped_leds.close()
+
+        self.assertFalse(self.async_grouped_leds._AsyncGroupedLeds__thread.is_alive())
+        self.assertEqual(self.fake_grouped_leds.calls[-1], ([(1, RGB(5, 5, 5))], None))
+        self.assertEqual(self.fake_grouped_leds.get_colors(), [RGB(1, 1, 1), RGB(5, 5, 5)])
+
+    def test_write_error_reaches_the_caller(self):
+        ERROR = RuntimeError('output failed')
+
+        self.fake_grouped_leds.error = ERROR
+        self.async_grouped_leds.set_colors([(0, RGB(255, 255, 255))])
+
+        self.assertIs(wait_for_error(lambda: self.async_grouped_leds.set_colors([(0, RGB())])), ERROR)
+
+        self.fake_grouped_leds.error = None
+
+
+class TestSplitGroupLedRanges(unittest.TestCase):
+    NUMBERS_OF_LEDS = [10, 10]
+
+    def split(self, led_ranges: List[Tuple[int, int]]) -> List[List[Tuple[int, int]]]:
+        '''
+            Returns:
+                `List[List[Tuple[int, int]]]`: The led ranges of a group with `led_ranges` on each controller.
+        '''
+        return [group_led_ranges[0] for _, group_led_ranges in split_group_led_ranges((0, 20), [led_ranges], self.NUMBERS_OF_LEDS)]
+
+    def test_group_spanning_two_controllers(self):
+        self.assertEqual(self.split([(8, 13)]), [[(8, 10)], [(0, 3)]])
+
+    def test_group_without_leds(self):
+        self.assertEqual(self.split([]), [[], []])
+
+    def test_ranges_on_a_boundary(self):
+        self.assertEqual(self.split([(5, 10)]), [[(5, 10)], []])
+        self.assertEqual(self.split([(10, 15)]), [[], [(0, 5)]])
+
+    def test_led_range(self):
+        SPLITS = split_group_led_ranges((3, 17), [[(0, 20)]], self.NUMBERS_OF_LEDS)
+
+        self.assertEqual(SPLITS, [((3, 10), [[(3, 10)]]), ((0, 7), [[(0, 7)]])])
+
+    def test_led_range_larger_than_controllers(self):
+        with self.assertRaises(ValueError):
+            split_group_led_ranges((0, 21), [], self.NUMBERS_OF_LEDS)
+
+
+class AcknowledgingSerial(FakeSerial):
+    def __init__(self, number_of_leds: int = 300, protocol_version: int = PROTOCOL_VERSION_2):
+        '''
+            Each read returns the next of `reads`. Once there are none left, each read returns `fixed_read` if it is set,
+            and otherwise acknowledges every byte written so far; a 2 byte read returns `maximum_count`, which the
+            controller reports after the group setup. Every write is kept in `writes`.
+        '''
+        super().__init__(number_of_leds, protocol_version)
+
+        self.reads: List[bytes] = []
+        self.fixed_read: Optional[bytes] = None
+        self.maximum_count = 0xFFFF
+        self.writes: List[bytes] = []
+        self.bytes_written = 0
+        self.maximum_bytes_in_flight = 0
+
+        self.__bytes_acknowledged = 0
+
+    def read(self, number_of_bytes: int) -> bytes:
+        if (len(self.reads) > 0):
+            return self.reads.pop(0)
+
+        if (self.fixed_read is not None):
+            return self.fixed_read
+
+        if (number_of_bytes == 2):
+            return self.maximum_count.to_bytes(2, 'little')
+
+        self.__bytes_acknowledged = self.bytes_written
+
+        return (self.bytes_written % 256).to_bytes(1, 'little')
+
+    def write(self, data):
+        self.writes.append(bytes(data))
+        self.bytes_written += len(data)
+        self.maximum_bytes_in_flight = max(self.maximum_bytes_in_flight, self.bytes_written - self.__bytes_acknowledged)
+
+
+class TestSerialWriter(unittest.TestCase):
+    WINDOW_SIZE = 100
+
+    def setUp(self):
+        self.serial = AcknowledgingSerial()
+        self.statistics = SerialStatistics()
+        self.serial_writer = SerialGroupedLeds.SerialWriter(self.serial, self.WINDOW_SIZE, self.statistics, timeout_seconds=0.05)
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            SerialGroupedLeds.SerialWriter(self.serial, 0, self.statistics)
+
+        with self.assertRaises(ValueError):
+            SerialGroupedLeds.SerialWriter(self.serial, 256, self.statistics)
+
+        with self.assertRaises(ValueError):
+            SerialGroupedLeds.SerialWriter(self.serial, self.WINDOW_SIZE, self.statistics, timeout_seconds=0)
+
+    def test_acknowledgements_wrap_around(self):
+        # 1000 bytes wrap the one byte acknowledgement around several times.
+        for number_of_bytes in (200, 1, 255, 300, 244):
+            self.serial_writer.write(bytes(number_of_bytes))
+
+        self.assertEqual(self.serial.bytes_written, 1000)
+        self.assertEqual(self.serial.maximum_bytes_in_flight, self.WINDOW_SIZE)
+
+    def test_read_timeout_raises(self):
+        self.serial.reads = [(50).to_bytes(1, 'little')]
+        self.serial.fixed_read = b''
+
+        with self.assertRaises(SerialException):
+            self.serial_writer.write(bytes(150))
+
+    def test_missing_acknowledgements_raise_after_timeout(self):
+        # Reads that never acknowledge anything new would otherwise be retried forever.
+        self.serial.fixed_read = b'\0'
+
+        with self.assertRaises(SerialException):
+            self.serial_writer.write(bytes(1))
+
+    def test_acknowledging_too_many_bytes_raises(self):
+        self.serial.reads = [(2).to_bytes(1, 'little')]
+
+        with self.assertRaises(SerialException):
+            self.serial_writer.write(bytes(1))
+
+
+class TestSerialGroupedLedsEncodings(unittest.TestCase):
+    NUMBER_OF_GROUPS = 12
+    WINDOW_SIZE = 64
+    BRIGHTNESS = 50
+
+    START_CODES = {PACKET_ENCODING: GROUP_COLOR_START_OF_MESSAGE_CODE,
+                   FRAME_ENCODING: FRAME_START_OF_MESSAGE_CODE,
+                   PALETTE_ENCODING: PALETTE_START_OF_MESSAGE_CODE}
+
+    def create(self, encoding: str, protocol_version: int = PROTOCOL_VERSION_2, maximum_count: int = 0xFFFF) -> SerialGroupedLeds:
+        # One LED per group.
+        self.serial = AcknowledgingSerial(self.NUMBER_OF_GROUPS, protocol_version)
+        self.serial.reads = [self.WINDOW_SIZE.to_bytes(1, 'little')]
+        self.serial.maximum_count = maximum_count
+
+        return SerialGroupedLeds((0, self.NUMBER_OF_GROUPS), [[(group, group + 1)] for group in range(self.NUMBER_OF_GROUPS)],
+                                 self.serial, self.BRIGHTNESS, encoding)
+
+    def send(self, serial_grouped_leds: SerialGroupedLeds, group_colors) -> bytes:
+        '''
+            Returns:
+                `bytes`: The message that `set_colors` wrote.
+        '''
+        self.serial.writes.clear()
+        serial_grouped_leds.set_colors(group_colors)
+
+        return b''.join(self.serial.writes)
+
+    def test_message_sizes_match_encoded_messages(self):
+        # 4 changed groups, 2 colors and 2 runs: groups 0 - 2 and group 4.
+        GROUP_COLORS = [(0, RGB(255, 0, 0)), (1, RGB(255, 0, 0)), (2, RGB(255, 0, 0)), (4, RGB(0, 255, 0))]
+
+        for protocol_version in (PROTOCOL_VERSION_1, PROTOCOL_VERSION_2):
+            MESSAGE_SIZES = self.create(PACKET_ENCODING, protocol_version)._SerialGroupedLeds__get_message_sizes(4, 2, 2)
+
+            for encoding in (PACKET_ENCODING, FRAME_ENCODING, PALETTE_ENCODING):
+                with self.subTest(protocol_version=protocol_version, encoding=encoding):
+                    MESSAGE = self.send(self.create(encoding, protocol_version), GROUP_COLORS)
+
+                    self.assertEqual(MESSAGE[0], self.START_CODES[encoding])
+                    self.assertEqual(len(MESSAGE), MESSAGE_SIZES[encoding])
+
+    def test_packet_message_bytes(self):
+        GROUP_COLORS = [(3, RGB(1, 2, 3)), (10, RGB(255, 0, 16))]
+
+        EXPECTED_MESSAGES = {
+            PROTOCOL_VERSION_1: bytes([0xFE, 0x02,                          # start code, number of packets
+                                       0x03, 0x01, 0x02, 0x03, 0x09,        # group, red, green, blue, checksum
+                                       0x0A, 0xFF, 0x00, 0x10, 0x19,        # (10 + 255 + 16) % 256 = 0x19
+                                       0xFF]),
+            PROTOCOL_VERSION_2: bytes([0xFE, 0x02, 0x00,
+                                       0x03, 0x00, 0x01, 0x02, 0x03, 0x09,
+                                       0x0A, 0x00, 0xFF, 0x00, 0x10, 0x19,
+                                       0xFF])}
+
+        for protocol_version, expected_message in EXPECTED_MESSAGES.items():
+            with self.subTest(protocol_version=protocol_version):
+                self.assertEqual(self.send(self.create(PACKET_ENCODING, protocol_version), GROUP_COLORS), expected_message)
+
+    def test_frame_message_bytes(self):
+        EXPECTED_MESSAGE = bytes([0xFD, 0x00, 0x00, 0x0C, 0x00,             # start code, start led, number of leds
+                                  0x01, 0x02, 0x03]                         # group 0
+                                 + [0x00] * 3 * 10                          # groups 1 - 10
+                                 + [0x04, 0x05, 0x06,                       # group 11
+                                    0x21,                                   # 0x0C + 1 + 2 + 3 + 4 + 5 + 6
+                                    0xFF])
+
+        # Frames don't depend on the protocol version.
+        for protocol_version in (PROTOCOL_VERSION_1, PROTOCOL_VERSION_2):
+            with self.subTest(protocol_version=protocol_version):
+                self.assertEqual(self.send(self.create(FRAME_ENCODING, protocol_version), [(0, RGB(1, 2, 3)), (11, RGB(4, 5, 6))]),
+                                 EXPECTED_MESSAGE)
+
+    def test_palette_message_bytes(self):
+        GROUP_COLORS = [(0, RGB(255, 0, 0)), (1, RGB(255, 0, 0)), (2, RGB(255, 0, 0)), (4, RGB(0, 255, 0))]
+
+        # The palette is sorted, so green is index 0 and red is index 1. The checksum is
+        # (2 + 255 + 255 + 2 + 3 + 1 + 4 + 1) % 256 = 0x0B.
+        EXPECTED_MESSAGES = {
+            PROTOCOL_VERSION_1: bytes([0xFC, 0x02,                          # start code, palette size
+                                       0x00, 0xFF, 0x00, 0xFF, 0x00, 0x00,  # green, red
+                                       0x02,                                # number of runs
+                                       0x00, 0x03, 0x01,                    # start group, number of groups, palette index
+                                       0x04, 0x01, 0x00,
+                                       0x0B, 0xFF]),
+            PROTOCOL_VERSION_2: bytes([0xFC, 0x02, 0x00,
+                                       0x00, 0xFF, 0x00, 0xFF, 0x00, 0x00,
+                                       0x02, 0x00,
+                                       0x00, 0x00, 0x03, 0x00, 0x01, 0x00,
+                                       0x04, 0x00, 0x01, 0x00, 0x00, 0x00,
+                                       0x0B, 0xFF])}
+
+        for protocol_version, expected_message in EXPECTED_MESSAGES.items():
+            with self.subTest(protocol_version=protocol_version):
+                self.assertEqual(self.send(self.create(PALETTE_ENCODING, protocol_version), GROUP_COLORS), expected_message)
+
+    def test_group_out_of_range(self):
+        for encoding in ENCODINGS:
+            for group in (-1, self.NUMBER_OF_GROUPS, self.NUMBER_OF_GROUPS + 1):
+                with self.subTest(encoding=encoding, group=group):
+                    serial_grouped_leds = self.create(encoding)
+                    self.serial.writes.clear()
+
+                    with self.assertRaises(ValueError):
+                        serial_grouped_leds.set_colors([(0, RGB(1, 2, 3)), (group, RGB(255, 0, 0))])
+
+                    self.assertEqual(self.serial.writes, [])
+
+    def test_reported_maximum_count(self):
+        THREE_COLORS = [(0, RGB(255, 0, 0)), (1, RGB(0, 255, 0)), (2, RGB(0, 0, 255))]
+
+        for encoding in (PACKET_ENCODING, PALETTE_ENCODING):
+            with self.subTest(encoding=encoding):
+                self.assertEqual(self.send(self.create(encoding, maximum_count=2), THREE_COLORS[:2])[0], self.START_CODES[encoding])
+                self.assertEqual(self.send(self.create(encoding, maximum_count=2), THREE_COLORS)[0], FRAME_START_OF_MESSAGE_CODE)
+
+    def test_adaptive_encoding_picks_the_smallest_message(self):
+        ONE_GROUP = [(3, RGB(1, 2, 3))]
+        EVERY_GROUP = [(group, RGB(group, group, group)) for group in range(self.NUMBER_OF_GROUPS)]
+        FEW_COLORS = [(group, RGB(255, 0, 0) if (group < self.NUMBER_OF_GROUPS // 2) else RGB(0, 0, 255))
+                      for group in range(self.NUMBER_OF_GROUPS)]
+
+        for group_colors, encoding in ((ONE_GROUP, PACKET_ENCODING), (EVERY_GROUP, FRAME_ENCODING), (FEW_COLORS, PALETTE_ENCODING)):
+            with self.subTest(encoding=encoding):
+                MESSAGE = self.send(self.create(ADAPTIVE_ENCODING), group_colors)
+
+                self.assertEqual(MESSAGE[0], self.START_CODES[encoding])
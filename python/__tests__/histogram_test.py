@@ -0,0 +1,88 @@
+import unittest
+
+import numpy
+from histogram import Histogram, exponential_upper_bounds
+
+
+class TestExponentialUpperBounds(unittest.TestCase):
+    def test_upper_bounds(self):
+        numpy.testing.assert_allclose(exponential_upper_bounds(0.5, 2, 4), [0.5, 1, 2, 4])
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            exponential_upper_bounds(0, 2, 4)
+
+        with self.assertRaises(ValueError):
+            exponential_upper_bounds(1, 1, 4)
+
+
+class TestHistogram(unittest.TestCase):
+    UPPER_BOUNDS = [1, 2, 4]
+
+    def setUp(self):
+        self.histogram = Histogram(self.UPPER_BOUNDS)
+
+    def test_invalid_upper_bounds(self):
+        for upper_bounds in ([], [[1, 2]], [1, 1], [2, 1]):
+            with self.subTest(upper_bounds=upper_bounds):
+                with self.assertRaises(ValueError):
+                    Histogram(upper_bounds)
+
+    def test_bucket_placement(self):
+        # Buckets are (-inf, 1], (1, 2], (2, 4] and (4, inf); a value on an upper bound belongs to that bucket.
+        for value in (-5, 1, 1.5, 2, 4):
+            self.histogram.add(value)
+
+        numpy.testing.assert_array_equal(self.histogram.counts, [2, 2, 1, 0])
+
+    def test_overflow_bucket(self):
+        self.histogram.add(4.5)
+        self.histogram.add(100)
+
+        numpy.testing.assert_array_equal(self.histogram.counts, [0, 0, 0, 2])
+
+        # The overflow bucket has no upper bound, so its quantiles are the maximum.
+        self.assertEqual(self.histogram.quantile(0.5), 100)
+
+    def test_quantiles_are_bucket_upper_bounds(self):
+        for value in (0.5, 1.5, 3, 3.5):
+            self.histogram.add(value)
+
+        self.assertEqual(self.histogram.quantile(0), 1)
+        self.assertEqual(self.histogram.quantile(0.25), 1)
+        self.assertEqual(self.histogram.quantile(0.26), 2)
+        self.assertEqual(self.histogram.quantile(0.5), 2)
+
+        # An upper bound above every value is limited to the maximum.
+        self.assertEqual(self.histogram.quantile(0.75), 3.5)
+        self.assertEqual(self.histogram.quantile(1), 3.5)
+
+    def test_invalid_quantile(self):
+        for quantile in (-0.1, 1.1):
+            with self.subTest(quantile=quantile):
+                with self.assertRaises(ValueError):
+                    self.histogram.quantile(quantile)
+
+    def test_empty(self):
+        self.assertTrue(numpy.isnan(self.histogram.quantile(0.5)))
+        self.assertTrue(numpy.isnan(self.histogram.mean))
+        self.assertEqual(self.histogram.count, 0)
+
+    def test_summary_values(self):
+        for value in (0.5, 1.5, 7):
+            self.histogram.add(value)
+
+        self.assertEqual(self.histogram.count, 3)
+        self.assertEqual(self.histogram.total, 9)
+        self.assertEqual(self.histogram.mean, 3)
+        self.assertEqual(self.histogram.minimum, 0.5)
+        self.assertEqual(self.histogram.maximum, 7)
+
+    def test_clear(self):
+        self.histogram.add(3)
+        self.histogram.clear()
+
+        numpy.testing.assert_array_equal(self.histogram.counts, [0, 0, 0, 0])
+        self.assertEqual(self.histogram.total, 0)
+        self.assertEqual(self.histogram.minimum, numpy.inf)
+        self.assertEqual(self.histogram.maximum, -numpy.inf)
@@ -0,0 +1,56 @@
+import unittest
+from unittest.mock import patch
+
+from latency_statistics import LatencyStatistics
+
+
+class TestLatencyStatistics(unittest.TestCase):
+    def setUp(self):
+        self.now = 100.0
+
+        time_patch = patch('latency_statistics.time.monotonic', new=lambda: self.now)
+        time_patch.start()
+        self.addCleanup(time_patch.stop)
+
+        self.statistics = LatencyStatistics()
+
+    def test_latencies_are_measured_from_capture_time(self):
+        self.statistics.on_analysed(self.now - 0.01)
+        self.statistics.on_sent(self.now - 0.02)
+
+        # Quantiles never exceed the largest latency, so a single latency is every quantile.
+        self.assertAlmostEqual(self.statistics.get_analysis_seconds_quantile(0.5), 0.01)
+        self.assertAlmostEqual(self.statistics.get_sent_seconds_quantile(0.5), 0.02)
+
+    def test_percentiles(self):
+        for milliseconds in range(1, 101):
+            self.statistics.on_sent(self.now - milliseconds / 1000)
+
+        P50 = self.statistics.get_sent_seconds_quantile(0.5)
+
+        self.assertGreaterEqual(P50, 0.05)
+        self.assertLessEqual(P50, 0.05 * 1.25)
+        self.assertAlmostEqual(self.statistics.get_sent_seconds_quantile(1), 0.1)
+
+    def test_reset(self):
+        self.statistics.on_analysed(self.now - 0.01)
+        self.now += 5
+        self.statistics.reset()
+
+        self.assertEqual(self.statistics.elapsed_seconds, 0)
+        self.assertIn('(0 chunks)', self.statistics.get_summary())
+
+    def test_summary(self):
+        self.statistics.on_analysed(self.now - 0.01)
+        self.statistics.on_sent(self.now - 0.02)
+        self.statistics.on_sent(self.now - 0.02)
+
+        self.assertEqual(self.statistics.get_summary((50, 99.9)),
+                         'latency ms p50/p99.9/max: capture to analysed 10.00/10.00/10.00 (1 chunks), '
+                         'capture to sent 20.00/20.00/20.00 (2 frames)')
+
+    def test_summary_rejects_invalid_percentiles(self):
+        for percentiles in ((-1,), (50, 101)):
+            with self.subTest(percentiles=percentiles):
+                with self.assertRaises(ValueError):
+                    self.statistics.get_summary(percentiles)
@@ -0,0 +1,79 @@
+import unittest
+
+import numpy
+from peak_hold import PeakHold
+from util import RGB
+
+
+class TestPeakHold(unittest.TestCase):
+    HOLD_MILLISECONDS = 100
+    FALLOFF_DECIBELS_PER_SECOND = 10
+    SECONDS_PER_CHUNK = 0.04
+    COLOR = (255, 255, 255)
+
+    def setUp(self):
+        self.peak_hold = PeakHold(1, self.HOLD_MILLISECONDS, self.FALLOFF_DECIBELS_PER_SECOND, self.COLOR)
+
+    def update(self, amplitude: float, number_of_chunks: int = 1) -> float:
+        for _ in range(number_of_chunks):
+            self.peak_hold.update(numpy.array([amplitude]), self.SECONDS_PER_CHUNK)
+
+        return self.peak_hold.peaks[0]
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            PeakHold(1, -1, self.FALLOFF_DECIBELS_PER_SECOND, self.COLOR)
+
+        with self.assertRaises(ValueError):
+            PeakHold(2, self.HOLD_MILLISECONDS, [1, -1], self.COLOR)
+
+    def test_color(self):
+        self.assertEqual(self.peak_hold.color, RGB(*self.COLOR))
+
+    def test_no_peak_yet(self):
+        self.assertEqual(self.peak_hold.peaks[0], -numpy.inf)
+
+    def test_peak_is_held(self):
+        self.update(0)
+
+        # 80 ms after the peak; still within the 100 ms hold.
+        self.assertEqual(self.update(-20, 2), 0)
+
+    def test_peak_decays_after_hold(self):
+        self.update(0)
+        self.update(-20, 2)
+
+        # Only the 20 ms past the hold count towards the first fall.
+        self.assertAlmostEqual(self.update(-20), -0.2)
+        self.assertAlmostEqual(self.update(-20), -0.6)
+
+    def test_peak_does_not_fall_below_amplitude(self):
+        self.update(0)
+
+        self.assertEqual(self.update(-0.1, 10), -0.1)
+
+    def test_louder_amplitude_resets_hold(self):
+        self.update(0)
+        self.update(-20, 4)
+
+        self.assertEqual(self.update(5), 5)
+        self.assertEqual(self.update(-20, 2), 5)
+        self.assertAlmostEqual(self.update(-20), 4.8)
+
+    def test_per_band_falloff(self):
+        peak_hold = PeakHold(2, 0, [10, 20], self.COLOR)
+
+        peak_hold.update(numpy.array([0.0, 0.0]), self.SECONDS_PER_CHUNK)
+        peak_hold.update(numpy.array([-20.0, -20.0]), self.SECONDS_PER_CHUNK)
+
+        numpy.testing.assert_allclose(peak_hold.peaks, [-0.4, -0.8])
+
+    def test_get_peak_positions(self):
+        peak_hold = PeakHold(3, self.HOLD_MILLISECONDS, self.FALLOFF_DECIBELS_PER_SECOND, self.COLOR)
+        peak_hold.update(numpy.array([-100.0, 5.0, 20.0]), self.SECONDS_PER_CHUNK)
+
+        POSITIONS = peak_hold.get_peak_positions(numpy.array([-60.0, 0.0, 0.0]), numpy.array([0.0, 10.0, 10.0]),
+                                                 numpy.array([5, 5, 5]))
+
+        # Below the bar, halfway up the bar, and clipped to the top of the bar.
+        numpy.testing.assert_array_equal(POSITIONS, [-1, 2, 4])
@@ -0,0 +1,61 @@
+import unittest
+from unittest.mock import patch
+
+from serial_statistics import SerialStatistics
+
+
+class TestSerialStatistics(unittest.TestCase):
+    def setUp(self):
+        self.now = 100.0
+
+        time_patch = patch('serial_statistics.time.monotonic', new=lambda: self.now)
+        time_patch.start()
+        self.addCleanup(time_patch.stop)
+
+        self.statistics = SerialStatistics()
+
+    def test_counters(self):
+        self.statistics.on_bytes_sent(100)
+        self.statistics.on_bytes_sent(50)
+        self.statistics.on_message_sent(0.001)
+        self.statistics.on_window_stall()
+
+        self.now += 2
+
+        self.assertEqual(self.statistics.bytes_sent, 150)
+        self.assertEqual(self.statistics.messages_sent, 1)
+        self.assertEqual(self.statistics.window_stalls, 1)
+        self.assertEqual(self.statistics.elapsed_seconds, 2)
+        self.assertEqual(self.statistics.bytes_per_second, 75)
+
+    def test_quantiles(self):
+        for seconds in (0.0001, 0.0002, 0.0004, 0.0008):
+            self.statistics.on_message_sent(seconds)
+            self.statistics.on_acknowledgement(2 * seconds)
+
+        self.assertAlmostEqual(self.statistics.get_write_seconds_quantile(0.5), 0.0002)
+        self.assertAlmostEqual(self.statistics.get_acknowledgement_seconds_quantile(0.5), 0.0004)
+        self.assertAlmostEqual(self.statistics.get_acknowledgement_seconds_quantile(1), 0.0016)
+
+    def test_reset(self):
+        self.statistics.on_bytes_sent(100)
+        self.statistics.on_message_sent(0.001)
+        self.statistics.on_window_stall()
+
+        self.now += 1
+        self.statistics.reset()
+
+        self.assertEqual(self.statistics.bytes_sent, 0)
+        self.assertEqual(self.statistics.messages_sent, 0)
+        self.assertEqual(self.statistics.window_stalls, 0)
+        self.assertEqual(self.statistics.elapsed_seconds, 0)
+
+    def test_summary(self):
+        self.statistics.on_bytes_sent(1000)
+        self.statistics.on_message_sent(0.0004)
+        self.statistics.on_acknowledgement(0.0002)
+        self.now += 1
+
+        self.assertEqual(self.statistics.get_summary(10000),
+                         '1000 bytes in 1 messages, 1000 bytes/s (100.0% of 10000 baud), 0 window stalls, '
+                         'write ms p50/p99/max 0.40/0.40/0.40, ack ms p50/p99/max 0.20/0.20/0.20')
@@ -0,0 +1,67 @@
+import math
+import unittest
+
+import numpy
+from silence_gate import SilenceGate
+
+SAMPLE_RATE = 8000
+SECONDS_PER_CHUNK = 0.05
+
+
+def get_sine(level_decibels: float, dtype=numpy.int16) -> numpy.ndarray:
+    '''
+        Returns:
+            `numpy.ndarray`: A chunk of a sine whose RMS level is `level_decibels` relative to one int16 step.
+    '''
+    AMPLITUDE = math.sqrt(2) * 10 ** (level_decibels / 20)
+    TIMES = numpy.arange(int(SAMPLE_RATE * SECONDS_PER_CHUNK)) / SAMPLE_RATE
+
+    return (AMPLITUDE * numpy.sin(2 * numpy.pi * 1000 * TIMES)).astype(dtype)
+
+
+class TestSilenceGate(unittest.TestCase):
+    ROOM_DECIBELS = 20
+    QUIET_MUSIC_DECIBELS = 43.5
+
+    def setUp(self):
+        self.silence_gate = SilenceGate()
+
+    def is_silent(self, level_decibels: float, seconds: float, dtype=numpy.int16) -> list:
+        '''
+            Returns:
+                `list`: Whether every chunk of `seconds` of a sine at `level_decibels` was silence.
+        '''
+        SAMPLES = get_sine(level_decibels, dtype)
+
+        return [self.silence_gate.is_silent(SAMPLES, SECONDS_PER_CHUNK) for _ in range(int(seconds / SECONDS_PER_CHUNK))]
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            SilenceGate(margin_decibels=-1)
+
+        with self.assertRaises(ValueError):
+            SilenceGate(half_life_seconds=0)
+
+    def test_silence_then_music_then_silence(self):
+        self.assertTrue(all(self.is_silent(self.ROOM_DECIBELS, 10)))
+        self.assertFalse(any(self.is_silent(60, 10)))
+        self.assertTrue(all(self.is_silent(self.ROOM_DECIBELS, 10)))
+
+    def test_long_quiet_music_after_silence_is_not_gated(self):
+        self.is_silent(self.ROOM_DECIBELS, 10)
+
+        self.assertFalse(any(self.is_silent(self.QUIET_MUSIC_DECIBELS, 600)))
+
+    def test_long_quiet_music_from_startup_is_not_gated(self):
+        self.assertFalse(any(self.is_silent(self.QUIET_MUSIC_DECIBELS, 600)))
+
+    def test_noise_floor_follows_slowly_rising_noise(self):
+        self.is_silent(self.ROOM_DECIBELS, 10)
+
+        for level_decibels in range(self.ROOM_DECIBELS, self.ROOM_DECIBELS + 10):
+            self.assertTrue(all(self.is_silent(level_decibels, 60)))
+
+    def test_float_input(self):
+        # Float samples are on the int16 scale, as the audio in streams return them.
+        self.assertEqual(self.is_silent(self.ROOM_DECIBELS, 10, numpy.float32), self.is_silent(self.ROOM_DECIBELS, 10))
+        self.assertFalse(any(self.is_silent(self.QUIET_MUSIC_DECIBELS, 60, numpy.float32)))
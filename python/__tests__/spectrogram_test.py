@@ -0,0 +1,66 @@
+import math
+import statistics
+import unittest
+
+import numpy
+from spectrogram import _get_band_amplitudes, _get_fft_index
+
+SAMPLE_RATE = 8000
+NUMBER_OF_FRAMES = 800
+
+
+def get_band_amplitudes(samples: numpy.ndarray, bands) -> list:
+    '''
+        Returns:
+            `list`: The mean amplitude of each band's fft values, one fft value at a time over the full fft.
+    '''
+    FFT = numpy.fft.fft(samples)
+    FFT_LENGTH = math.ceil(len(FFT) / 2)
+
+    def get_amplitude(fft_value: complex) -> float:
+        return 20 * math.log10(abs(fft_value) / FFT_LENGTH) if (abs(fft_value) > 0) else 0
+
+    return [statistics.mean(get_amplitude(FFT[i]) for i in range(_get_fft_index(band[0], SAMPLE_RATE, NUMBER_OF_FRAMES),
+                                                                 _get_fft_index(band[1], SAMPLE_RATE, NUMBER_OF_FRAMES)))
+            for band in bands]
+
+
+class TestGetBandAmplitudes(unittest.TestCase):
+    # Including a one fft value band, and a band that ends at the Nyquist frequency.
+    BANDS = [[0, 100, 0, 0], [100, 500, 0, 1], [440, 450, 0, 2], [500, 2000, 0, 3], [2000, 4000, 0, 4]]
+
+    def setUp(self):
+        TIMES = numpy.arange(NUMBER_OF_FRAMES) / SAMPLE_RATE
+        NOISE = numpy.random.default_rng(0).normal(scale=100, size=(NUMBER_OF_FRAMES, 2))
+
+        self.samples = numpy.stack((10000 * numpy.sin(2 * numpy.pi * 440 * TIMES), 5000 * numpy.sin(2 * numpy.pi * 3000 * TIMES)),
+                                   axis=1) + NOISE
+
+    def test_mono(self):
+        numpy.testing.assert_allclose(_get_band_amplitudes(self.samples[:, 0], NUMBER_OF_FRAMES, SAMPLE_RATE, self.BANDS),
+                                      get_band_amplitudes(self.samples[:, 0], self.BANDS))
+
+    def test_channels(self):
+        BAND_CHANNELS = [1, 0, 1, 1, 0]
+
+        EXPECTED_AMPLITUDES = [get_band_amplitudes(self.samples[:, channel], [band])[0] for band, channel in zip(self.BANDS, BAND_CHANNELS)]
+
+        numpy.testing.assert_allclose(_get_band_amplitudes(self.samples, NUMBER_OF_FRAMES, SAMPLE_RATE, self.BANDS, BAND_CHANNELS),
+                                      EXPECTED_AMPLITUDES)
+
+    def test_one_channel_of_several(self):
+        numpy.testing.assert_allclose(_get_band_amplitudes(self.samples, NUMBER_OF_FRAMES, SAMPLE_RATE, self.BANDS, [1] * len(self.BANDS)),
+                                      get_band_amplitudes(self.samples[:, 1], self.BANDS))
+
+    def test_silence(self):
+        numpy.testing.assert_array_equal(_get_band_amplitudes(numpy.zeros(NUMBER_OF_FRAMES), NUMBER_OF_FRAMES, SAMPLE_RATE, self.BANDS),
+                                         numpy.zeros(len(self.BANDS)))
+
+    def test_band_without_fft_values(self):
+        # The fft frequencies are 10 Hz apart, so 442 Hz - 444 Hz rounds to an empty range.
+        with self.assertRaises(ValueError):
+            _get_band_amplitudes(self.samples[:, 0], NUMBER_OF_FRAMES, SAMPLE_RATE, [[442, 444, 0, 0]])
+
+    def test_band_above_nyquist_frequency(self):
+        with self.assertRaises(ValueError):
+            _get_band_amplitudes(self.samples[:, 0], NUMBER_OF_FRAMES, SAMPLE_RATE, [[3000, 5000, 0, 0]])
@@ -0,0 +1,137 @@
+from abc import ABC, abstractmethod
+from typing import Optional, Sequence, Union
+
+import numpy
+
+
+class BandFilter(ABC):
+    @abstractmethod
+    def apply(self, amplitudes: numpy.ndarray, seconds: float) -> numpy.ndarray:
+        '''
+            Args:
+                `amplitudes (numpy.ndarray)`: The amplitude (in decibels) of each band.
+                `seconds (float)`: The duration of the audio chunk the amplitudes were calculated from.
+
+            Returns:
+                `numpy.ndarray`: The filtered amplitude of each band.
+        '''
+
+
+def _to_band_array(values: Union[float, Sequence[float]], number_of_bands: int, name: str) -> numpy.ndarray:
+    array = numpy.broadcast_to(numpy.asarray(values, dtype=numpy.float64), (number_of_bands,)).copy()
+
+    if (numpy.any(array < 0)):
+        raise ValueError(f'{name} must be >= 0, but was {values}.')
+
+    return array
+
+
+class EnvelopeFilter(BandFilter):
+    def __init__(self, number_of_bands: int, attack_milliseconds: Union[float, Sequence[float]],
+                 release_milliseconds: Union[float, Sequence[float]]):
+        '''
+            Smooths each band's amplitude with a one-pole filter. A rising amplitude is followed with the attack time
+            constant; a falling amplitude is followed with the release time constant.
+
+            Args:
+                `number_of_bands (int)`: The number of bands.
+                `attack_milliseconds (float | Sequence[float])`: The attack time constant of every band, or of each band.
+                `release_milliseconds (float | Sequence[float])`: The release time constant of every band, or of each band.
+        '''
+        MILLISECONDS_PER_SECOND = 1000
+
+        self.__attack_seconds = _to_band_array(attack_milliseconds, number_of_bands, 'attack_milliseconds') / MILLISECONDS_PER_SECOND
+        self.__release_seconds = _to_band_array(release_milliseconds, number_of_bands, 'release_milliseconds') / MILLISECONDS_PER_SECOND
+
+        self.__envelope: Optional[numpy.ndarray] = None
+
+    def apply(self, amplitudes, seconds):
+        if (self.__envelope is None):
+            self.__envelope = numpy.array(amplitudes, dtype=numpy.float64)
+            return self.__envelope.copy()
+
+        with numpy.errstate(divide='ignore'):
+            ATTACK_COEFFICIENTS = numpy.exp(-seconds / self.__attack_seconds)
+            RELEASE_COEFFICIENTS = numpy.exp(-seconds / self.__release_seconds)
+
+        COEFFICIENTS = numpy.where(amplitudes > self.__envelope, ATTACK_COEFFICIENTS, RELEASE_COEFFICIENTS)
+
+        self.__envelope *= COEFFICIENTS
+        self.__envelope += (1 - COEFFICIENTS) * amplitudes
+
+        return self.__envelope.copy()
+
+
+class AutomaticGainControl(BandFilter):
+    def __init__(self, number_of_bands: int, target_decibels: Union[float, Sequence[float]], quantile: float = 0.9,
+                 half_life_seconds: float = 10, maximum_gain_decibels: float = 30,
+                 minimum_decibels: float = -60, maximum_decibels: float = 120, decibels_per_bin: float = 1):
+        '''
+            Shifts each band's amplitude so that the band's rolling `quantile` sits at `target_decibels`.
+
+            Each band's quantile is estimated with a histogram sketch: amplitudes are counted in fixed-width bins
+            between `minimum_decibels` and `maximum_decibels`, and older counts decay with `half_life_seconds`. Memory
+            is fixed at (number_of_bands * number of bins), no matter how long the program runs.
+
+            Args:
+                `number_of_bands (int)`: The number of bands.
+                `target_decibels (float | Sequence[float])`: Where the quantile should sit, for every band or for each band.
+                `quantile (float, optional)`: The quantile to track, within the range (0, 1].
+                `half_life_seconds (float, optional)`: How long it takes for an amplitude to lose half its weight.
+                `maximum_gain_decibels (float, optional)`: The largest boost or cut that will be applied.
+                `minimum_decibels (float, optional)`: The lower bound of the histogram; quieter amplitudes are clipped.
+                `maximum_decibels (float, optional)`: The upper bound of the histogram; louder amplitudes are clipped.
+                `decibels_per_bin (float, optional)`: The width of each histogram bin.
+        '''
+        if (quantile <= 0 or quantile > 1):
+            raise ValueError(f'quantile must be > 0 and <= 1, but was {quantile}.')
+
+        if (half_life_seconds <= 0):
+            raise ValueError(f'half_life_seconds must be > 0, but was {half_life_seconds}.')
+
+        if (maximum_gain_decibels < 0):
+            raise ValueError(f'maximum_gain_decibels must be >= 0, but was {maximum_gain_decibels}.')
+
+        if (minimum_decibels >= maximum_decibels):
+            raise ValueError(f'minimum_decibels ({minimum_decibels}) must be < maximum_decibels ({maximum_decibels}).')
+
+        if (decibels_per_bin <= 0):
+            raise ValueError(f'decibels_per_bin must be > 0, but was {decibels_per_bin}.')
+
+        self.__target_decibels = numpy.broadcast_to(numpy.asarray(target_decibels, dtype=numpy.float64), (number_of_bands,)).copy()
+        self.__quantile = quantile
+        self.__half_life_seconds = half_life_seconds
+        self.__maximum_gain_decibels = maximum_gain_decibels
+        self.__minimum_decibels = minimum_decibels
+        self.__decibels_per_bin = decibels_per_bin
+
+        NUMBER_OF_BINS = int(numpy.ceil((maximum_decibels - minimum_decibels) / decibels_per_bin))
+
+        self.__histograms = numpy.zeros((number_of_bands, NUMBER_OF_BINS))
+        self.__band_indices = numpy.arange(number_of_bands)
+
+    @property
+    def quantiles(self) -> numpy.ndarray:
+        '''
+            Returns:
+                `numpy.ndarray`: The estimated quantile (in decibels) of each band; nan for bands without any amplitudes yet.
+        '''
+        CUMULATIVE_COUNTS = numpy.cumsum(self.__histograms, axis=1)
+        THRESHOLDS = self.__quantile * CUMULATIVE_COUNTS[:, -1]
+
+        BINS = numpy.argmax(CUMULATIVE_COUNTS >= THRESHOLDS[:, numpy.newaxis], axis=1)
+        QUANTILES = self.__minimum_decibels + (BINS + 0.5) * self.__decibels_per_bin
+
+        return numpy.where(CUMULATIVE_COUNTS[:, -1] > 0, QUANTILES, numpy.nan)
+
+    def apply(self, amplitudes, seconds):
+        self.__histograms *= 0.5 ** (seconds / self.__half_life_seconds)
+
+        bins = numpy.floor((amplitudes - self.__minimum_decibels) / self.__decibels_per_bin)
+        bins = numpy.clip(numpy.nan_to_num(bins), 0, self.__histograms.shape[1] - 1).astype(numpy.int64)
+
+        self.__histograms[self.__band_indices, bins] += 1
+
+        GAINS = numpy.clip(self.__target_decibels - self.quantiles, -self.__maximum_gain_decibels, self.__maximum_gain_decibels)
+
+        return amplitudes + GAINS
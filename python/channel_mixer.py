@@ -0,0 +1,46 @@
+from typing import Optional, Sequence
+
+import numpy
+
+
+def mix_channels(samples: numpy.ndarray, channel: Optional[int] = None) -> numpy.ndarray:
+    '''
+        Turns (frames, channels) samples into the mono signal that is analysed.
+
+        Args:
+            `samples (numpy.ndarray)`: The (frames, channels) samples of an audio chunk.
+            `channel (int, optional)`: The channel to analyse. If None, every channel is averaged.
+
+        Returns:
+            `numpy.ndarray`: The (frames,) mono samples. A single channel is returned as a view, without copying.
+    '''
+    NUMBER_OF_CHANNELS = samples.shape[1]
+
+    if (channel is not None):
+        if (channel < 0 or channel >= NUMBER_OF_CHANNELS):
+            raise ValueError(f'channel must be >= 0 and < {NUMBER_OF_CHANNELS}, but was {channel}.')
+
+        return samples[:, channel]
+
+    if (NUMBER_OF_CHANNELS == 1):
+        return samples[:, 0]
+
+    return samples.mean(axis=1, dtype=numpy.float32)
+
+
+def check_band_channels(band_channels: Sequence[int], number_of_bands: int, number_of_channels: int):
+    '''
+        Args:
+            `band_channels (Sequence[int])`: The channel each band is analysed from.
+            `number_of_bands (int)`: The number of bands.
+            `number_of_channels (int)`: The number of channels of the audio.
+
+        Raises:
+            `ValueError`: If there isn't one channel per band, or a channel isn't one of the audio's channels.
+    '''
+    if (len(band_channels) != number_of_bands):
+        raise ValueError(f'band_channels must have one channel per band ({number_of_bands}), but had {len(band_channels)}.')
+
+    for channel in band_channels:
+        if (channel < 0 or channel >= number_of_channels):
+            raise ValueError(f'Every band channel must be >= 0 and < {number_of_channels}, but band_channels was {band_channels}.')
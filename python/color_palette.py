@@ -8,6 +8,10 @@ class ColorPalette:
         self.__colors = colors
         self.__amp_upper_bounds = amp_upper_bounds
 
+    @property
+    def amp_upper_bounds(self) -> List[int]:
+        return list(self.__amp_upper_bounds)
+
     def get_colors(self, amp: int) -> List[RGB]:
         for i in range(len(self.__amp_upper_bounds)):
             if (amp <= self.__amp_upper_bounds[i]):
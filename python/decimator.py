@@ -0,0 +1,113 @@
+import math
+
+import numpy
+
+# The highest analysed frequency may use this much of the decimated Nyquist frequency; the rest is the filter's
+# transition band.
+PASSBAND_FRACTION = 0.8
+STOPBAND_DECIBELS = 60
+
+
+def get_decimation_factor(sample_rate: int, maximum_frequency: float) -> int:
+    '''
+        Returns:
+            `int`: The largest factor the sample rate can be divided by while `maximum_frequency` stays within
+            PASSBAND_FRACTION of the decimated Nyquist frequency; 1 if the audio can't be decimated.
+    '''
+    if (maximum_frequency <= 0):
+        raise ValueError(f'maximum_frequency must be > 0, but was {maximum_frequency}.')
+
+    return max(int(PASSBAND_FRACTION * sample_rate / (2 * maximum_frequency)), 1)
+
+
+class Decimator:
+    def __init__(self, sample_rate: int, maximum_frequency: float):
+        '''
+            Low-pass filters and downsamples audio chunk by chunk, so that bands which only cover low frequencies are
+            analysed with a much shorter FFT at the same frequency resolution. Filter state carries over between chunks,
+            so chunks of any length can be given.
+
+            The anti-aliasing filter is a Kaiser windowed sinc whose transition band runs from `maximum_frequency` to
+            where aliases would start to fold onto it. It is applied in polyphase form: only every `factor`-th output
+            is computed, by multiplying blocks of `factor` samples with every phase's taps in one matrix product and
+            summing the products along its diagonals.
+
+            Args:
+                `sample_rate (int)`: The sample rate of the audio.
+                `maximum_frequency (float)`: The highest frequency that must survive decimation, i.e. the highest band edge.
+        '''
+        self.__factor = get_decimation_factor(sample_rate, maximum_frequency)
+        self.__output_sample_rate = sample_rate / self.__factor
+
+        # Aliases of frequencies above output_sample_rate - maximum_frequency fold down above maximum_frequency.
+        TRANSITION_WIDTH = max(self.__output_sample_rate - 2 * maximum_frequency, 1) / sample_rate
+        NUMBER_OF_TAPS = math.ceil((STOPBAND_DECIBELS - 8) / (2.285 * 2 * math.pi * TRANSITION_WIDTH)) + 1
+
+        TAPS_PER_PHASE = math.ceil(NUMBER_OF_TAPS / self.__factor)
+        CUTOFF = 0.5 / self.__factor  # the decimated Nyquist frequency, as a fraction of sample_rate
+
+        TAP_INDICES = numpy.arange(NUMBER_OF_TAPS) - (NUMBER_OF_TAPS - 1) / 2
+        taps = 2 * CUTOFF * numpy.sinc(2 * CUTOFF * TAP_INDICES) * numpy.kaiser(NUMBER_OF_TAPS, 0.1102 * (STOPBAND_DECIBELS - 8.7))
+        taps /= taps.sum()  # unity gain in the passband, so band amplitudes don't change
+
+        # Reversed & zero padded at the front to (TAPS_PER_PHASE, factor): row l weighs the l-th oldest block of samples.
+        # Stored transposed, as the right hand side of the matrix product.
+        padded_taps = numpy.zeros(TAPS_PER_PHASE * self.__factor, dtype=numpy.float32)
+        padded_taps[-NUMBER_OF_TAPS:] = taps[::-1]
+
+        self.__phase_taps = numpy.ascontiguousarray(padded_taps.reshape(TAPS_PER_PHASE, self.__factor).T)
+        self.__ones = numpy.ones(TAPS_PER_PHASE, dtype=numpy.float32)
+        self.__history_length = TAPS_PER_PHASE * self.__factor - 1
+
+        self.__history = None
+        self.__offset = 0
+
+    @property
+    def factor(self) -> int:
+        return self.__factor
+
+    @property
+    def output_sample_rate(self) -> float:
+        return self.__output_sample_rate
+
+    def decimate(self, samples: numpy.ndarray) -> numpy.ndarray:
+        '''
+            Args:
+                `samples (numpy.ndarray)`: The (frames,) or (frames, channels) samples of an audio chunk.
+
+            Returns:
+                `numpy.ndarray`: The float32 decimated samples, with the same number of dimensions. Its length varies by
+                at most one frame between chunks when the chunk length isn't a multiple of `factor`.
+        '''
+        if (self.__factor == 1):
+            return samples
+
+        # Channels are kept in rows, so that every channel's blocks are contiguous.
+        CHANNELS = samples.reshape(len(samples), -1).T
+
+        if (self.__history is None or self.__history.shape[0] != len(CHANNELS)):
+            self.__history = numpy.zeros((len(CHANNELS), self.__history_length), dtype=numpy.float32)
+            self.__offset = 0
+
+        EXTENDED = numpy.concatenate((self.__history, CHANNELS.astype(numpy.float32)), axis=1)
+
+        NUMBER_OF_FRAMES = len(samples)
+        NUMBER_OF_OUTPUTS = max(NUMBER_OF_FRAMES - self.__offset + self.__factor - 1, 0) // self.__factor
+        TAPS_PER_PHASE = len(self.__ones)
+
+        # BLOCKS[c, r] is the factor samples of channel c that start at offset + r * factor.
+        BLOCKS = EXTENDED[:, self.__offset:self.__offset + (NUMBER_OF_OUTPUTS + TAPS_PER_PHASE - 1) * self.__factor]
+        BLOCKS = BLOCKS.reshape(len(CHANNELS), -1, self.__factor)
+
+        # PRODUCTS[c, r, l] is block r weighed by the l-th phase's taps; output k sums PRODUCTS[c, k + l, l] over l,
+        # i.e. along a diagonal, which is viewed as a row by stepping one row and one column at a time.
+        PRODUCTS = BLOCKS @ self.__phase_taps
+        DIAGONALS = numpy.ndarray((len(CHANNELS), NUMBER_OF_OUTPUTS, TAPS_PER_PHASE), dtype=PRODUCTS.dtype, buffer=PRODUCTS,
+                                  strides=(PRODUCTS.strides[0], PRODUCTS.strides[1], PRODUCTS.strides[1] + PRODUCTS.strides[2]))
+
+        decimated = DIAGONALS @ self.__ones
+
+        self.__offset += NUMBER_OF_OUTPUTS * self.__factor - NUMBER_OF_FRAMES
+        self.__history = EXTENDED[:, EXTENDED.shape[1] - self.__history_length:]
+
+        return decimated[0] if (samples.ndim == 1) else decimated.T
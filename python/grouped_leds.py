@@ -1,10 +1,17 @@
 import math
+import struct
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import Dict, Iterable, List, Tuple
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Set, Tuple
 
+import numpy
+from latency_statistics import LatencyStatistics
 from libraries.canvas_gui import CanvasGui
-from libraries.serial import Serial
+from libraries.serial import PROTOCOL_VERSION_2, Serial, SerialException
 from non_negative_int_range import NonNegativeIntRange
+from serial_statistics import SerialStatistics
 from util import RGB, Font, rgb_to_hex
 
 
@@ -61,8 +68,13 @@ class GroupedLeds(ABC):
         pass
 
     @abstractmethod
-    def set_colors(self, group_colors: Iterable[Tuple[int, Tuple[int, int, int]]]):
-        pass
+    def set_colors(self, group_colors: Iterable[Tuple[int, Tuple[int, int, int]]], capture_time: Optional[float] = None):
+        '''
+            Args:
+                `group_colors (Iterable[Tuple[int, Tuple[int, int, int]]])`: The new color of each changed group.
+                `capture_time (float, optional)`: The time.monotonic() at which the audio these colors were analysed from
+                was captured. Wrappers pass it on, so whichever stage sends the colors can measure the latency.
+        '''
 
 
 class ProductionGroupedLeds(GroupedLeds):
@@ -122,7 +134,7 @@ class ProductionGroupedLeds(GroupedLeds):
 
         return self.__group_colors[group]
 
-    def set_colors(self, group_colors):
+    def set_colors(self, group_colors, capture_time=None):
         for group, color in group_colors:
             self._set_color(group, RGB(*color))
 
@@ -150,8 +162,8 @@ class GraphicGroupedLeds(ProductionGroupedLeds):
     def led_diameter(self) -> int:
         return self.__led_diameter
 
-    def set_colors(self, group_colors):
-        super().set_colors(group_colors)
+    def set_colors(self, group_colors, capture_time=None):
+        super().set_colors(group_colors, capture_time)
 
         self.__gui.update()
 
@@ -200,42 +212,200 @@ GROUP_SETUP_END_OF_MESSAGE_CODE = 0xFF
 GROUP_COLOR_START_OF_MESSAGE_CODE = 0xFE
 GROUP_COLOR_END_OF_MESSAGE_CODE = 0xFF
 
+FRAME_START_OF_MESSAGE_CODE = 0xFD
+FRAME_END_OF_MESSAGE_CODE = 0xFF
+
+PALETTE_START_OF_MESSAGE_CODE = 0xFC
+PALETTE_END_OF_MESSAGE_CODE = 0xFF
+
 BYTE_ORDER = 'little'
+STRUCT_BYTE_ORDER = '<'
+
+PACKET_ENCODING = 'packet'
+FRAME_ENCODING = 'frame'
+PALETTE_ENCODING = 'palette'
+ADAPTIVE_ENCODING = 'adaptive'
+
+ENCODINGS = (PACKET_ENCODING, FRAME_ENCODING, PALETTE_ENCODING, ADAPTIVE_ENCODING)
+
+BYTES_PER_PIXEL = 3
+FRAME_MESSAGE_OVERHEAD = 7  # start code, start led (2 bytes), number of leds (2 bytes), checksum, end code
+
+NUMBERS_PER_RUN = 3  # start group, number of groups, palette index
+MAXIMUM_PALETTE_SIZE = 256
+
+BYTES_PER_LED_RANGE = 5  # start, end, checksum
+
+MAXIMUM_WINDOW_SIZE = 255
+ACKNOWLEDGEMENT_TIMEOUT_SECONDS = 10
 
 
 class SerialGroupedLeds(ProductionGroupedLeds):
 
     class SerialWriter:
-        def __init__(self, serial: Serial, divisor: int):
-            self.__dividend = 0
-            self.__divisor = divisor
-
-            if (divisor == 0):
-                raise ValueError("Received a modulus divisor of 0.")
+        def __init__(self, serial: Serial, window_size: int, statistics: SerialStatistics,
+                     timeout_seconds: float = ACKNOWLEDGEMENT_TIMEOUT_SECONDS):
+            '''
+                Sliding window flow control. Up to `window_size` bytes are written before the receiver must acknowledge
+                them. Each acknowledgement is one byte holding the total number of bytes the receiver has read (mod 256),
+                so one acknowledgement covers every byte read before it.
+
+                Args:
+                    `serial (Serial)`: The serial connection.
+                    `window_size (int)`: The maximum number of unacknowledged bytes; within the range [1, 255].
+                    `statistics (SerialStatistics)`: Where the traffic is recorded.
+                    `timeout_seconds (float, optional)`: How long to wait for the acknowledgements that open the window or
+                    finish a write before raising a SerialException.
+            '''
+            if (window_size <= 0 or window_size > MAXIMUM_WINDOW_SIZE):
+                raise ValueError(f'window_size must be > 0 and <= {MAXIMUM_WINDOW_SIZE}, but was {window_size}.')
+
+            if (timeout_seconds <= 0):
+                raise ValueError(f'timeout_seconds must be > 0, but was {timeout_seconds}.')
 
             self.__serial = serial
+            self.__window_size = window_size
+            self.__timeout_seconds = timeout_seconds
+
+            self.__statistics = statistics
+
+            self.__bytes_in_flight = 0
+            self.__bytes_acknowledged = 0
+
+            # (total bytes written once the write finished, time of the write) of every write that is not fully
+            # acknowledged yet, used to time acknowledgements
+            self.__bytes_written = 0
+            self.__unacknowledged_writes: Deque[Tuple[int, float]] = deque()
 
         def write(self, data: bytes):
-            for byte_ in data:
-                byte_ = byte_.to_bytes(length=1, byteorder=BYTE_ORDER)
+            '''
+                Writes `data` in as few writes as the window allows, then waits until every byte has been acknowledged.
+            '''
+            START_TIME = time.perf_counter()
+            data = memoryview(data)
 
-                if (self.__dividend == 0):
-                    echo = bytes()
-                    while (echo == bytes()):
-                        self.__serial.write(byte_)
-                        echo = self.__serial.read(1)
+            while (len(data) > 0):
+                if (self.__bytes_in_flight == self.__window_size):
+                    self.__statistics.on_window_stall()
 
-                else:
-                    self.__serial.write(byte_)
+                self.__wait_for_acknowledgements(self.__window_size - 1)
+
+                NUMBER_OF_BYTES = min(len(data), self.__window_size - self.__bytes_in_flight)
+
+                self.__serial.write(data[:NUMBER_OF_BYTES])
+                self.__bytes_in_flight += NUMBER_OF_BYTES
+
+                self.__bytes_written += NUMBER_OF_BYTES
+                self.__unacknowledged_writes.append((self.__bytes_written, time.perf_counter()))
+                self.__statistics.on_bytes_sent(NUMBER_OF_BYTES)
 
-                self.__dividend = (self.__dividend + 1) % self.__divisor
+                data = data[NUMBER_OF_BYTES:]
+
+            self.__wait_for_acknowledgements(0)
+
+            self.__statistics.on_message_sent(time.perf_counter() - START_TIME)
+
+        def __wait_for_acknowledgements(self, maximum_bytes_in_flight: int):
+            '''
+                Reads acknowledgements until at most `maximum_bytes_in_flight` bytes are unacknowledged.
+
+                Raises:
+                    `SerialException`: If a read times out, or the acknowledgements take longer than `timeout_seconds`.
+            '''
+            DEADLINE = time.monotonic() + self.__timeout_seconds
+
+            while (self.__bytes_in_flight > maximum_bytes_in_flight):
+                if (time.monotonic() >= DEADLINE):
+                    raise SerialException(f'{self.__bytes_in_flight} bytes were not acknowledged within {self.__timeout_seconds} seconds.')
+
+                self.__read_acknowledgement()
+
+        def __read_acknowledgement(self):
+            ACKNOWLEDGEMENT = self.__serial.read(1)
+
+            if (len(ACKNOWLEDGEMENT) == 0):
+                raise SerialException(f'Timed out waiting for an acknowledgement of {self.__bytes_in_flight} bytes.')
+
+            BYTES_ACKNOWLEDGED = int.from_bytes(ACKNOWLEDGEMENT, byteorder=BYTE_ORDER)
+            NEWLY_ACKNOWLEDGED = (BYTES_ACKNOWLEDGED - self.__bytes_acknowledged) % 256
+
+            if (NEWLY_ACKNOWLEDGED > self.__bytes_in_flight):
+                raise SerialException(f'Received an acknowledgement for {NEWLY_ACKNOWLEDGED} bytes, but only '
+                                      f'{self.__bytes_in_flight} bytes were unacknowledged.')
+
+            self.__bytes_in_flight -= NEWLY_ACKNOWLEDGED
+            self.__bytes_acknowledged = BYTES_ACKNOWLEDGED
+
+            TOTAL_BYTES_ACKNOWLEDGED = self.__bytes_written - self.__bytes_in_flight
+            write_time = None
+
+            while (len(self.__unacknowledged_writes) > 0 and self.__unacknowledged_writes[0][0] <= TOTAL_BYTES_ACKNOWLEDGED):
+                _, write_time = self.__unacknowledged_writes.popleft()
+
+            if (write_time is not None):
+                self.__statistics.on_acknowledgement(time.perf_counter() - write_time)
 
     def __init__(self, led_range: Tuple[int, int], group_led_ranges: List[Iterable[Tuple[int, int]]],
-                 serial: Serial, brightness: int):
+                 serial: Serial, brightness: int, encoding: str = PACKET_ENCODING):
+        '''
+            Args:
+                `led_range (Tuple[int, int])`: The inclusive start & exclusive end led index.
+                `group_led_ranges (List[Iterable[Tuple[int, int]]])`: The led ranges of each group.
+                `serial (Serial)`: An open serial connection.
+                `brightness (int)`: The brightness of the LEDs; within the range [0, 255].
+                `encoding (str, optional)`: PACKET_ENCODING sends one packet per changed group. FRAME_ENCODING sends the
+                color of every LED in `led_range`, which is cheaper when most groups change every frame.
+                PALETTE_ENCODING sends each distinct color once, then runs of consecutive changed groups that share a
+                color; it falls back to FRAME_ENCODING when there are too many colors or runs to fit in a message.
+                ADAPTIVE_ENCODING picks whichever of the three is fewer bytes for each call to `set_colors`.
+        '''
         super().__init__(led_range, group_led_ranges)
 
         self.__brightness = brightness
 
+        if (encoding not in ENCODINGS):
+            raise ValueError(f'encoding must be one of {ENCODINGS}, but was {encoding}.')
+
+        self.__encoding = encoding
+
+        # Counts, group indices and palette indices are 1 byte before PROTOCOL_VERSION_2 and 2 bytes since.
+        BYTES_PER_NUMBER = 2 if (serial.protocol_version >= PROTOCOL_VERSION_2) else 1
+
+        self.__bytes_per_number = BYTES_PER_NUMBER
+        self.__number_format = STRUCT_BYTE_ORDER + ('H' if (BYTES_PER_NUMBER == 2) else 'B')
+        self.__number_dtype = numpy.dtype(f'{STRUCT_BYTE_ORDER}u{BYTES_PER_NUMBER}')
+        self.__maximum_number = 256 ** BYTES_PER_NUMBER - 1
+
+        self.__bytes_per_packet = BYTES_PER_NUMBER + 4  # group, red, green, blue, checksum
+        self.__packet_message_overhead = BYTES_PER_NUMBER + 2  # start code, number of packets, end code
+        self.__bytes_per_run = BYTES_PER_NUMBER * NUMBERS_PER_RUN
+        self.__palette_message_overhead = 2 * BYTES_PER_NUMBER + 3  # start code, palette size, number of runs, checksum, end code
+
+        if (self.number_of_groups > self.__maximum_number):
+            raise ValueError(f'Serial protocol version {serial.protocol_version} supports at most {self.__maximum_number} groups, '
+                             f'but there are {self.number_of_groups} groups.')
+
+        # The controller drops messages with more packets, palette colors or runs than it has groups or LEDs, or than
+        # it had RAM for (which it reports after the group setup); such changes are sent as frames instead.
+        self.__maximum_count = min(self.number_of_groups, serial.number_of_leds)
+
+        # The last row is the color of LEDs that do not belong to any group.
+        self.__group_color_array = numpy.zeros((self.number_of_groups + 1, 3), dtype=numpy.uint8)
+        self.__led_groups = numpy.full(self.number_of_leds, -1, dtype=numpy.int64)
+
+        self.__next_group_color_array = self.__group_color_array.copy()
+
+        for group in range(self.number_of_groups):
+            for start, end in self.get_group_led_ranges(group):
+                self.__led_groups[start - self.start_led:end - self.start_led] = group
+
+        # Every message is encoded into this buffer. It fits the largest frame, palette or one-packet-per-group
+        # message, and only grows if more packets than groups are sent at once.
+        self.__message_buffer = bytearray()
+        self.__reserve_message_buffer(max(self.__packet_message_overhead + self.__bytes_per_packet * self.number_of_groups,
+                                          FRAME_MESSAGE_OVERHEAD + BYTES_PER_PIXEL * self.number_of_leds,
+                                          self.__palette_message_overhead + (BYTES_PER_PIXEL + self.__bytes_per_run) * self.number_of_groups))
+
         # Serial logic
         if (brightness < 0 or brightness > 255):
             raise ValueError(f'brightness must be >= 0 and <= 255, but was {brightness}.')
@@ -247,63 +417,756 @@ class SerialGroupedLeds(ProductionGroupedLeds):
             raise ValueError(f"The serial connection stated that its led indicies range from 0 (inclusive) to {serial.number_of_leds} "
                              "(exclusive), but this GroupedLedsQueue ranges from {self.start_led} (inclusive) to {self.end_led} (exclusive).")
 
-        DIVISOR = int.from_bytes(serial.read(1), byteorder="little")
-        self.__serial_writer = self.SerialWriter(serial, DIVISOR)
+        WINDOW_SIZE = int.from_bytes(serial.read(1), byteorder="little")
 
-        self.__configure_serial()
+        self.__statistics = SerialStatistics()
+        self.__serial_writer = self.SerialWriter(serial, WINDOW_SIZE, self.__statistics)
 
-    def set_colors(self, group_colors):
-        self.__send_bytes(GROUP_COLOR_START_OF_MESSAGE_CODE.to_bytes(length=1, byteorder=BYTE_ORDER))
-        self.__send_bytes(len(group_colors).to_bytes(1, BYTE_ORDER))
+        self.__configure_serial(serial)
 
-        super().set_colors(group_colors)
+    @property
+    def statistics(self) -> SerialStatistics:
+        return self.__statistics
 
-        self.__send_bytes(GROUP_COLOR_END_OF_MESSAGE_CODE.to_bytes(1, BYTE_ORDER))
+    def set_colors(self, group_colors, capture_time=None):
+        group_colors = [(group, RGB(*color)) for group, color in group_colors]
 
-    def _set_color(self, group: int, color: RGB):
-        self.__send_packet(group, color)
+        group_color_array = self.__next_group_color_array
+        group_color_array[:] = self.__group_color_array
 
-        super()._set_color(group, color)
+        # The last row of group_color_array holds LEDs without a group, so it must not be set by index.
+        for group, color in group_colors:
+            if (group < 0 or group >= self.number_of_groups):
+                raise ValueError(f'group must be >= 0 and < {self.number_of_groups}, but was {group}.')
 
-    def __configure_serial(self):
-        self.__send_bytes(self.__brightness.to_bytes(length=1, byteorder=BYTE_ORDER))
-        self.__send_bytes(self.number_of_groups.to_bytes(length=1, byteorder=BYTE_ORDER))
-        self.__send_bytes(GROUP_SETUP_START_OF_MESSAGE_CODE.to_bytes(length=1, byteorder=BYTE_ORDER))
+            group_color_array[group] = tuple(color)
 
-        for group in range(self.number_of_groups):
-            led_ranges = self.get_group_led_ranges(group)
-            led_ranges_length_bytes = len(led_ranges).to_bytes(length=1, byteorder=BYTE_ORDER)
-            self.__send_bytes(led_ranges_length_bytes)
+        encoding = self.__encoding
+
+        if (encoding == PACKET_ENCODING and len(group_colors) > self.__maximum_count):
+            encoding = FRAME_ENCODING
+
+        if (encoding != PACKET_ENCODING):
+            CHANGED_GROUPS = numpy.flatnonzero(numpy.any(group_color_array != self.__group_color_array, axis=1))
+
+        if (encoding in (PALETTE_ENCODING, ADAPTIVE_ENCODING)):
+            palette, runs = self.__get_palette_runs(group_color_array, CHANGED_GROUPS)
+            MESSAGE_SIZES = self.__get_message_sizes(len(CHANGED_GROUPS), len(palette), len(runs))
+
+            if (encoding == ADAPTIVE_ENCODING):
+                encoding = min(MESSAGE_SIZES, key=MESSAGE_SIZES.get)
+                group_colors = [(int(group), RGB(*group_color_array[group].tolist())) for group in CHANGED_GROUPS]
+
+            elif (PALETTE_ENCODING not in MESSAGE_SIZES):
+                encoding = FRAME_ENCODING
+
+        if (encoding == FRAME_ENCODING):
+            message = self.__get_frame_message(group_color_array)
+
+        elif (encoding == PALETTE_ENCODING):
+            message = self.__get_palette_message(palette, runs)
+
+        elif (self.__encoding == ADAPTIVE_ENCODING):
+            message = self.__get_packet_message(CHANGED_GROUPS, group_color_array[CHANGED_GROUPS])
+
+        else:
+            message = self.__get_packet_message([group for group, _ in group_colors], [tuple(color) for _, color in group_colors])
+
+        self.__serial_writer.write(message)
+
+        self.__next_group_color_array = self.__group_color_array
+        self.__group_color_array = group_color_array
+        super().set_colors(group_colors, capture_time)
+
+    def __get_message_sizes(self, number_of_changed_groups: int, palette_size: int, number_of_runs: int) -> Dict[str, int]:
+        '''
+            Returns:
+                `Dict[str, int]`: The size (in bytes) of each encoding's message, in order of preference; encodings that
+                cannot represent the changes in one message are left out.
+        '''
+        message_sizes = {}
+
+        if (number_of_changed_groups <= self.__maximum_count):
+            message_sizes[PACKET_ENCODING] = self.__packet_message_overhead + self.__bytes_per_packet * number_of_changed_groups
+
+        if (palette_size <= min(self.__maximum_count, MAXIMUM_PALETTE_SIZE) and number_of_runs <= self.__maximum_count):
+            message_sizes[PALETTE_ENCODING] = (self.__palette_message_overhead + BYTES_PER_PIXEL * palette_size
+                                               + self.__bytes_per_run * number_of_runs)
+
+        message_sizes[FRAME_ENCODING] = FRAME_MESSAGE_OVERHEAD + BYTES_PER_PIXEL * self.number_of_leds
+
+        return message_sizes
+
+    def __get_packet_message(self, groups: Iterable[int], colors: Iterable[Iterable[int]]) -> memoryview:
+        NUMBER_OF_PACKETS = len(groups)
+
+        if (NUMBER_OF_PACKETS > self.__maximum_count):
+            raise ValueError(f'At most {self.__maximum_count} groups can be set at once, but {NUMBER_OF_PACKETS} were set.')
+
+        BYTES_PER_NUMBER = self.__bytes_per_number
+        MESSAGE_LENGTH = self.__packet_message_overhead + self.__bytes_per_packet * NUMBER_OF_PACKETS
+
+        self.__reserve_message_buffer(MESSAGE_LENGTH)
+
+        self.__message_array[0] = GROUP_COLOR_START_OF_MESSAGE_CODE
+        struct.pack_into(self.__number_format, self.__message_buffer, 1, NUMBER_OF_PACKETS)
+
+        PACKETS = self.__message_array[1 + BYTES_PER_NUMBER:MESSAGE_LENGTH - 1].reshape(NUMBER_OF_PACKETS, self.__bytes_per_packet)
+
+        if (NUMBER_OF_PACKETS > 0):
+            PACKETS[:, :BYTES_PER_NUMBER] = numpy.asarray(groups, dtype=self.__number_dtype).view(numpy.uint8).reshape(-1, BYTES_PER_NUMBER)
+            PACKETS[:, BYTES_PER_NUMBER:-1] = colors
+            numpy.sum(PACKETS[:, :-1], axis=1, dtype=numpy.uint8, out=PACKETS[:, -1])
+
+        self.__message_array[MESSAGE_LENGTH - 1] = GROUP_COLOR_END_OF_MESSAGE_CODE
+
+        return self.__message_view[:MESSAGE_LENGTH]
+
+    def __get_frame_message(self, group_color_array: numpy.ndarray) -> memoryview:
+        PIXELS_END = 5 + BYTES_PER_PIXEL * self.number_of_leds
+        PIXELS = self.__message_array[5:PIXELS_END].reshape(self.number_of_leds, BYTES_PER_PIXEL)
+
+        struct.pack_into(f'{STRUCT_BYTE_ORDER}BHH', self.__message_buffer, 0, FRAME_START_OF_MESSAGE_CODE, self.start_led, self.number_of_leds)
+        numpy.take(group_color_array, self.__led_groups, axis=0, out=PIXELS)
+
+        self.__message_array[PIXELS_END] = self.__message_array[1:PIXELS_END].sum(dtype=numpy.uint8)
+        self.__message_array[PIXELS_END + 1] = FRAME_END_OF_MESSAGE_CODE
+
+        return self.__message_view[:PIXELS_END + 2]
+
+    def __get_palette_runs(self, group_color_array: numpy.ndarray, groups: numpy.ndarray) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        '''
+            Args:
+                `group_color_array (numpy.ndarray)`: The color of every group.
+                `groups (numpy.ndarray)`: The ascending groups to encode.
+
+            Returns:
+                `Tuple[numpy.ndarray, numpy.ndarray]`: The palette (one row per distinct color of `groups`) and the runs
+                (one (start group, number of groups, palette index) row per run of consecutive groups that share a color).
+        '''
+        PALETTE, PALETTE_INDICES = numpy.unique(group_color_array[groups], axis=0, return_inverse=True)
+        PALETTE_INDICES = PALETTE_INDICES.reshape(-1)
+
+        RUN_STARTS = numpy.flatnonzero((numpy.diff(groups, prepend=-2) != 1) | (numpy.diff(PALETTE_INDICES, prepend=-1) != 0))
+        RUN_LENGTHS = numpy.diff(RUN_STARTS, append=len(groups))
+
+        RUNS = numpy.stack((groups[RUN_STARTS], RUN_LENGTHS, PALETTE_INDICES[RUN_STARTS]), axis=1)
+
+        return PALETTE, RUNS
+
+    def __get_palette_message(self, palette: numpy.ndarray, runs: numpy.ndarray) -> memoryview:
+        PALETTE_START = 1 + self.__bytes_per_number
+        PALETTE_END = PALETTE_START + BYTES_PER_PIXEL * len(palette)
+        RUNS_START = PALETTE_END + self.__bytes_per_number
+        RUNS_END = RUNS_START + self.__bytes_per_run * len(runs)
+
+        self.__message_array[0] = PALETTE_START_OF_MESSAGE_CODE
+        struct.pack_into(self.__number_format, self.__message_buffer, 1, len(palette))
+        self.__message_array[PALETTE_START:PALETTE_END] = palette.reshape(-1)
+        struct.pack_into(self.__number_format, self.__message_buffer, PALETTE_END, len(runs))
+        self.__message_array[RUNS_START:RUNS_END] = runs.astype(self.__number_dtype).view(numpy.uint8).reshape(-1)
+
+        self.__message_array[RUNS_END] = self.__message_array[1:RUNS_END].sum(dtype=numpy.uint8)
+        self.__message_array[RUNS_END + 1] = PALETTE_END_OF_MESSAGE_CODE
+
+        return self.__message_view[:RUNS_END + 2]
+
+    def __reserve_message_buffer(self, message_length: int):
+        if (message_length > len(self.__message_buffer)):
+            self.__message_buffer = bytearray(message_length)
+            self.__message_array = numpy.frombuffer(self.__message_buffer, dtype=numpy.uint8)
+            self.__message_view = memoryview(self.__message_buffer)
+
+    def __configure_serial(self, serial: Serial):
+        GROUP_LED_RANGES = [self.get_group_led_ranges(group) for group in range(self.number_of_groups)]
+        # A group without led ranges is still followed by a checksum byte (0), as the firmware expects one.
+        MESSAGE_LENGTH = 3 + self.__bytes_per_number + sum(1 + max(BYTES_PER_LED_RANGE * len(led_ranges), 1) for led_ranges in GROUP_LED_RANGES)
+
+        message = bytearray(MESSAGE_LENGTH)
+        message[0] = self.__brightness
+        struct.pack_into(self.__number_format, message, 1, self.number_of_groups)
+        message[1 + self.__bytes_per_number] = GROUP_SETUP_START_OF_MESSAGE_CODE
+
+        offset = 2 + self.__bytes_per_number
+
+        for led_ranges in GROUP_LED_RANGES:
+            message[offset] = len(led_ranges)
+            offset += 1
+
+            RANGES_LENGTH = BYTES_PER_LED_RANGE * len(led_ranges)
+            RANGES = numpy.frombuffer(message, dtype=numpy.uint8, count=RANGES_LENGTH, offset=offset).reshape(-1, BYTES_PER_LED_RANGE)
+
+            # Each range is start & end (2 bytes each), then a checksum that also covers the number of ranges.
+            RANGES[:, :4] = numpy.asarray(led_ranges, dtype=f'{STRUCT_BYTE_ORDER}u2').reshape(-1, 2).view(numpy.uint8)
+            RANGES[:, 4] = (RANGES[:, :4].sum(axis=1) + len(led_ranges)) % 256
+
+            offset += max(RANGES_LENGTH, 1)
+
+        message[offset] = GROUP_SETUP_END_OF_MESSAGE_CODE
+
+        self.__serial_writer.write(message)
+
+        if (serial.protocol_version >= PROTOCOL_VERSION_2 and self.number_of_groups > 0):
+            MAXIMUM_COUNT = serial.read(2)
+
+            if (len(MAXIMUM_COUNT) != 2):
+                raise SerialException('Timed out waiting for the number of packets, palette colors or runs the controller allocated.')
+
+            self.__maximum_count = min(self.__maximum_count, int.from_bytes(MAXIMUM_COUNT, byteorder=BYTE_ORDER))
+
+
+LINEAR_EASING = 'linear'
+SMOOTHSTEP_EASING = 'smoothstep'
+
+
+class InterpolatedGroupedLeds(GroupedLeds):
+    def __init__(self, grouped_leds: GroupedLeds, frames_per_second: int, seconds_per_transition: float,
+                 easing: str = LINEAR_EASING):
+        '''
+            Renders frames onto `grouped_leds` at `frames_per_second`, blending from the colors currently displayed
+            towards the most recent colors passed to `set_colors` over `seconds_per_transition` seconds. Rendering
+            happens on a background thread, so `grouped_leds` is only ever updated from that thread until `close`
+            is called.
+
+            Args:
+                `grouped_leds (GroupedLeds)`: The GroupedLeds to render the interpolated frames onto.
+                `frames_per_second (int)`: The display rate.
+                `seconds_per_transition (float)`: How long it takes to blend into a new set of colors. This is
+                usually the duration of one audio chunk.
+                `easing (str, optional)`: Either LINEAR_EASING or SMOOTHSTEP_EASING.
+        '''
+        if (frames_per_second <= 0):
+            raise ValueError(f'frames_per_second must be > 0, but was {frames_per_second}.')
+
+        if (seconds_per_transition <= 0):
+            raise ValueError(f'seconds_per_transition must be > 0, but was {seconds_per_transition}.')
+
+        if (easing not in (LINEAR_EASING, SMOOTHSTEP_EASING)):
+            raise ValueError(f'easing must be {LINEAR_EASING} or {SMOOTHSTEP_EASING}, but was {easing}.')
+
+        self.__grouped_leds = grouped_leds
+        self.__seconds_per_frame = 1 / frames_per_second
+        self.__seconds_per_transition = seconds_per_transition
+        self.__easing = easing
+
+        SHAPE = (grouped_leds.number_of_groups, 3)
+        self.__shown_colors = numpy.array([tuple(grouped_leds.get_group_color(group))
+                                           for group in range(grouped_leds.number_of_groups)], dtype=numpy.uint8).reshape(SHAPE)
+        self.__start_colors = self.__shown_colors.astype(numpy.float64)
+        self.__end_colors = self.__start_colors.copy()
+        self.__transition_start_time = time.monotonic()
+
+        # Only the first frame rendered towards new colors carries their capture_time, i.e. measures when they start to show.
+        self.__capture_time: Optional[float] = None
+
+        self.__condition = threading.Condition()
+        self.__error: Optional[Exception] = None
+        self.__closed = False
+
+        self.__thread = threading.Thread(target=self.__render, daemon=True)
+        self.__thread.start()
+
+    @property
+    def number_of_groups(self) -> int:
+        return self.__grouped_leds.number_of_groups
+
+    @property
+    def number_of_leds(self) -> int:
+        return self.__grouped_leds.number_of_leds
+
+    @property
+    def start_led(self) -> int:
+        return self.__grouped_leds.start_led
+
+    @property
+    def end_led(self) -> int:
+        return self.__grouped_leds.end_led
+
+    def get_group_led_ranges(self, group):
+        return self.__grouped_leds.get_group_led_ranges(group)
+
+    def get_group_color(self, group):
+        if (group < 0):
+            raise ValueError(f'group must be >= 0, but was {group}.')
+
+        with self.__condition:
+            return RGB(*(int(channel) for channel in self.__end_colors[group]))
+
+    def set_colors(self, group_colors, capture_time=None):
+        with self.__condition:
+            self.__raise_render_error()
+
+            NOW = time.monotonic()
+            self.__start_colors = self.__get_interpolated_colors(NOW)
+            self.__transition_start_time = NOW
+            self.__capture_time = capture_time
+
+            for group, color in group_colors:
+                if (group < 0):
+                    raise ValueError(f'group must be >= 0, but was {group}.')
+
+                self.__end_colors[group] = tuple(RGB(*color))
+
+            self.__condition.notify()
+
+    def close(self):
+        '''
+            Stops the render thread and immediately shows the most recent colors passed to `set_colors`.
+        '''
+        with self.__condition:
+            if (self.__closed):
+                return
+
+            self.__closed = True
+            self.__condition.notify()
+
+        self.__thread.join()
+
+        self.__show(self.__end_colors.astype(numpy.uint8))
+
+    def __render(self):
+        next_frame_time = time.monotonic()
+
+        try:
+            while True:
+                with self.__condition:
+                    if (self.__closed):
+                        return
+
+                    NOW = time.monotonic()
+                    frame = numpy.rint(self.__get_interpolated_colors(NOW)).astype(numpy.uint8)
+                    transition_is_done = (NOW - self.__transition_start_time >= self.__seconds_per_transition)
+
+                    capture_time = self.__capture_time
+                    self.__capture_time = None
+
+                self.__show(frame, capture_time)
+
+                if (transition_is_done):
+                    with self.__condition:
+                        while (not self.__closed and time.monotonic() - self.__transition_start_time >= self.__seconds_per_transition):
+                            self.__condition.wait()
+
+                    next_frame_time = time.monotonic()
+
+                else:
+                    next_frame_time = max(next_frame_time + self.__seconds_per_frame, time.monotonic())
+                    time.sleep(max(next_frame_time - time.monotonic(), 0))
+
+        except Exception as error:
+            with self.__condition:
+                self.__error = error
+
+    def __get_interpolated_colors(self, now: float) -> numpy.ndarray:
+        progress = min(max((now - self.__transition_start_time) / self.__seconds_per_transition, 0), 1)
+
+        if (self.__easing == SMOOTHSTEP_EASING):
+            progress = progress * progress * (3 - 2 * progress)
+
+        return self.__start_colors + (self.__end_colors - self.__start_colors) * progress
+
+    def __show(self, frame: numpy.ndarray, capture_time: Optional[float] = None):
+        CHANGED_GROUPS = numpy.flatnonzero(numpy.any(frame != self.__shown_colors, axis=1))
+
+        if (len(CHANGED_GROUPS) > 0):
+            self.__grouped_leds.set_colors([(int(group), tuple(frame[group].tolist())) for group in CHANGED_GROUPS], capture_time)
+            self.__shown_colors = frame
+
+    def __raise_render_error(self):
+        if (self.__error is not None):
+            error = self.__error
+            self.__error = None
+            raise error
+
+
+class AsyncGroupedLeds(GroupedLeds):
+    def __init__(self, grouped_leds: GroupedLeds, latency_statistics: Optional[LatencyStatistics] = None):
+        '''
+            Forwards colors to `grouped_leds` from a background thread, so `set_colors` never waits on a slow output
+            such as a serial link. Only the latest frame is kept: colors set while an earlier frame is still waiting
+            to be written are merged into it (newer colors win), and that earlier frame is counted as dropped.
+            `grouped_leds` is only ever updated from the background thread until `close` is called.
+
+            Args:
+                `grouped_leds (GroupedLeds)`: The GroupedLeds to forward colors to.
+                `latency_statistics (LatencyStatistics, optional)`: If given, the latency of every written frame that
+                has a capture time is recorded once it has been written. A merged frame has the newest capture time.
+        '''
+        self.__grouped_leds = grouped_leds
+        self.__latency_statistics = latency_statistics
+
+        self.__colors = [grouped_leds.get_group_color(group) for group in range(grouped_leds.number_of_groups)]
+        self.__pending_colors: Dict[int, RGB] = {}
+        self.__pending_capture_time: Optional[float] = None
+        self.__has_pending_frame = False
+
+        self.__frames_written = 0
+        self.__frames_dropped = 0
+
+        self.__condition = threading.Condition()
+        self.__error: Optional[Exception] = None
+        self.__closed = False
+
+        self.__thread = threading.Thread(target=self.__write, daemon=True)
+        self.__thread.start()
+
+    @property
+    def number_of_groups(self) -> int:
+        return self.__grouped_leds.number_of_groups
+
+    @property
+    def number_of_leds(self) -> int:
+        return self.__grouped_leds.number_of_leds
+
+    @property
+    def start_led(self) -> int:
+        return self.__grouped_leds.start_led
+
+    @property
+    def end_led(self) -> int:
+        return self.__grouped_leds.end_led
+
+    @property
+    def frames_written(self) -> int:
+        '''
+            Returns:
+                `int`: The number of frames written to the wrapped GroupedLeds.
+        '''
+        with self.__condition:
+            return self.__frames_written
+
+    @property
+    def frames_dropped(self) -> int:
+        '''
+            Returns:
+                `int`: The number of frames that were merged into a newer frame before they could be written.
+        '''
+        with self.__condition:
+            return self.__frames_dropped
+
+    def get_group_led_ranges(self, group):
+        return self.__grouped_leds.get_group_led_ranges(group)
+
+    def get_group_color(self, group):
+        if (group < 0):
+            raise ValueError(f'group must be >= 0, but was {group}.')
+
+        with self.__condition:
+            return self.__colors[group]
+
+    def set_colors(self, group_colors, capture_time=None):
+        group_colors = [(group, RGB(*color)) for group, color in group_colors]
+
+        for group, _ in group_colors:
+            if (group < 0):
+                raise ValueError(f'group must be >= 0, but was {group}.')
+
+        with self.__condition:
+            self.__raise_write_error()
+
+            if (self.__has_pending_frame):
+                self.__frames_dropped += 1
+
+            for group, color in group_colors:
+                self.__colors[group] = color
+                self.__pending_colors[group] = color
+
+            if (capture_time is not None):
+                self.__pending_capture_time = capture_time
+
+            self.__has_pending_frame = True
+            self.__condition.notify()
+
+    def close(self):
+        '''
+            Stops the background thread and writes the frame that is still waiting, if any.
+        '''
+        with self.__condition:
+            if (self.__closed):
+                return
+
+            self.__closed = True
+            self.__condition.notify()
+
+        self.__thread.join()
+
+        if (self.__has_pending_frame):
+            self.__write_frame(*self.__take_pending_frame())
+
+    def __write(self):
+        try:
+            while True:
+                with self.__condition:
+                    while (not self.__closed and not self.__has_pending_frame):
+                        self.__condition.wait()
+
+                    if (self.__closed):
+                        return
+
+                    group_colors, capture_time = self.__take_pending_frame()
+
+                self.__write_frame(group_colors, capture_time)
+
+        except Exception as error:
+            with self.__condition:
+                self.__error = error
+
+    def __take_pending_frame(self) -> Tuple[List[Tuple[int, RGB]], Optional[float]]:
+        group_colors = list(self.__pending_colors.items())
+        capture_time = self.__pending_capture_time
+
+        self.__pending_colors.clear()
+        self.__pending_capture_time = None
+        self.__has_pending_frame = False
+
+        return group_colors, capture_time
+
+    def __write_frame(self, group_colors: List[Tuple[int, RGB]], capture_time: Optional[float]):
+        self.__grouped_leds.set_colors(group_colors, capture_time)
+
+        if (self.__latency_statistics is not None and capture_time is not None):
+            self.__latency_statistics.on_sent(capture_time)
+
+        with self.__condition:
+            self.__frames_written += 1
+
+    def __raise_write_error(self):
+        if (self.__error is not None):
+            error = self.__error
+            self.__error = None
+            raise error
+
+
+def split_group_led_ranges(led_range: Tuple[int, int], group_led_ranges: List[Iterable[Tuple[int, int]]],
+                           numbers_of_leds: List[int]) -> List[Tuple[Tuple[int, int], List[List[Tuple[int, int]]]]]:
+    '''
+        Splits one LED strip across several controllers that are chained end to end: the first controller drives LEDs
+        [0, numbers_of_leds[0]), the second drives the next numbers_of_leds[1] LEDs, and so on.
+
+        Args:
+            `led_range (Tuple[int, int])`: The inclusive start & exclusive end led index across every controller.
+            `group_led_ranges (List[Iterable[Tuple[int, int]]])`: The led ranges of each group across every controller.
+            `numbers_of_leds (List[int])`: The number of LEDs each controller drives.
+
+        Returns:
+            `List[Tuple[Tuple[int, int], List[List[Tuple[int, int]]]]]`: The led range and group led ranges of each
+            controller, indexed from that controller's first LED. Every controller keeps every group, though a
+            group may have no led ranges on a controller.
+    '''
+    TOTAL_NUMBER_OF_LEDS = sum(numbers_of_leds)
+
+    if (led_range[1] > TOTAL_NUMBER_OF_LEDS):
+        raise ValueError(f'led_range {tuple(led_range)} does not fit on controllers with {TOTAL_NUMBER_OF_LEDS} LEDs in total.')
+
+    splits: List[Tuple[Tuple[int, int], List[List[Tuple[int, int]]]]] = []
+    offset = 0
+
+    for number_of_leds in numbers_of_leds:
+        START = min(max(led_range[0] - offset, 0), number_of_leds)
+        END = min(max(led_range[1] - offset, 0), number_of_leds)
+
+        local_group_led_ranges: List[List[Tuple[int, int]]] = []
+
+        for led_ranges in group_led_ranges:
+            local_led_ranges: List[Tuple[int, int]] = []
 
             for start, end in led_ranges:
-                start_bytes = start.to_bytes(length=2, byteorder=BYTE_ORDER)
-                end_bytes = end.to_bytes(length=2, byteorder=BYTE_ORDER)
-                checksum = (sum(start_bytes) + sum(end_bytes) + sum(led_ranges_length_bytes)) % 256
+                local_start = max(start - offset, START)
+                local_end = min(end - offset, END)
+
+                if (local_start < local_end):
+                    local_led_ranges.append((local_start, local_end))
+
+            local_group_led_ranges.append(local_led_ranges)
+
+        splits.append(((START, END), local_group_led_ranges))
+        offset += number_of_leds
 
-                packet = start_bytes + end_bytes + checksum.to_bytes(length=1, byteorder=BYTE_ORDER)
-                self.__send_bytes(packet)
+    return splits
 
-        self.__send_bytes(GROUP_SETUP_END_OF_MESSAGE_CODE.to_bytes(length=1, byteorder=BYTE_ORDER))
 
-    def __send_packet(self, group: int, color: RGB):
-        packet = group.to_bytes(length=1, byteorder=BYTE_ORDER)
-        packet += color.red.to_bytes(1, BYTE_ORDER)
-        packet += color.green.to_bytes(1, BYTE_ORDER)
-        packet += color.blue.to_bytes(1, BYTE_ORDER)
+class FanOutGroupedLeds(ProductionGroupedLeds):
+    def __init__(self, led_range: Tuple[int, int], group_led_ranges: List[Iterable[Tuple[int, int]]],
+                 grouped_leds: List[GroupedLeds], latency_statistics: Optional[LatencyStatistics] = None):
+        '''
+            Drives one layout from several GroupedLeds, usually one SerialGroupedLeds per controller built from
+            `split_group_led_ranges`. Each GroupedLeds is written by its own background thread, and each only receives
+            the groups that have LEDs on it.
+
+            Every thread writes the same frame and then waits for the others, so all outputs move to the next frame
+            on a common boundary. Like AsyncGroupedLeds, only the latest frame is kept while the threads are busy.
+
+            Args:
+                `led_range (Tuple[int, int])`: The inclusive start & exclusive end led index across every output.
+                `group_led_ranges (List[Iterable[Tuple[int, int]]])`: The led ranges of each group across every output.
+                `grouped_leds (List[GroupedLeds])`: The outputs; each must have the same number of groups.
+                `latency_statistics (LatencyStatistics, optional)`: If given, the latency of every frame that has a
+                capture time is recorded once every output has written it.
+        '''
+        super().__init__(led_range, group_led_ranges)
+
+        if (len(grouped_leds) == 0):
+            raise ValueError('grouped_leds must not be empty.')
 
-        self.__send_bytes(packet)
+        for output in grouped_leds:
+            if (output.number_of_groups != self.number_of_groups):
+                raise ValueError(f'Every output must have {self.number_of_groups} groups, but one had {output.number_of_groups}.')
 
-        check_sum = (sum(packet) % 256).to_bytes(length=1, byteorder=BYTE_ORDER)
+        self.__latency_statistics = latency_statistics
+
+        self.__pending_colors: Dict[int, RGB] = {}
+        self.__pending_capture_time: Optional[float] = None
+        self.__has_pending_frame = False
+        self.__frame: Optional[List[Tuple[int, RGB]]] = None
+        self.__frame_capture_time: Optional[float] = None
+
+        self.__frames_written = 0
+        self.__frames_dropped = 0
+
+        self.__condition = threading.Condition()
+        self.__error: Optional[Exception] = None
+        self.__closed = False
+
+        self.__grouped_leds = grouped_leds
+        self.__output_groups = [{group for group in range(self.number_of_groups) if (len(output.get_group_led_ranges(group)) > 0)}
+                                for output in grouped_leds]
 
-        self.__send_bytes(check_sum)
+        self.__barrier = threading.Barrier(len(grouped_leds), action=self.__take_frame)
+        self.__threads = [threading.Thread(target=self.__write, args=(output, groups), daemon=True)
+                          for output, groups in zip(grouped_leds, self.__output_groups)]
 
-    def __send_bytes(self, bytes_: bytes):
-        self.__serial_writer.write(bytes_)
+        for thread in self.__threads:
+            thread.start()
+
+    @property
+    def frames_written(self) -> int:
+        '''
+            Returns:
+                `int`: The number of frames written to every output.
+        '''
+        with self.__condition:
+            return self.__frames_written
+
+    @property
+    def frames_dropped(self) -> int:
+        '''
+            Returns:
+                `int`: The number of frames that were merged into a newer frame before they could be written.
+        '''
+        with self.__condition:
+            return self.__frames_dropped
+
+    def set_colors(self, group_colors, capture_time=None):
+        group_colors = [(group, RGB(*color)) for group, color in group_colors]
+
+        with self.__condition:
+            self.__raise_write_error()
+
+            super().set_colors(group_colors, capture_time)
+
+            if (self.__has_pending_frame):
+                self.__frames_dropped += 1
+
+            self.__pending_colors.update(group_colors)
+
+            if (capture_time is not None):
+                self.__pending_capture_time = capture_time
+
+            self.__has_pending_frame = True
+            self.__condition.notify()
+
+    def close(self):
+        '''
+            Stops the background threads and writes the frame that is still waiting, if any.
+        '''
+        with self.__condition:
+            if (self.__closed):
+                return
+
+            self.__closed = True
+            self.__condition.notify()
+
+        for thread in self.__threads:
+            thread.join()
+
+        if (self.__has_pending_frame):
+            FRAME = list(self.__pending_colors.items())
+
+            for output, groups in zip(self.__grouped_leds, self.__output_groups):
+                self.__write_frame(output, groups, FRAME, self.__pending_capture_time)
+
+            self.__on_frame_written(self.__pending_capture_time)
+
+    def __take_frame(self):
+        # Runs on one of the threads once all of them have finished the previous frame.
+        with self.__condition:
+            if (self.__frame is not None):
+                self.__on_frame_written(self.__frame_capture_time)
+
+            while (not self.__closed and not self.__has_pending_frame):
+                self.__condition.wait()
+
+            if (self.__closed):
+                self.__frame = None
+
+            else:
+                self.__frame = list(self.__pending_colors.items())
+                self.__frame_capture_time = self.__pending_capture_time
+
+                self.__pending_colors.clear()
+                self.__pending_capture_time = None
+                self.__has_pending_frame = False
+
+    def __on_frame_written(self, capture_time: Optional[float]):
+        self.__frames_written += 1
+
+        if (self.__latency_statistics is not None and capture_time is not None):
+            self.__latency_statistics.on_sent(capture_time)
+
+    def __write(self, output: GroupedLeds, groups: Set[int]):
+        try:
+            while True:
+                self.__barrier.wait()
+
+                if (self.__frame is None):
+                    return
+
+                self.__write_frame(output, groups, self.__frame, self.__frame_capture_time)
+
+        except threading.BrokenBarrierError:
+            return
+
+        except Exception as error:
+            with self.__condition:
+                if (self.__error is None):
+                    self.__error = error
+
+            self.__barrier.abort()
+
+    def __write_frame(self, output: GroupedLeds, groups: Set[int], frame: List[Tuple[int, RGB]], capture_time: Optional[float]):
+        GROUP_COLORS = [(group, color) for group, color in frame if (group in groups)]
+
+        if (len(GROUP_COLORS) > 0):
+            output.set_colors(GROUP_COLORS, capture_time)
+
+    def __raise_write_error(self):
+        if (self.__error is not None):
+            error = self.__error
+            self.__error = None
+            raise error
 
 
 class GroupedLedsQueue:
-    def __init__(self, grouped_leds: GroupedLeds = ProductionGroupedLeds()):
+    def __init__(self, grouped_leds: GroupedLeds = ProductionGroupedLeds(),
+                 latency_statistics: Optional[LatencyStatistics] = None):
+        '''
+            Args:
+                `grouped_leds (GroupedLeds, optional)`: Where queued colors are shown.
+                `latency_statistics (LatencyStatistics, optional)`: If given, the latency of every call to
+                `show_queued_colors` that has a capture time is recorded as the analysis latency.
+        '''
         self.__grouped_leds = grouped_leds
+        self.__latency_statistics = latency_statistics
         self.__color_queue: List[Tuple[int, RGB]] = []
 
     @property
@@ -324,8 +1187,16 @@ class GroupedLedsQueue:
     def group_is_color(self, group: int, rgb: Iterable[int]) -> bool:
         return self.__grouped_leds.get_group_color(group) == rgb
 
-    def show_queued_colors(self):
-        self.__grouped_leds.set_colors(self.__color_queue)
+    def show_queued_colors(self, capture_time: Optional[float] = None):
+        '''
+            Args:
+                `capture_time (float, optional)`: The time.monotonic() at which the audio the queued colors were analysed
+                from was captured; passed on with the colors.
+        '''
+        if (self.__latency_statistics is not None and capture_time is not None):
+            self.__latency_statistics.on_analysed(capture_time)
+
+        self.__grouped_leds.set_colors(self.__color_queue, capture_time)
 
     def clear_queued_colors(self):
         self.__color_queue.clear()
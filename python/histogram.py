@@ -0,0 +1,113 @@
+from typing import Sequence
+
+import numpy
+
+
+def exponential_upper_bounds(first_upper_bound: float, factor: float, number_of_buckets: int) -> numpy.ndarray:
+    '''
+        Args:
+            `first_upper_bound (float)`: The upper bound of the first bucket.
+            `factor (float)`: How much larger each upper bound is than the one before it.
+            `number_of_buckets (int)`: The number of upper bounds.
+
+        Returns:
+            `numpy.ndarray`: [first_upper_bound, first_upper_bound * factor, first_upper_bound * factor ** 2, ...]
+    '''
+    if (first_upper_bound <= 0):
+        raise ValueError(f'first_upper_bound must be > 0, but was {first_upper_bound}.')
+
+    if (factor <= 1):
+        raise ValueError(f'factor must be > 1, but was {factor}.')
+
+    return first_upper_bound * factor ** numpy.arange(number_of_buckets)
+
+
+class Histogram:
+    def __init__(self, upper_bounds: Sequence[float]):
+        '''
+            Counts values into fixed buckets, so memory stays constant no matter how many values are added. Bucket i
+            counts the values within (upper_bounds[i - 1], upper_bounds[i]]; one extra bucket counts the values above
+            the last upper bound.
+
+            Args:
+                `upper_bounds (Sequence[float])`: The strictly increasing upper bound of each bucket.
+        '''
+        self.__upper_bounds = numpy.asarray(upper_bounds, dtype=numpy.float64)
+
+        if (self.__upper_bounds.ndim != 1 or len(self.__upper_bounds) == 0):
+            raise ValueError(f'upper_bounds must be a non-empty sequence, but was {upper_bounds}.')
+
+        if (numpy.any(numpy.diff(self.__upper_bounds) <= 0)):
+            raise ValueError(f'upper_bounds must be strictly increasing, but was {upper_bounds}.')
+
+        self.__counts = numpy.zeros(len(self.__upper_bounds) + 1, dtype=numpy.int64)
+        self.clear()
+
+    @property
+    def upper_bounds(self) -> numpy.ndarray:
+        return self.__upper_bounds.copy()
+
+    @property
+    def counts(self) -> numpy.ndarray:
+        '''
+            Returns:
+                `numpy.ndarray`: The count of each bucket; the last count is of the values above every upper bound.
+        '''
+        return self.__counts.copy()
+
+    @property
+    def count(self) -> int:
+        return int(self.__counts.sum())
+
+    @property
+    def total(self) -> float:
+        return self.__total
+
+    @property
+    def mean(self) -> float:
+        COUNT = self.count
+        return self.__total / COUNT if (COUNT > 0) else numpy.nan
+
+    @property
+    def minimum(self) -> float:
+        return self.__minimum
+
+    @property
+    def maximum(self) -> float:
+        return self.__maximum
+
+    def add(self, value: float):
+        self.__counts[numpy.searchsorted(self.__upper_bounds, value, side='left')] += 1
+
+        self.__total += value
+        self.__minimum = min(self.__minimum, value)
+        self.__maximum = max(self.__maximum, value)
+
+    def quantile(self, quantile: float) -> float:
+        '''
+            Args:
+                `quantile (float)`: Within the range [0, 1].
+
+            Returns:
+                `float`: The upper bound of the bucket that holds `quantile`, or the maximum value if that bucket is
+                the last one. nan if no values have been added.
+        '''
+        if (quantile < 0 or quantile > 1):
+            raise ValueError(f'quantile must be >= 0 and <= 1, but was {quantile}.')
+
+        if (self.count == 0):
+            return numpy.nan
+
+        TARGET_COUNT = max(quantile * self.count, 1)
+        BUCKET = int(numpy.searchsorted(numpy.cumsum(self.__counts), TARGET_COUNT, side='left'))
+
+        if (BUCKET == len(self.__upper_bounds)):
+            return self.__maximum
+
+        return min(float(self.__upper_bounds[BUCKET]), self.__maximum)
+
+    def clear(self):
+        self.__counts[:] = 0
+        self.__total = 0.0
+        self.__minimum = numpy.inf
+        self.__maximum = -numpy.inf
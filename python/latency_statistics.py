@@ -0,0 +1,100 @@
+import threading
+import time
+from typing import Sequence
+
+from histogram import Histogram, exponential_upper_bounds
+
+# 0.5 ms up to ~3 s, 25% apart
+SECONDS_UPPER_BOUNDS = exponential_upper_bounds(0.0005, 1.25, 40)
+
+MILLISECONDS_PER_SECOND = 1000
+
+
+class LatencyStatistics:
+    def __init__(self):
+        '''
+            Histograms of the end-to-end latency of audio chunks: from when a chunk was captured (see
+            `AudioInStream.capture_time`) to when the colors analysed from it were shown, and to when the transport finished
+            sending them. They are updated by whichever thread reaches each stage and may be read from any thread.
+        '''
+        self.__lock = threading.Lock()
+
+        self.__analysis_seconds = Histogram(SECONDS_UPPER_BOUNDS)
+        self.__sent_seconds = Histogram(SECONDS_UPPER_BOUNDS)
+
+        self.reset()
+
+    @property
+    def elapsed_seconds(self) -> float:
+        '''
+            Returns:
+                `float`: The time since these statistics were created or last reset.
+        '''
+        return time.monotonic() - self.__start_time
+
+    def get_analysis_seconds_quantile(self, quantile: float) -> float:
+        '''
+            Returns:
+                `float`: A quantile of the time from capturing a chunk to showing the colors analysed from it.
+        '''
+        with self.__lock:
+            return self.__analysis_seconds.quantile(quantile)
+
+    def get_sent_seconds_quantile(self, quantile: float) -> float:
+        '''
+            Returns:
+                `float`: A quantile of the time from capturing a chunk to finishing sending the colors analysed from it.
+        '''
+        with self.__lock:
+            return self.__sent_seconds.quantile(quantile)
+
+    def on_analysed(self, capture_time: float):
+        '''
+            Args:
+                `capture_time (float)`: The time.monotonic() at which the analysed chunk was captured.
+        '''
+        SECONDS = time.monotonic() - capture_time
+
+        with self.__lock:
+            self.__analysis_seconds.add(SECONDS)
+
+    def on_sent(self, capture_time: float):
+        '''
+            Args:
+                `capture_time (float)`: The time.monotonic() at which the chunk the sent colors were analysed from was captured.
+        '''
+        SECONDS = time.monotonic() - capture_time
+
+        with self.__lock:
+            self.__sent_seconds.add(SECONDS)
+
+    def reset(self):
+        with self.__lock:
+            self.__start_time = time.monotonic()
+
+            self.__analysis_seconds.clear()
+            self.__sent_seconds.clear()
+
+    def get_summary(self, percentiles: Sequence[float] = (50, 99)) -> str:
+        '''
+            Args:
+                `percentiles (Sequence[float], optional)`: The percentiles to state; each within the range [0, 100].
+
+            Returns:
+                `str`: One line stating the percentiles & maximum of each latency, in milliseconds.
+        '''
+        for percentile in percentiles:
+            if (percentile < 0 or percentile > 100):
+                raise ValueError(f'Every percentile must be >= 0 and <= 100, but percentiles was {percentiles}.')
+
+        QUANTILES = [percentile / 100 for percentile in percentiles] + [1]
+        LABELS = '/'.join([f'p{percentile:g}' for percentile in percentiles] + ['max'])
+
+        with self.__lock:
+            ANALYSIS_MILLISECONDS = '/'.join(f'{MILLISECONDS_PER_SECOND * self.__analysis_seconds.quantile(quantile):.2f}'
+                                             for quantile in QUANTILES)
+            SENT_MILLISECONDS = '/'.join(f'{MILLISECONDS_PER_SECOND * self.__sent_seconds.quantile(quantile):.2f}'
+                                         for quantile in QUANTILES)
+
+            return (f'latency ms {LABELS}: capture to analysed {ANALYSIS_MILLISECONDS} ({self.__analysis_seconds.count} chunks), '
+                    f'capture to sent {SENT_MILLISECONDS} ({self.__sent_seconds.count} frames)')
@@ -0,0 +1,171 @@
+import time
+import unittest
+from typing import List, Optional
+
+import libraries.serial
+import numpy
+from grouped_leds import ENCODINGS, FanOutGroupedLeds, SerialGroupedLeds, split_group_led_ranges
+from libraries.arduino_emulator import ArduinoEmulator
+from libraries.serial import EIGHTBITS, PARITY_NONE, PROTOCOL_VERSION_1, PROTOCOL_VERSION_2, STOPBITS_ONE, ProductionSerial
+from util import RGB
+
+libraries.serial.SERIAL_INIT_DELAY = 0
+
+
+class ArduinoEmulatorTestCase(unittest.TestCase):
+    BAUD_RATE = 1999999
+    READ_TIMEOUT = 1
+    WRITE_TIMEOUT = 1
+    NUMBER_OF_LEDS = 30
+    BRIGHTNESS = 50
+    GROUP_LED_RANGES = [[(0, 5)], [(5, 10), (20, 25)], [(10, 15)], []]
+
+    def open(self, protocol_version: int = PROTOCOL_VERSION_2, number_of_leds: Optional[int] = None,
+             maximum_count: Optional[int] = None) -> ProductionSerial:
+        self.emulator = ArduinoEmulator(self.NUMBER_OF_LEDS if (number_of_leds is None) else number_of_leds, protocol_version,
+                                        maximum_count=maximum_count)
+        self.addCleanup(self.emulator.close)
+
+        serial = ProductionSerial()
+        serial.open(self.emulator.port, self.BAUD_RATE, PARITY_NONE, STOPBITS_ONE, EIGHTBITS, self.READ_TIMEOUT, self.WRITE_TIMEOUT)
+        self.addCleanup(serial.close)
+
+        return serial
+
+    def wait_for_messages(self, number_of_messages: int, emulator: Optional[ArduinoEmulator] = None):
+        emulator = self.emulator if (emulator is None) else emulator
+        DEADLINE = time.monotonic() + self.READ_TIMEOUT
+
+        while (emulator.messages_received < number_of_messages and time.monotonic() < DEADLINE):
+            time.sleep(0.001)
+
+        self.assertEqual(emulator.messages_received, number_of_messages)
+
+
+class TestHandshake(ArduinoEmulatorTestCase):
+    def test_number_of_leds_and_protocol_version(self):
+        serial = self.open()
+
+        self.assertEqual(serial.number_of_leds, self.NUMBER_OF_LEDS)
+        self.assertEqual(serial.protocol_version, PROTOCOL_VERSION_2)
+
+    def test_older_controller(self):
+        serial = self.open(PROTOCOL_VERSION_1)
+
+        self.assertEqual(serial.protocol_version, PROTOCOL_VERSION_1)
+
+    def test_group_setup(self):
+        serial = self.open()
+        SerialGroupedLeds((0, self.NUMBER_OF_LEDS), self.GROUP_LED_RANGES, serial, self.BRIGHTNESS)
+
+        self.assertEqual(self.emulator.brightness, self.BRIGHTNESS)
+        self.assertEqual(self.emulator.group_led_ranges, self.GROUP_LED_RANGES)
+
+
+class TestSetColors(ArduinoEmulatorTestCase):
+    def test_every_encoding_and_protocol_version(self):
+        FRAMES = [[(0, RGB(255, 0, 0)), (1, RGB(0, 255, 0))],
+                  [(1, RGB(0, 255, 0)), (2, RGB(0, 255, 0)), (3, RGB(1, 2, 3))],
+                  [(0, RGB(0, 0, 0))]]
+
+        for protocol_version in (PROTOCOL_VERSION_1, PROTOCOL_VERSION_2):
+            for encoding in ENCODINGS:
+                with self.subTest(protocol_version=protocol_version, encoding=encoding):
+                    serial = self.open(protocol_version)
+                    grouped_leds = SerialGroupedLeds((0, self.NUMBER_OF_LEDS), self.GROUP_LED_RANGES, serial,
+                                                     self.BRIGHTNESS, encoding)
+
+                    expected_led_colors = numpy.zeros((self.NUMBER_OF_LEDS, 3), dtype=numpy.uint8)
+
+                    for number_of_messages, group_colors in enumerate(FRAMES, 1):
+                        grouped_leds.set_colors(group_colors)
+                        self.wait_for_messages(number_of_messages)
+
+                        for group, color in group_colors:
+                            for start, end in self.GROUP_LED_RANGES[group]:
+                                expected_led_colors[start:end] = tuple(color)
+
+                        numpy.testing.assert_array_equal(self.emulator.get_led_colors(), expected_led_colors)
+
+                    self.assertEqual(self.emulator.check_sum_errors, 0)
+
+    def test_more_groups_than_leds(self):
+        # The controller can't take messages with more packets than it has LEDs, so these are sent as frames.
+        NUMBER_OF_GROUPS = 2 * self.NUMBER_OF_LEDS
+        GROUP_LED_RANGES = [[(group % self.NUMBER_OF_LEDS, group % self.NUMBER_OF_LEDS + 1)] for group in range(NUMBER_OF_GROUPS)]
+        GROUP_COLORS = [(group, RGB(group, 0, 0)) for group in range(NUMBER_OF_GROUPS)]
+
+        for encoding in ENCODINGS:
+            with self.subTest(encoding=encoding):
+                serial = self.open()
+                grouped_leds = SerialGroupedLeds((0, self.NUMBER_OF_LEDS), GROUP_LED_RANGES, serial, self.BRIGHTNESS, encoding)
+
+                grouped_leds.set_colors(GROUP_COLORS)
+                self.wait_for_messages(1)
+
+                numpy.testing.assert_array_equal(self.emulator.get_led_colors()[:, 0], numpy.arange(self.NUMBER_OF_LEDS, NUMBER_OF_GROUPS))
+                self.assertEqual(self.emulator.check_sum_errors, 0)
+
+    def test_controller_out_of_ram(self):
+        # The controller reports that only one packet, palette color or run fits in a message, so the rest are sent as frames.
+        GROUP_COLORS = [(0, RGB(255, 0, 0)), (1, RGB(0, 255, 0)), (2, RGB(0, 0, 255))]
+
+        for encoding in ENCODINGS:
+            with self.subTest(encoding=encoding):
+                serial = self.open(maximum_count=1)
+                grouped_leds = SerialGroupedLeds((0, self.NUMBER_OF_LEDS), self.GROUP_LED_RANGES, serial, self.BRIGHTNESS, encoding)
+
+                grouped_leds.set_colors(GROUP_COLORS[:1])
+                grouped_leds.set_colors(GROUP_COLORS)
+                self.wait_for_messages(2)
+
+                expected_led_colors = numpy.zeros((self.NUMBER_OF_LEDS, 3), dtype=numpy.uint8)
+
+                for group, color in GROUP_COLORS:
+                    for start, end in self.GROUP_LED_RANGES[group]:
+                        expected_led_colors[start:end] = tuple(color)
+
+                numpy.testing.assert_array_equal(self.emulator.get_led_colors(), expected_led_colors)
+                self.assertEqual(self.emulator.check_sum_errors, 0)
+
+
+class TestFanOut(ArduinoEmulatorTestCase):
+    NUMBERS_OF_LEDS = [10, 10]
+    # Only on the first controller, across both controllers, only on the second controller, and on neither.
+    GROUP_LED_RANGES = [[(0, 5)], [(8, 13)], [(15, 20)], []]
+
+    def test_each_controller_receives_only_its_own_leds(self):
+        serials: List[ProductionSerial] = []
+        emulators: List[ArduinoEmulator] = []
+
+        for number_of_leds in self.NUMBERS_OF_LEDS:
+            serials.append(self.open(number_of_leds=number_of_leds))
+            emulators.append(self.emulator)
+
+        SPLITS = split_group_led_ranges((0, sum(self.NUMBERS_OF_LEDS)), self.GROUP_LED_RANGES, self.NUMBERS_OF_LEDS)
+        outputs = [SerialGroupedLeds(led_range, group_led_ranges, serial, self.BRIGHTNESS)
+                   for (led_range, group_led_ranges), serial in zip(SPLITS, serials)]
+
+        fan_out_grouped_leds = FanOutGroupedLeds((0, sum(self.NUMBERS_OF_LEDS)), self.GROUP_LED_RANGES, outputs)
+        self.addCleanup(fan_out_grouped_leds.close)
+
+        self.assertEqual([emulator.group_led_ranges for emulator in emulators],
+                         [[[(0, 5)], [(8, 10)], [], []], [[], [(0, 3)], [(5, 10)], []]])
+
+        # Only the first controller has LEDs in group 0.
+        fan_out_grouped_leds.set_colors([(0, RGB(255, 0, 0))])
+        self.wait_for_messages(1, emulators[0])
+
+        fan_out_grouped_leds.set_colors([(1, RGB(0, 255, 0)), (2, RGB(0, 0, 255)), (3, RGB(1, 2, 3))])
+        self.wait_for_messages(2, emulators[0])
+        self.wait_for_messages(1, emulators[1])
+
+        expected_led_colors = numpy.zeros((sum(self.NUMBERS_OF_LEDS), 3), dtype=numpy.uint8)
+        expected_led_colors[0:5] = (255, 0, 0)
+        expected_led_colors[8:13] = (0, 255, 0)
+        expected_led_colors[15:20] = (0, 0, 255)
+
+        numpy.testing.assert_array_equal(numpy.concatenate([emulator.get_led_colors() for emulator in emulators]), expected_led_colors)
+
+        for emulator in emulators:
+            self.assertEqual(emulator.check_sum_errors, 0)
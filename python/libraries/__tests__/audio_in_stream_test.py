@@ -1,7 +1,16 @@
+import math
+import os
+import socket
+import tempfile
+import threading
 import unittest
-from unittest.mock import MagicMock, patch
+import wave
+from unittest.mock import MagicMock, call, patch
 
-from libraries.audio_in_stream import ProductionAudioInStream
+import numpy
+from libraries.audio_in_stream import (CALLBACK_CAPTURE, FLOAT32_FORMAT, IMPULSE_SIGNAL, INT16_FORMAT, PINK_NOISE_SIGNAL, STDIN_SOURCE,
+                                       SWEEP_SIGNAL, TONES_SIGNAL, UNIX_SOCKET_PREFIX, PcmAudioInStream, ProductionAudioInStream,
+                                       SignalGeneratorAudioInStream, WavFileAudioInStream, paContinue, paFloat32)
 
 
 class AudioInStreamTestCase(unittest.TestCase):
@@ -23,6 +32,7 @@ class AudioInStreamTestCase(unittest.TestCase):
         self.pyaudio_instance_mock.get_default_input_device_info.return_value = self.DEFAULT_INPUT_DEVICE_INFO
 
         self.audio_stream_instance_mock = self.pyaudio_instance_mock.open.return_value = MagicMock()
+        self.audio_stream_instance_mock.read.return_value = b''
 
         self.pyaudio_mock.reset_mock()
 
@@ -54,6 +64,10 @@ class TestAudioInStreamWhenOpenWasNotCalled(AudioInStreamTestCase):
         with self.assertRaises(ValueError):
             self.production_audio_in_stream.sample_rate
 
+    def test_number_of_channels(self):
+        with self.assertRaises(ValueError):
+            self.production_audio_in_stream.number_of_channels
+
     def test_close(self):
         self.production_audio_in_stream.close()
 
@@ -109,15 +123,44 @@ class TestAudioInStreamAfterCallingOpen(AudioInStreamTestCase):
     def test_read(self):
         NUMBER_OF_FRAMES = 10
 
-        EXPECTED_RETURN_VALUE = b'hello'
+        # Interleaved: the left channel counts up, the right channel counts down.
+        EXPECTED_SAMPLES = numpy.stack((numpy.arange(NUMBER_OF_FRAMES), -numpy.arange(NUMBER_OF_FRAMES)), axis=1).astype(numpy.int16)
 
-        self.audio_stream_instance_mock.read.return_value = EXPECTED_RETURN_VALUE
+        self.audio_stream_instance_mock.read.return_value = EXPECTED_SAMPLES.tobytes()
 
-        RETURN_VALUE = self.production_audio_in_stream.read(NUMBER_OF_FRAMES)
+        SAMPLES = self.production_audio_in_stream.read(NUMBER_OF_FRAMES)
 
         self.audio_stream_instance_mock.read.assert_called_once_with(NUMBER_OF_FRAMES)
 
-        self.assertEqual(RETURN_VALUE, EXPECTED_RETURN_VALUE)
+        self.assertEqual(SAMPLES.shape, (NUMBER_OF_FRAMES, self.NUMBER_OF_CHANNELS))
+        numpy.testing.assert_array_equal(SAMPLES, EXPECTED_SAMPLES)
+
+    def test_number_of_channels(self):
+        self.assertEqual(self.production_audio_in_stream.number_of_channels, self.NUMBER_OF_CHANNELS)
+
+    def test_read_does_not_drop_frames_by_default(self):
+        NUMBER_OF_FRAMES = 10
+
+        self.audio_stream_instance_mock.get_read_available.return_value = 10 * self.FRAME_RATE
+
+        self.production_audio_in_stream.read(NUMBER_OF_FRAMES)
+
+        self.audio_stream_instance_mock.read.assert_called_once_with(NUMBER_OF_FRAMES)
+        self.assertEqual(self.production_audio_in_stream.dropped_frames, 0)
+
+    def test_capture_time(self):
+        READ_TIME = 100.0
+        QUEUED_FRAMES = self.FRAME_RATE // 10
+
+        self.assertTrue(math.isnan(self.production_audio_in_stream.capture_time))
+
+        self.audio_stream_instance_mock.get_read_available.return_value = QUEUED_FRAMES
+
+        with patch('libraries.audio_in_stream.time.monotonic', return_value=READ_TIME):
+            self.production_audio_in_stream.read(10)
+
+        # The frames still queued after the read were captured after the chunk.
+        self.assertAlmostEqual(self.production_audio_in_stream.capture_time, READ_TIME - 0.1)
 
     def test_read_when_input_device_not_found(self):
         self.audio_stream_instance_mock.read.side_effect = OSError()
@@ -125,3 +168,492 @@ class TestAudioInStreamAfterCallingOpen(AudioInStreamTestCase):
         with self.assertRaises(OSError):
             NUMBER_OF_FRAMES = 10
             self.production_audio_in_stream.read(NUMBER_OF_FRAMES)
+
+
+class TestDeviceOptions(AudioInStreamTestCase):
+    DEVICE_INFOS = [{'index': 0, 'name': 'Speakers', 'defaultSampleRate': 48000, 'maxInputChannels': 0},
+                    {'index': 1, 'name': 'USB Microphone', 'defaultSampleRate': 48000, 'maxInputChannels': 1}]
+
+    def setUp(self):
+        super().setUp()
+
+        self.pyaudio_instance_mock.get_device_count.return_value = len(self.DEVICE_INFOS)
+        self.pyaudio_instance_mock.get_device_info_by_index.side_effect = lambda index: self.DEVICE_INFOS[index]
+
+    def test_device_by_index(self):
+        production_audio_in_stream = ProductionAudioInStream(device=1)
+        production_audio_in_stream.open()
+
+        self.assertEqual(self.pyaudio_instance_mock.open.call_args.kwargs['input_device_index'], 1)
+        self.assertEqual(production_audio_in_stream.sample_rate, 48000)
+        self.assertEqual(production_audio_in_stream.number_of_channels, 1)
+        self.assertEqual(production_audio_in_stream.input_source, 'USB Microphone')
+
+    def test_device_by_name(self):
+        ProductionAudioInStream(device='usb').open()
+
+        self.assertEqual(self.pyaudio_instance_mock.open.call_args.kwargs['input_device_index'], 1)
+
+    def test_device_by_name_skips_output_devices(self):
+        with self.assertRaises(OSError):
+            ProductionAudioInStream(device='Speakers').open()
+
+    def test_read_error_names_the_device(self):
+        self.audio_stream_instance_mock.read.side_effect = OSError()
+
+        for device, description in ((None, 'the default input device'), (1, 'the input device with index 1'),
+                                    ('usb', 'the input device whose name contains "usb"')):
+            with self.subTest(device=device):
+                production_audio_in_stream = ProductionAudioInStream(device=device)
+                production_audio_in_stream.open()
+
+                with self.assertRaisesRegex(OSError, f'^Could not read from {description}.$'):
+                    production_audio_in_stream.read(10)
+
+    def test_default_device(self):
+        self.production_audio_in_stream.open()
+
+        self.assertIsNone(self.pyaudio_instance_mock.open.call_args.kwargs['input_device_index'])
+
+    def test_sample_rate_format_and_frames_per_buffer(self):
+        SAMPLE_RATE = 22050
+        NUMBER_OF_CHANNELS = 1
+        FRAMES_PER_BUFFER = 256
+
+        production_audio_in_stream = ProductionAudioInStream(sample_rate=SAMPLE_RATE, number_of_channels=NUMBER_OF_CHANNELS,
+                                                             sample_format=FLOAT32_FORMAT, frames_per_buffer=FRAMES_PER_BUFFER)
+        production_audio_in_stream.open()
+
+        self.pyaudio_instance_mock.open.assert_called_once_with(SAMPLE_RATE, NUMBER_OF_CHANNELS, paFloat32, True, input_device_index=None,
+                                                                frames_per_buffer=FRAMES_PER_BUFFER)
+        self.assertEqual(production_audio_in_stream.sample_rate, SAMPLE_RATE)
+
+    def test_read_float32(self):
+        FLOAT_SAMPLES = numpy.array([[0.5, -0.5], [1, -1]], dtype=numpy.float32)
+
+        production_audio_in_stream = ProductionAudioInStream(sample_format=FLOAT32_FORMAT)
+        production_audio_in_stream.open()
+
+        self.audio_stream_instance_mock.read.return_value = FLOAT_SAMPLES.tobytes()
+
+        numpy.testing.assert_array_almost_equal(production_audio_in_stream.read(2), FLOAT_SAMPLES * 32767)
+
+    def test_invalid_sample_format(self):
+        with self.assertRaises(ValueError):
+            ProductionAudioInStream(sample_format='int24')
+
+
+class TestRealtimeBlockingCapture(AudioInStreamTestCase):
+    NUMBER_OF_FRAMES = 441
+    MAXIMUM_LATENCY_SECONDS = 0.1
+    MAXIMUM_QUEUED_FRAMES = 4410
+
+    def setUp(self):
+        super().setUp()
+
+        self.production_audio_in_stream = ProductionAudioInStream(maximum_latency_seconds=self.MAXIMUM_LATENCY_SECONDS)
+        self.production_audio_in_stream.open()
+
+    def test_invalid_maximum_latency_seconds(self):
+        with self.assertRaises(ValueError):
+            ProductionAudioInStream(maximum_latency_seconds=-1)
+
+    def test_read_within_latency(self):
+        self.audio_stream_instance_mock.get_read_available.return_value = self.NUMBER_OF_FRAMES + self.MAXIMUM_QUEUED_FRAMES
+
+        self.production_audio_in_stream.read(self.NUMBER_OF_FRAMES)
+
+        self.assertEqual(self.audio_stream_instance_mock.read.call_args_list, [call(self.NUMBER_OF_FRAMES)])
+        self.assertEqual(self.production_audio_in_stream.dropped_frames, 0)
+
+    def test_read_drops_stale_frames(self):
+        STALE_FRAMES = 1000
+
+        self.audio_stream_instance_mock.get_read_available.return_value = self.NUMBER_OF_FRAMES + self.MAXIMUM_QUEUED_FRAMES + STALE_FRAMES
+
+        self.production_audio_in_stream.read(self.NUMBER_OF_FRAMES)
+        self.production_audio_in_stream.read(self.NUMBER_OF_FRAMES)
+
+        self.assertEqual(self.audio_stream_instance_mock.read.call_args_list,
+                         [call(STALE_FRAMES, exception_on_overflow=False), call(self.NUMBER_OF_FRAMES),
+                          call(STALE_FRAMES, exception_on_overflow=False), call(self.NUMBER_OF_FRAMES)])
+        self.assertEqual(self.production_audio_in_stream.dropped_frames, 2 * STALE_FRAMES)
+
+
+class TestCallbackCapture(AudioInStreamTestCase):
+    NUMBER_OF_FRAMES = 4
+
+    def setUp(self):
+        super().setUp()
+
+        self.production_audio_in_stream = ProductionAudioInStream(CALLBACK_CAPTURE)
+        self.production_audio_in_stream.open()
+
+        self.on_audio = self.pyaudio_instance_mock.open.call_args.kwargs['stream_callback']
+
+    def capture(self, start: int, stop: int) -> numpy.ndarray:
+        SAMPLES = numpy.repeat(numpy.arange(start, stop, dtype=numpy.int16), self.NUMBER_OF_CHANNELS).reshape(-1, self.NUMBER_OF_CHANNELS)
+
+        self.assertEqual(self.on_audio(SAMPLES.tobytes(), stop - start, {}, 0), (None, paContinue))
+
+        return SAMPLES
+
+    def test_invalid_capture_mode(self):
+        with self.assertRaises(ValueError):
+            ProductionAudioInStream('invalid')
+
+    def test_read(self):
+        FIRST_CHUNK = self.capture(0, self.NUMBER_OF_FRAMES)
+        SECOND_CHUNK = self.capture(self.NUMBER_OF_FRAMES, 2 * self.NUMBER_OF_FRAMES)
+
+        numpy.testing.assert_array_equal(self.production_audio_in_stream.read(self.NUMBER_OF_FRAMES), FIRST_CHUNK)
+        numpy.testing.assert_array_equal(self.production_audio_in_stream.read(self.NUMBER_OF_FRAMES), SECOND_CHUNK)
+
+        self.audio_stream_instance_mock.read.assert_not_called()
+
+    def test_read_when_stream_stopped(self):
+        self.audio_stream_instance_mock.is_active.return_value = False
+
+        with self.assertRaises(OSError):
+            self.production_audio_in_stream.read(self.NUMBER_OF_FRAMES)
+
+    def test_read_after_frames_were_overwritten(self):
+        BUFFER_FRAMES = 2 * self.FRAME_RATE
+
+        self.capture(0, BUFFER_FRAMES + self.NUMBER_OF_FRAMES)
+        SAMPLES = self.production_audio_in_stream.read(self.NUMBER_OF_FRAMES)
+
+        numpy.testing.assert_array_equal(SAMPLES[:, 0],
+                                         numpy.arange(self.NUMBER_OF_FRAMES, 2 * self.NUMBER_OF_FRAMES))
+        self.assertEqual(self.production_audio_in_stream.dropped_frames, self.NUMBER_OF_FRAMES)
+
+    def test_realtime_read_skips_to_newest_frames(self):
+        MAXIMUM_LATENCY_SECONDS = 0.001
+        MAXIMUM_QUEUED_FRAMES = 44
+        CAPTURED_FRAMES = 1000
+
+        self.production_audio_in_stream = ProductionAudioInStream(CALLBACK_CAPTURE, maximum_latency_seconds=MAXIMUM_LATENCY_SECONDS)
+        self.production_audio_in_stream.open()
+        self.on_audio = self.pyaudio_instance_mock.open.call_args.kwargs['stream_callback']
+
+        self.capture(0, CAPTURED_FRAMES)
+        SAMPLES = self.production_audio_in_stream.read(self.NUMBER_OF_FRAMES)
+
+        FIRST_FRAME = CAPTURED_FRAMES - MAXIMUM_QUEUED_FRAMES - self.NUMBER_OF_FRAMES
+
+        numpy.testing.assert_array_equal(SAMPLES[:, 0],
+                                         numpy.arange(FIRST_FRAME, FIRST_FRAME + self.NUMBER_OF_FRAMES))
+        self.assertEqual(self.production_audio_in_stream.dropped_frames, FIRST_FRAME)
+
+    def test_capture_time(self):
+        CALLBACK_TIME = 100.0
+
+        with patch('libraries.audio_in_stream.time.monotonic', return_value=CALLBACK_TIME):
+            self.capture(0, 3 * self.NUMBER_OF_FRAMES)
+            self.production_audio_in_stream.read(self.NUMBER_OF_FRAMES)
+
+        # The last frame read was captured 2 chunks before the end of the callback's buffer.
+        self.assertAlmostEqual(self.production_audio_in_stream.capture_time,
+                               CALLBACK_TIME - 2 * self.NUMBER_OF_FRAMES / self.FRAME_RATE)
+
+    def test_get_latest_samples(self):
+        self.capture(0, 3 * self.NUMBER_OF_FRAMES)
+
+        SAMPLES = self.production_audio_in_stream.get_latest_samples(self.NUMBER_OF_FRAMES)
+
+        self.assertEqual(SAMPLES.shape, (self.NUMBER_OF_FRAMES, self.NUMBER_OF_CHANNELS))
+        numpy.testing.assert_array_equal(SAMPLES[:, 0], numpy.arange(2 * self.NUMBER_OF_FRAMES, 3 * self.NUMBER_OF_FRAMES))
+
+    def test_get_latest_samples_in_blocking_capture(self):
+        with self.assertRaises(ValueError):
+            ProductionAudioInStream().get_latest_samples(self.NUMBER_OF_FRAMES)
+
+
+class WavFileAudioInStreamTestCase(unittest.TestCase):
+    SAMPLE_RATE = 8000
+    NUMBER_OF_CHANNELS = 2
+    NUMBER_OF_FRAMES = 10
+
+    def setUp(self):
+        TEMPORARY_DIRECTORY = tempfile.TemporaryDirectory()
+        self.addCleanup(TEMPORARY_DIRECTORY.cleanup)
+
+        self.path = os.path.join(TEMPORARY_DIRECTORY.name, 'audio.wav')
+        self.samples = numpy.stack((numpy.arange(self.NUMBER_OF_FRAMES), -numpy.arange(self.NUMBER_OF_FRAMES)), axis=1).astype(numpy.int16)
+
+        self.write_wav(self.path, self.samples)
+
+        self.wav_file_audio_in_stream = WavFileAudioInStream(self.path, realtime=False)
+        self.addCleanup(self.wav_file_audio_in_stream.close)
+
+    def write_wav(self, path: str, samples: numpy.ndarray, sample_width: int = 2):
+        with wave.open(path, 'wb') as wav_file:
+            wav_file.setnchannels(samples.shape[1])
+            wav_file.setsampwidth(sample_width)
+            wav_file.setframerate(self.SAMPLE_RATE)
+            wav_file.writeframes(samples.tobytes())
+
+
+class TestWavFileAudioInStream(WavFileAudioInStreamTestCase):
+    def test_read_when_open_was_not_called(self):
+        with self.assertRaises(ValueError):
+            self.wav_file_audio_in_stream.read(self.NUMBER_OF_FRAMES)
+
+    def test_open(self):
+        self.wav_file_audio_in_stream.open()
+
+        self.assertTrue(self.wav_file_audio_in_stream.is_open())
+        self.assertEqual(self.wav_file_audio_in_stream.sample_rate, self.SAMPLE_RATE)
+        self.assertEqual(self.wav_file_audio_in_stream.number_of_channels, self.NUMBER_OF_CHANNELS)
+        self.assertEqual(self.wav_file_audio_in_stream.input_source, self.path)
+
+    def test_open_with_the_file_format(self):
+        wav_file_audio_in_stream = WavFileAudioInStream(self.path, realtime=False, sample_rate=self.SAMPLE_RATE,
+                                                        number_of_channels=self.NUMBER_OF_CHANNELS)
+        wav_file_audio_in_stream.open()
+
+        self.assertTrue(wav_file_audio_in_stream.is_open())
+
+    def test_open_with_another_format(self):
+        for wav_format in ({'sample_rate': 2 * self.SAMPLE_RATE}, {'number_of_channels': 1}):
+            with self.subTest(**wav_format):
+                wav_file_audio_in_stream = WavFileAudioInStream(self.path, realtime=False, **wav_format)
+
+                with self.assertRaises(ValueError):
+                    wav_file_audio_in_stream.open()
+
+                self.assertFalse(wav_file_audio_in_stream.is_open())
+
+    def test_open_when_not_16_bit_pcm(self):
+        self.write_wav(self.path, self.samples.astype(numpy.uint8), sample_width=1)
+
+        with self.assertRaises(ValueError):
+            self.wav_file_audio_in_stream.open()
+
+    def test_close(self):
+        self.wav_file_audio_in_stream.open()
+        self.wav_file_audio_in_stream.close()
+
+        self.assertFalse(self.wav_file_audio_in_stream.is_open())
+
+    def test_read(self):
+        self.wav_file_audio_in_stream.open()
+
+        FIRST_SAMPLES = self.wav_file_audio_in_stream.read(4)
+        SECOND_SAMPLES = self.wav_file_audio_in_stream.read(6)
+
+        numpy.testing.assert_array_equal(FIRST_SAMPLES, self.samples[:4])
+        numpy.testing.assert_array_equal(SECOND_SAMPLES, self.samples[4:])
+        self.assertIsInstance(FIRST_SAMPLES, numpy.memmap)
+
+    def test_read_at_end_of_file(self):
+        self.wav_file_audio_in_stream.open()
+        self.wav_file_audio_in_stream.read(self.NUMBER_OF_FRAMES)
+
+        with self.assertRaises(EOFError):
+            self.wav_file_audio_in_stream.read(1)
+
+    def test_read_with_loop(self):
+        self.wav_file_audio_in_stream = WavFileAudioInStream(self.path, realtime=False, loop=True)
+        self.wav_file_audio_in_stream.open()
+        self.wav_file_audio_in_stream.read(6)
+
+        numpy.testing.assert_array_equal(self.wav_file_audio_in_stream.read(8), self.samples[numpy.arange(6, 14) % self.NUMBER_OF_FRAMES])
+
+    def test_read_in_realtime(self):
+        self.wav_file_audio_in_stream = WavFileAudioInStream(self.path)
+
+        # The clock stands still, so the whole chunk is waited for however long the test takes.
+        with patch('libraries.audio_in_stream.time.monotonic', return_value=100.0), patch('libraries.audio_in_stream.time.sleep') as sleep_mock:
+            self.wav_file_audio_in_stream.open()
+            self.wav_file_audio_in_stream.read(self.NUMBER_OF_FRAMES)
+
+        sleep_mock.assert_called_once()
+        self.assertAlmostEqual(sleep_mock.call_args.args[0], self.NUMBER_OF_FRAMES / self.SAMPLE_RATE)
+
+    def test_capture_time_in_realtime(self):
+        START_TIME = 100.0
+
+        self.wav_file_audio_in_stream = WavFileAudioInStream(self.path)
+
+        with patch('libraries.audio_in_stream.time.monotonic', return_value=START_TIME), patch('libraries.audio_in_stream.time.sleep'):
+            self.wav_file_audio_in_stream.open()
+            self.wav_file_audio_in_stream.read(4)
+
+        # When the chunk's last frame would have been captured live.
+        self.assertAlmostEqual(self.wav_file_audio_in_stream.capture_time, START_TIME + 4 / self.SAMPLE_RATE)
+
+
+class TestSignalGeneratorAudioInStream(unittest.TestCase):
+    SAMPLE_RATE = 8000
+    NUMBER_OF_CHANNELS = 2
+    NUMBER_OF_FRAMES = 8000
+
+    def open(self, signal: str, **kwargs) -> SignalGeneratorAudioInStream:
+        signal_generator_audio_in_stream = SignalGeneratorAudioInStream(signal, self.SAMPLE_RATE, self.NUMBER_OF_CHANNELS, **kwargs)
+        signal_generator_audio_in_stream.open()
+
+        return signal_generator_audio_in_stream
+
+    def get_peak_frequency(self, samples: numpy.ndarray) -> float:
+        SPECTRUM = numpy.abs(numpy.fft.rfft(samples[:, 0]))
+
+        return numpy.fft.rfftfreq(len(samples), 1 / self.SAMPLE_RATE)[numpy.argmax(SPECTRUM)]
+
+    def test_invalid_signal(self):
+        with self.assertRaises(ValueError):
+            SignalGeneratorAudioInStream('invalid')
+
+    def test_read_when_open_was_not_called(self):
+        with self.assertRaises(ValueError):
+            SignalGeneratorAudioInStream(TONES_SIGNAL).read(self.NUMBER_OF_FRAMES)
+
+    def test_tones(self):
+        FREQUENCY = 1000
+        AMPLITUDE = 0.5
+
+        SAMPLES = self.open(TONES_SIGNAL, frequencies=(FREQUENCY,), amplitude=AMPLITUDE).read(self.NUMBER_OF_FRAMES)
+
+        self.assertEqual(SAMPLES.shape, (self.NUMBER_OF_FRAMES, self.NUMBER_OF_CHANNELS))
+        self.assertEqual(SAMPLES.dtype, numpy.int16)
+        numpy.testing.assert_array_equal(SAMPLES[:, 0], SAMPLES[:, 1])
+        self.assertEqual(self.get_peak_frequency(SAMPLES), FREQUENCY)
+        self.assertAlmostEqual(SAMPLES.max() / 32767, AMPLITUDE, places=3)
+
+    def test_chunks_are_continuous(self):
+        signal_generator_audio_in_stream = self.open(TONES_SIGNAL, frequencies=(440, 1000))
+        SAMPLES = numpy.concatenate([signal_generator_audio_in_stream.read(self.NUMBER_OF_FRAMES // 4) for _ in range(4)])
+
+        numpy.testing.assert_array_equal(SAMPLES, self.open(TONES_SIGNAL, frequencies=(440, 1000)).read(self.NUMBER_OF_FRAMES))
+
+    def test_sweep(self):
+        signal_generator_audio_in_stream = self.open(SWEEP_SIGNAL, frequencies=(100, 3000), sweep_seconds=2)
+
+        FIRST_HALF = signal_generator_audio_in_stream.read(self.NUMBER_OF_FRAMES)
+        SECOND_HALF = signal_generator_audio_in_stream.read(self.NUMBER_OF_FRAMES)
+
+        self.assertLess(self.get_peak_frequency(FIRST_HALF), self.get_peak_frequency(SECOND_HALF))
+
+    def test_pink_noise_is_deterministic(self):
+        numpy.testing.assert_array_equal(self.open(PINK_NOISE_SIGNAL, seed=1).read(self.NUMBER_OF_FRAMES),
+                                         self.open(PINK_NOISE_SIGNAL, seed=1).read(self.NUMBER_OF_FRAMES))
+
+    def test_pink_noise_loses_power_at_higher_frequencies(self):
+        signal_generator_audio_in_stream = self.open(PINK_NOISE_SIGNAL, amplitude=0.1)
+        SAMPLES = numpy.concatenate([signal_generator_audio_in_stream.read(1000) for _ in range(40)])[:, 0].astype(numpy.float64)
+
+        POWERS = numpy.abs(numpy.fft.rfft(SAMPLES)) ** 2
+        FREQUENCIES = numpy.fft.rfftfreq(len(SAMPLES), 1 / self.SAMPLE_RATE)
+
+        LOW_POWER = POWERS[(FREQUENCIES >= 100) & (FREQUENCIES < 200)].mean()
+        HIGH_POWER = POWERS[(FREQUENCIES >= 1600) & (FREQUENCIES < 3200)].mean()
+
+        # Pink noise falls by 3 dB per octave, i.e. 12 dB over these 4 octaves.
+        self.assertAlmostEqual(10 * numpy.log10(LOW_POWER / HIGH_POWER), 12, delta=2)
+
+    def test_impulses(self):
+        SAMPLES = self.open(IMPULSE_SIGNAL, impulses_per_second=4).read(self.NUMBER_OF_FRAMES)
+
+        numpy.testing.assert_array_equal(numpy.nonzero(SAMPLES[:, 0])[0], [0, 2000, 4000, 6000])
+
+
+class PcmAudioInStreamTestCase(unittest.TestCase):
+    SAMPLE_RATE = 8000
+    NUMBER_OF_CHANNELS = 2
+    NUMBER_OF_FRAMES = 10
+
+    def setUp(self):
+        TEMPORARY_DIRECTORY = tempfile.TemporaryDirectory()
+        self.addCleanup(TEMPORARY_DIRECTORY.cleanup)
+
+        self.directory = TEMPORARY_DIRECTORY.name
+        self.samples = numpy.stack((numpy.arange(self.NUMBER_OF_FRAMES), -numpy.arange(self.NUMBER_OF_FRAMES)), axis=1).astype(numpy.int16)
+
+    def open(self, source: str, sample_format: str = INT16_FORMAT) -> PcmAudioInStream:
+        pcm_audio_in_stream = PcmAudioInStream(source, self.SAMPLE_RATE, self.NUMBER_OF_CHANNELS, sample_format)
+        pcm_audio_in_stream.open()
+        self.addCleanup(pcm_audio_in_stream.close)
+
+        return pcm_audio_in_stream
+
+    def write_file(self, data: bytes) -> str:
+        PATH = os.path.join(self.directory, 'audio.pcm')
+
+        with open(PATH, 'wb') as file:
+            file.write(data)
+
+        return PATH
+
+
+class TestPcmAudioInStream(PcmAudioInStreamTestCase):
+    def test_invalid_sample_format(self):
+        with self.assertRaises(ValueError):
+            PcmAudioInStream(STDIN_SOURCE, self.SAMPLE_RATE, self.NUMBER_OF_CHANNELS, 'int24')
+
+    def test_read_when_open_was_not_called(self):
+        with self.assertRaises(ValueError):
+            PcmAudioInStream(STDIN_SOURCE, self.SAMPLE_RATE, self.NUMBER_OF_CHANNELS).read(self.NUMBER_OF_FRAMES)
+
+    def test_read(self):
+        pcm_audio_in_stream = self.open(self.write_file(self.samples.tobytes()))
+
+        self.assertTrue(pcm_audio_in_stream.is_open())
+        numpy.testing.assert_array_equal(pcm_audio_in_stream.read(4), self.samples[:4])
+        numpy.testing.assert_array_equal(pcm_audio_in_stream.read(6), self.samples[4:])
+
+    def test_read_at_end_of_source(self):
+        pcm_audio_in_stream = self.open(self.write_file(self.samples.tobytes()))
+        pcm_audio_in_stream.read(self.NUMBER_OF_FRAMES)
+
+        with self.assertRaises(EOFError):
+            pcm_audio_in_stream.read(1)
+
+    def test_read_float32(self):
+        FLOAT_SAMPLES = numpy.array([[0.5, -0.5], [1, -1]], dtype=numpy.float32)
+
+        SAMPLES = self.open(self.write_file(FLOAT_SAMPLES.tobytes()), FLOAT32_FORMAT).read(2)
+
+        numpy.testing.assert_array_almost_equal(SAMPLES, FLOAT_SAMPLES * 32767)
+
+    def test_capture_time(self):
+        CAPTURE_TIME = 100.0
+
+        pcm_audio_in_stream = self.open(self.write_file(self.samples.tobytes()))
+
+        with patch('libraries.audio_in_stream.time.monotonic', return_value=CAPTURE_TIME):
+            pcm_audio_in_stream.read(self.NUMBER_OF_FRAMES)
+
+        self.assertEqual(pcm_audio_in_stream.capture_time, CAPTURE_TIME)
+
+    def test_read_from_unix_socket_in_pieces(self):
+        PATH = os.path.join(self.directory, 'audio.sock')
+
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.addCleanup(server.close)
+        server.bind(PATH)
+        server.listen(1)
+
+        pcm_audio_in_stream = self.open(UNIX_SOCKET_PREFIX + PATH)
+
+        connection, _ = server.accept()
+        self.addCleanup(connection.close)
+
+        DATA = self.samples.tobytes()
+
+        def send_in_pieces():
+            for i in range(0, len(DATA), 3):
+                connection.sendall(DATA[i:i + 3])
+
+        sender = threading.Thread(target=send_in_pieces)
+        sender.start()
+
+        SAMPLES = pcm_audio_in_stream.read(self.NUMBER_OF_FRAMES)
+        sender.join()
+
+        numpy.testing.assert_array_equal(SAMPLES, self.samples)
+
+    def test_read_from_stdin(self):
+        PATH = self.write_file(self.samples.tobytes())
+
+        with open(PATH, 'rb') as file, patch('libraries.audio_in_stream.sys.stdin', file):
+            numpy.testing.assert_array_equal(self.open(STDIN_SOURCE).read(self.NUMBER_OF_FRAMES), self.samples)
@@ -0,0 +1,79 @@
+import unittest
+
+import numpy
+from libraries.ring_buffer import RingBuffer
+
+
+class RingBufferTestCase(unittest.TestCase):
+    NUMBER_OF_FRAMES = 8
+    NUMBER_OF_CHANNELS = 2
+
+    def setUp(self):
+        self.ring_buffer = RingBuffer(self.NUMBER_OF_FRAMES, self.NUMBER_OF_CHANNELS)
+
+    def write_frames(self, start: int, stop: int):
+        FRAMES = numpy.repeat(numpy.arange(start, stop, dtype=numpy.int16), self.NUMBER_OF_CHANNELS)
+        self.ring_buffer.write(FRAMES.tobytes())
+
+    def assert_frames(self, frames: numpy.ndarray, start: int, stop: int):
+        EXPECTED_FRAMES = numpy.repeat(numpy.arange(start, stop, dtype=numpy.int16), self.NUMBER_OF_CHANNELS).reshape(-1, self.NUMBER_OF_CHANNELS)
+
+        numpy.testing.assert_array_equal(frames, EXPECTED_FRAMES)
+
+
+class TestInit(RingBufferTestCase):
+    def test_invalid_number_of_frames(self):
+        with self.assertRaises(ValueError):
+            RingBuffer(0)
+
+    def test_invalid_number_of_channels(self):
+        with self.assertRaises(ValueError):
+            RingBuffer(self.NUMBER_OF_FRAMES, 0)
+
+
+class TestWrite(RingBufferTestCase):
+    def test_frames_written(self):
+        self.write_frames(0, 5)
+        self.write_frames(5, 7)
+
+        self.assertEqual(self.ring_buffer.frames_written, 7)
+
+    def test_wraps_around(self):
+        self.write_frames(0, 5)
+        self.write_frames(5, 11)
+
+        self.assert_frames(self.ring_buffer.get_latest_frames(self.NUMBER_OF_FRAMES), 3, 11)
+
+    def test_more_frames_than_capacity(self):
+        self.write_frames(0, 3)
+        self.write_frames(3, 23)
+
+        self.assertEqual(self.ring_buffer.frames_written, 23)
+        self.assert_frames(self.ring_buffer.get_latest_frames(self.NUMBER_OF_FRAMES), 15, 23)
+
+
+class TestGetFrames(RingBufferTestCase):
+    def test_is_a_view(self):
+        self.write_frames(0, 10)
+
+        FRAMES = self.ring_buffer.get_frames(4, 6)
+
+        self.assertFalse(FRAMES.flags.owndata)
+        self.assert_frames(FRAMES, 4, 10)
+
+    def test_overwritten_frames(self):
+        self.write_frames(0, 10)
+
+        with self.assertRaises(ValueError):
+            self.ring_buffer.get_frames(1, 2)
+
+    def test_frames_not_written_yet(self):
+        self.write_frames(0, 4)
+
+        with self.assertRaises(ValueError):
+            self.ring_buffer.get_frames(2, 3)
+
+    def test_latest_frames_before_buffer_is_full(self):
+        self.write_frames(0, 3)
+
+        self.assert_frames(self.ring_buffer.get_latest_frames(self.NUMBER_OF_FRAMES), 0, 3)
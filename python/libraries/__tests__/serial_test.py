@@ -1,8 +1,9 @@
 import unittest
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock, call, patch
 
 import libraries.serial
-from libraries.serial import EIGHTBITS, INIT_SERIAL_MESSAGE, PARITY_NONE, STOPBITS_ONE_POINT_FIVE, ProductionSerial, SerialException
+from libraries.serial import (EIGHTBITS, INIT_SERIAL_MESSAGE, PARITY_NONE, PROTOCOL_VERSION, PROTOCOL_VERSION_1, STOPBITS_ONE_POINT_FIVE,
+                              ProductionSerial, SerialException)
 
 libraries.serial.SERIAL_INIT_DELAY = 0
 
@@ -30,13 +31,51 @@ class TestOpen(SerialTestCase):
         NUMBER_OF_BYTES = 2
         BYTE_ORDER = 'little'
 
-        self.serial_instance_mock.read.return_value = NUMBER_OF_LEDS.to_bytes(NUMBER_OF_BYTES, BYTE_ORDER)
+        self.serial_instance_mock.read.side_effect = [NUMBER_OF_LEDS.to_bytes(NUMBER_OF_BYTES, BYTE_ORDER), bytes([PROTOCOL_VERSION])]
 
         self.production_serial.open(self.PORT, self.BAUD_RATE, PARITY_NONE, STOPBITS_ONE_POINT_FIVE,
                                     EIGHTBITS, self.READ_TIMEOUT, self.WRITE_TIMEOUT)
 
-        self.serial_instance_mock.write.assert_called_once_with(INIT_SERIAL_MESSAGE)
+        self.assertEqual(self.serial_instance_mock.write.call_args_list, [call(INIT_SERIAL_MESSAGE), call(bytes([PROTOCOL_VERSION]))])
         self.assertEqual(self.production_serial.number_of_leds, NUMBER_OF_LEDS)
+        self.assertEqual(self.production_serial.protocol_version, PROTOCOL_VERSION)
+
+    def test_open_with_older_controller(self):
+        NUMBER_OF_LEDS = 100
+        NUMBER_OF_BYTES = 2
+        BYTE_ORDER = 'little'
+
+        self.serial_instance_mock.read.side_effect = [NUMBER_OF_LEDS.to_bytes(NUMBER_OF_BYTES, BYTE_ORDER), bytes([PROTOCOL_VERSION_1])]
+
+        self.production_serial.open(self.PORT, self.BAUD_RATE, PARITY_NONE, STOPBITS_ONE_POINT_FIVE,
+                                    EIGHTBITS, self.READ_TIMEOUT, self.WRITE_TIMEOUT)
+
+        self.serial_instance_mock.write.assert_called_with(bytes([PROTOCOL_VERSION_1]))
+        self.assertEqual(self.production_serial.protocol_version, PROTOCOL_VERSION_1)
+
+    def test_open_with_newer_controller(self):
+        NUMBER_OF_LEDS = 100
+        NUMBER_OF_BYTES = 2
+        BYTE_ORDER = 'little'
+
+        self.serial_instance_mock.read.side_effect = [NUMBER_OF_LEDS.to_bytes(NUMBER_OF_BYTES, BYTE_ORDER), bytes([PROTOCOL_VERSION + 1])]
+
+        self.production_serial.open(self.PORT, self.BAUD_RATE, PARITY_NONE, STOPBITS_ONE_POINT_FIVE,
+                                    EIGHTBITS, self.READ_TIMEOUT, self.WRITE_TIMEOUT)
+
+        self.serial_instance_mock.write.assert_called_with(bytes([PROTOCOL_VERSION]))
+        self.assertEqual(self.production_serial.protocol_version, PROTOCOL_VERSION)
+
+    def test_open_with_invalid_protocol_version(self):
+        NUMBER_OF_LEDS = 100
+        NUMBER_OF_BYTES = 2
+        BYTE_ORDER = 'little'
+
+        self.serial_instance_mock.read.side_effect = [NUMBER_OF_LEDS.to_bytes(NUMBER_OF_BYTES, BYTE_ORDER), bytes([0])]
+
+        with self.assertRaises(SerialException):
+            self.production_serial.open(self.PORT, self.BAUD_RATE, PARITY_NONE, STOPBITS_ONE_POINT_FIVE,
+                                        EIGHTBITS, self.READ_TIMEOUT, self.WRITE_TIMEOUT)
 
     def test_open_but_connection_failed(self):
         self.serial_instance_mock.read.return_value = bytes()
@@ -51,6 +90,10 @@ class TestProductionSerialWhenConnectionIsClosed(SerialTestCase):
         with self.assertRaises(SerialException):
             self.production_serial.number_of_leds
 
+    def test_protocol_version(self):
+        with self.assertRaises(SerialException):
+            self.production_serial.protocol_version
+
     def test_read(self):
         with self.assertRaises(SerialException):
             NUMBER_OF_BYTES = 1
@@ -77,12 +120,12 @@ class TestProductionSerialWhenConnectionIsOpen(SerialTestCase):
 
         NUMBER_OF_BYTES = 2
         BYTE_ORDER = 'little'
-        self.serial_instance_mock.read.return_value = self.NUMBER_OF_LEDS.to_bytes(NUMBER_OF_BYTES, BYTE_ORDER)
+        self.serial_instance_mock.read.side_effect = [self.NUMBER_OF_LEDS.to_bytes(NUMBER_OF_BYTES, BYTE_ORDER), bytes([PROTOCOL_VERSION])]
 
         self.production_serial.open(self.PORT, self.BAUD_RATE, PARITY_NONE, STOPBITS_ONE_POINT_FIVE,
                                     EIGHTBITS, self.READ_TIMEOUT, self.WRITE_TIMEOUT)
 
-        self.serial_instance_mock.read.reset_mock()
+        self.serial_instance_mock.read.reset_mock(side_effect=True)
 
     def test_number_of_leds(self):
         ACTUAL_NUMBER_OF_LEDS = self.production_serial.number_of_leds
@@ -0,0 +1,400 @@
+import os
+import select
+import threading
+import time
+import tty
+from collections import deque
+from typing import Deque, List, Optional, Tuple
+
+import numpy
+
+# These mirror arduino/main: main.ino, packet_state.h and group_setup_state.h.
+INIT_SERIAL_MESSAGE_CODE = 0x00
+
+GROUP_SETUP_START_OF_MESSAGE_CODE = 0xFE
+GROUP_SETUP_END_OF_MESSAGE_CODE = 0xFF
+
+START_OF_MESSAGE_CODE = 0xFE
+FRAME_START_OF_MESSAGE_CODE = 0xFD
+PALETTE_START_OF_MESSAGE_CODE = 0xFC
+END_OF_MESSAGE_CODE = 0xFF
+
+PROTOCOL_VERSION = 2
+BYTES_PER_PIXEL = 3
+NUMBERS_PER_RUN = 3
+MAXIMUM_PALETTE_SIZE = 256
+BYTE_ORDER = 'little'
+
+POLL_SECONDS = 0.05
+
+
+class EmulatorClosed(Exception):
+    pass
+
+
+class ArduinoEmulator:
+    def __init__(self, number_of_leds: int = 300, protocol_version: int = PROTOCOL_VERSION, window_size: int = 64,
+                 bytes_per_acknowledgement: int = 16, bytes_per_second: Optional[float] = None, maximum_count: Optional[int] = None):
+        '''
+            Emulates the firmware in arduino/main behind a pseudo-terminal, so ProductionSerial can open `port` as if
+            it were a real controller. Covers the startup handshake (LED count, protocol version, window size), group
+            setup, sliding window acknowledgements and packet, frame & palette messages.
+
+            Args:
+                `number_of_leds (int, optional)`: The LED count reported to the host.
+                `protocol_version (int, optional)`: The newest protocol version the emulator claims to support.
+                `window_size (int, optional)`: The window size reported to the host.
+                `bytes_per_acknowledgement (int, optional)`: How many bytes are read between acknowledgements.
+                `bytes_per_second (float, optional)`: If given, reading is slowed down to this rate to emulate a
+                real baud rate.
+                `maximum_count (int, optional)`: If given, at most this many packets, palette colors or runs fit in a
+                message, to emulate a controller that ran out of RAM for larger ones.
+        '''
+        if (number_of_leds < 0 or number_of_leds > 0xFFFF):
+            raise ValueError(f'number_of_leds must be >= 0 and <= 65535, but was {number_of_leds}.')
+
+        if (window_size <= 0 or window_size > 255):
+            raise ValueError(f'window_size must be > 0 and <= 255, but was {window_size}.')
+
+        if (bytes_per_acknowledgement <= 0):
+            raise ValueError(f'bytes_per_acknowledgement must be > 0, but was {bytes_per_acknowledgement}.')
+
+        if (maximum_count is not None and maximum_count < 0):
+            raise ValueError(f'maximum_count must be >= 0, but was {maximum_count}.')
+
+        self.__number_of_leds = number_of_leds
+        self.__maximum_protocol_version = protocol_version
+        self.__window_size = window_size
+        self.__bytes_per_acknowledgement = bytes_per_acknowledgement
+        self.__bytes_per_second = bytes_per_second
+        self.__allocated_count = maximum_count
+
+        self.__lock = threading.Lock()
+        self.__led_colors = numpy.zeros((number_of_leds, BYTES_PER_PIXEL), dtype=numpy.uint8)
+        self.__group_led_ranges: List[List[Tuple[int, int]]] = []
+        self.__brightness: Optional[int] = None
+        self.__protocol_version: Optional[int] = None
+        self.__messages_received = 0
+        self.__check_sum_errors = 0
+
+        self.__buffer: Deque[int] = deque()
+        self.__bytes_read = 0
+        self.__bytes_acknowledged = 0
+
+        self.__closed = False
+        self.__error: Optional[Exception] = None
+
+        self.__master, self.__slave = os.openpty()
+        tty.setraw(self.__slave)
+
+        self.__port = os.ttyname(self.__slave)
+
+        self.__thread = threading.Thread(target=self.__run, daemon=True)
+        self.__thread.start()
+
+    @property
+    def port(self) -> str:
+        '''
+            Returns:
+                `str`: The pseudo-terminal to open as a serial port.
+        '''
+        return self.__port
+
+    @property
+    def protocol_version(self) -> Optional[int]:
+        '''
+            Returns:
+                `int | None`: The protocol version chosen by the host, or None before the handshake.
+        '''
+        with self.__lock:
+            return self.__protocol_version
+
+    @property
+    def brightness(self) -> Optional[int]:
+        with self.__lock:
+            return self.__brightness
+
+    @property
+    def group_led_ranges(self) -> List[List[Tuple[int, int]]]:
+        with self.__lock:
+            return [list(led_ranges) for led_ranges in self.__group_led_ranges]
+
+    @property
+    def messages_received(self) -> int:
+        '''
+            Returns:
+                `int`: The number of color messages (of any encoding) that were received intact.
+        '''
+        with self.__lock:
+            return self.__messages_received
+
+    @property
+    def check_sum_errors(self) -> int:
+        with self.__lock:
+            return self.__check_sum_errors
+
+    def get_led_colors(self) -> numpy.ndarray:
+        '''
+            Returns:
+                `numpy.ndarray`: The (red, green, blue) of every LED.
+        '''
+        with self.__lock:
+            return self.__led_colors.copy()
+
+    def close(self):
+        '''
+            Stops the emulator and closes the pseudo-terminal. Raises the error that stopped the emulator, if any.
+        '''
+        if (self.__closed):
+            return
+
+        self.__closed = True
+        self.__thread.join()
+
+        os.close(self.__master)
+        os.close(self.__slave)
+
+        if (self.__error is not None):
+            raise self.__error
+
+    def __run(self):
+        try:
+            self.__handshake()
+            self.__set_up_groups()
+
+            while True:
+                self.__read_message()
+
+        except EmulatorClosed:
+            pass
+
+        except Exception as error:
+            self.__error = error
+
+    def __handshake(self):
+        while (self.__read_raw() != INIT_SERIAL_MESSAGE_CODE):
+            pass
+
+        self.__write(self.__number_of_leds.to_bytes(2, BYTE_ORDER) + bytes((self.__maximum_protocol_version,)))
+
+        PROTOCOL_VERSION = self.__read_raw()
+
+        with self.__lock:
+            self.__protocol_version = PROTOCOL_VERSION
+
+        self.__bytes_per_number = 2 if (PROTOCOL_VERSION >= 2) else 1
+        self.__write(bytes((self.__window_size,)))
+
+    def __set_up_groups(self):
+        BRIGHTNESS = self.__read()
+        NUMBER_OF_GROUPS = self.__read_number()
+
+        while (self.__read() != GROUP_SETUP_START_OF_MESSAGE_CODE):
+            pass
+
+        group_led_ranges: List[List[Tuple[int, int]]] = []
+
+        for _ in range(NUMBER_OF_GROUPS):
+            NUMBER_OF_LED_RANGES = self.__read()
+            led_ranges: List[Tuple[int, int]] = []
+
+            for _ in range(NUMBER_OF_LED_RANGES):
+                RANGE_BYTES = bytes(self.__read() for _ in range(4))
+
+                if (self.__read() != (NUMBER_OF_LED_RANGES + sum(RANGE_BYTES)) % 256):
+                    raise ValueError('Received a group setup led range with an invalid check sum.')
+
+                led_ranges.append((int.from_bytes(RANGE_BYTES[:2], BYTE_ORDER), int.from_bytes(RANGE_BYTES[2:], BYTE_ORDER)))
+
+            if (NUMBER_OF_LED_RANGES == 0 and self.__read() != 0):
+                raise ValueError('Received an empty group setup with an invalid check sum.')
+
+            group_led_ranges.append(led_ranges)
+
+        if (self.__read() != GROUP_SETUP_END_OF_MESSAGE_CODE):
+            raise ValueError('The group setup message did not end with its end of message code.')
+
+        with self.__lock:
+            self.__brightness = BRIGHTNESS
+            self.__group_led_ranges = group_led_ranges
+
+        # Since protocol version 2, main.ino reports the maximum count once the group setup has been acknowledged.
+        if (self.__protocol_version >= 2 and NUMBER_OF_GROUPS > 0):
+            self.__acknowledge()
+            self.__write(self.__get_maximum_count().to_bytes(2, BYTE_ORDER))
+
+    def __read_message(self):
+        CODE = self.__read()
+
+        if (CODE == START_OF_MESSAGE_CODE):
+            self.__read_packet_message()
+
+        elif (CODE == FRAME_START_OF_MESSAGE_CODE):
+            self.__read_frame_message()
+
+        elif (CODE == PALETTE_START_OF_MESSAGE_CODE):
+            self.__read_palette_message()
+
+    def __get_maximum_count(self) -> int:
+        '''
+            Returns:
+                `int`: The most packets, palette colors or runs a message may have, as main.ino allocates for.
+        '''
+        MAXIMUM_COUNT = min(len(self.__group_led_ranges), self.__number_of_leds)
+
+        return MAXIMUM_COUNT if (self.__allocated_count is None) else min(MAXIMUM_COUNT, self.__allocated_count)
+
+    def __read_packet_message(self):
+        NUMBER_OF_PACKETS = self.__read_number()
+
+        if (NUMBER_OF_PACKETS > self.__get_maximum_count()):
+            self.__on_check_sum_error()
+            return
+
+        group_colors: List[Tuple[int, bytes]] = []
+
+        for _ in range(NUMBER_OF_PACKETS):
+            PACKET = bytes(self.__read() for _ in range(self.__bytes_per_number + BYTES_PER_PIXEL))
+
+            if (self.__read() != sum(PACKET) % 256):
+                self.__on_check_sum_error()
+                return
+
+            group_colors.append((int.from_bytes(PACKET[:self.__bytes_per_number], BYTE_ORDER), PACKET[self.__bytes_per_number:]))
+
+        if (self.__read() == END_OF_MESSAGE_CODE):
+            with self.__lock:
+                for group, color in group_colors:
+                    self.__set_group_color(group, color)
+
+                self.__messages_received += 1
+
+    def __read_frame_message(self):
+        HEADER = bytes(self.__read() for _ in range(4))
+        START_LED = int.from_bytes(HEADER[:2], BYTE_ORDER)
+        NUMBER_OF_LEDS = int.from_bytes(HEADER[2:], BYTE_ORDER)
+
+        if (START_LED + NUMBER_OF_LEDS > self.__number_of_leds):
+            self.__on_check_sum_error()
+            return
+
+        PIXELS = bytes(self.__read() for _ in range(BYTES_PER_PIXEL * NUMBER_OF_LEDS))
+
+        if (self.__read() != (sum(HEADER) + sum(PIXELS)) % 256):
+            self.__on_check_sum_error()
+            return
+
+        if (self.__read() == END_OF_MESSAGE_CODE):
+            with self.__lock:
+                self.__led_colors[START_LED:START_LED + NUMBER_OF_LEDS] = numpy.frombuffer(PIXELS, dtype=numpy.uint8).reshape(-1, BYTES_PER_PIXEL)
+                self.__messages_received += 1
+
+    def __read_palette_message(self):
+        check_sum = 0
+
+        def read_number() -> int:
+            nonlocal check_sum
+            NUMBER_BYTES = bytes(self.__read() for _ in range(self.__bytes_per_number))
+            check_sum += sum(NUMBER_BYTES)
+
+            return int.from_bytes(NUMBER_BYTES, BYTE_ORDER)
+
+        PALETTE_SIZE = read_number()
+
+        if (PALETTE_SIZE > min(self.__get_maximum_count(), MAXIMUM_PALETTE_SIZE)):
+            self.__on_check_sum_error()
+            return
+
+        PALETTE = bytes(self.__read() for _ in range(BYTES_PER_PIXEL * PALETTE_SIZE))
+        check_sum += sum(PALETTE)
+
+        NUMBER_OF_RUNS = read_number()
+
+        if (NUMBER_OF_RUNS > self.__get_maximum_count()):
+            self.__on_check_sum_error()
+            return
+
+        RUNS = [tuple(read_number() for _ in range(NUMBERS_PER_RUN)) for _ in range(NUMBER_OF_RUNS)]
+
+        if (self.__read() != check_sum % 256 or any(palette_index >= PALETTE_SIZE for _, _, palette_index in RUNS)):
+            self.__on_check_sum_error()
+            return
+
+        if (self.__read() == END_OF_MESSAGE_CODE):
+            with self.__lock:
+                for start_group, number_of_groups, palette_index in RUNS:
+                    COLOR = PALETTE[BYTES_PER_PIXEL * palette_index:BYTES_PER_PIXEL * (palette_index + 1)]
+
+                    for group in range(start_group, start_group + number_of_groups):
+                        self.__set_group_color(group, COLOR)
+
+                self.__messages_received += 1
+
+    def __set_group_color(self, group: int, color: bytes):
+        if (group >= len(self.__group_led_ranges)):
+            return
+
+        for start, end in self.__group_led_ranges[group]:
+            self.__led_colors[start:end] = tuple(color)
+
+    def __on_check_sum_error(self):
+        with self.__lock:
+            self.__check_sum_errors += 1
+
+    def __read_number(self) -> int:
+        return int.from_bytes(bytes(self.__read() for _ in range(self.__bytes_per_number)), BYTE_ORDER)
+
+    def __read(self) -> int:
+        '''
+            Reads one byte the way main.ino's SerialReader does: every `bytes_per_acknowledgement` bytes are
+            acknowledged, and whatever is left is acknowledged whenever there is nothing to read.
+        '''
+        if (len(self.__buffer) == 0):
+            self.__acknowledge()
+
+        BYTE = self.__read_raw()
+        self.__bytes_read += 1
+
+        if (self.__bytes_read - self.__bytes_acknowledged >= self.__bytes_per_acknowledgement):
+            self.__acknowledge()
+
+        return BYTE
+
+    def __read_raw(self) -> int:
+        while (len(self.__buffer) == 0):
+            if (self.__closed):
+                raise EmulatorClosed()
+
+            READABLE, _, _ = select.select([self.__master], [], [], POLL_SECONDS)
+
+            if (len(READABLE) > 0):
+                DATA = os.read(self.__master, 1024)
+                self.__buffer.extend(DATA)
+
+                if (self.__bytes_per_second is not None):
+                    time.sleep(len(DATA) / self.__bytes_per_second)
+
+        return self.__buffer.popleft()
+
+    def __acknowledge(self):
+        if (self.__bytes_read != self.__bytes_acknowledged):
+            self.__write(bytes((self.__bytes_read % 256,)))
+            self.__bytes_acknowledged = self.__bytes_read
+
+    def __write(self, data: bytes):
+        os.write(self.__master, data)
+
+
+if __name__ == '__main__':
+    emulator = ArduinoEmulator()
+    print(f'Emulating a controller on {emulator.port}. Press Ctrl+C to stop.')
+
+    try:
+        while True:
+            time.sleep(1)
+
+    except KeyboardInterrupt:
+        print(f'\n{emulator.messages_received} messages received, {emulator.check_sum_errors} check sum errors.')
+
+    finally:
+        emulator.close()
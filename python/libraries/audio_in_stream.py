@@ -1,6 +1,33 @@
+import math
+import os
+import socket
+import struct
+import sys
+import threading
+import time
 from abc import ABC, abstractmethod
+from typing import Optional, Sequence, Tuple, Union
 
-from pyaudio import PyAudio, paInt16
+import numpy
+from libraries.ring_buffer import RingBuffer
+from pyaudio import PyAudio, paContinue, paFloat32, paFramesPerBufferUnspecified, paInt16
+
+# BLOCKING_CAPTURE reads straight from PyAudio's stream; CALLBACK_CAPTURE has PyAudio's callback thread copy every
+# buffer into a RingBuffer, so audio keeps being captured while the caller is busy.
+BLOCKING_CAPTURE = 'blocking'
+CALLBACK_CAPTURE = 'callback'
+CAPTURE_MODES = (BLOCKING_CAPTURE, CALLBACK_CAPTURE)
+
+INT16_FORMAT = 'int16'
+FLOAT32_FORMAT = 'float32'
+SAMPLE_FORMATS = (INT16_FORMAT, FLOAT32_FORMAT)
+
+# Little endian, as produced by e.g. `ffmpeg -f s16le` or `-f f32le`.
+SAMPLE_FORMAT_DTYPES = {INT16_FORMAT: numpy.dtype('<i2'), FLOAT32_FORMAT: numpy.dtype('<f4')}
+PYAUDIO_SAMPLE_FORMATS = {INT16_FORMAT: paInt16, FLOAT32_FORMAT: paFloat32}
+
+# Float samples are scaled to the int16 range, so levels don't depend on the sample format.
+FLOAT_SAMPLE_SCALE = 32767
 
 
 class AudioInStream(ABC):
@@ -29,39 +56,199 @@ class AudioInStream(ABC):
     def close(self):
         pass
 
+    @property
     @abstractmethod
-    def read(self, number_of_frames: int) -> bytes:
-        pass
+    def number_of_channels(self) -> int:
+        '''
+            Returns:
+                `int`: The number of samples in each frame.
+        '''
+
+    @property
+    @abstractmethod
+    def dropped_frames(self) -> int:
+        '''
+            Returns:
+                `int`: The number of captured frames that were skipped rather than returned by `read`.
+        '''
+
+    @property
+    @abstractmethod
+    def capture_time(self) -> float:
+        '''
+            Returns:
+                `float`: The time.monotonic() at which the last frame returned by `read` was captured, so the latency of
+                everything done with that chunk can be measured; nan before the first read.
+        '''
+
+    @abstractmethod
+    def read(self, number_of_frames: int) -> numpy.ndarray:
+        '''
+            Returns:
+                `numpy.ndarray`: The next (number_of_frames, number_of_channels) samples; int16, or float32 on the
+                int16 scale.
+        '''
 
 
 class ProductionAudioInStream(AudioInStream):
+    def __init__(self, capture_mode: str = BLOCKING_CAPTURE, buffer_seconds: float = 2,
+                 maximum_latency_seconds: Optional[float] = None, device: Optional[Union[int, str]] = None,
+                 sample_rate: Optional[int] = None, number_of_channels: Optional[int] = None,
+                 sample_format: str = INT16_FORMAT, frames_per_buffer: Optional[int] = None):
+        '''
+            Args:
+                `capture_mode (str, optional)`: BLOCKING_CAPTURE or CALLBACK_CAPTURE.
+                `buffer_seconds (float, optional)`: How much of the most recent audio the ring buffer holds in
+                CALLBACK_CAPTURE.
+                `maximum_latency_seconds (float, optional)`: If given, `read` is realtime: whenever more than this much
+                audio would still be queued after a read, the oldest queued frames are dropped, so a caller that falls
+                behind catches up instead of lagging forever. If None, every captured frame is returned.
+                `device (int | str, optional)`: The input device's index, or part of its name. If None, the default
+                input device is used.
+                `sample_rate (int, optional)`: The sample rate to capture at; the device's default if None. A lower rate
+                makes every FFT proportionally cheaper when the bands don't need high frequencies.
+                `number_of_channels (int, optional)`: The number of channels to capture; all of the device's input
+                channels if None.
+                `sample_format (str, optional)`: INT16_FORMAT or FLOAT32_FORMAT. Float samples are scaled to the int16
+                range.
+                `frames_per_buffer (int, optional)`: How many frames PortAudio captures per buffer. Smaller buffers lower
+                latency; larger buffers wake the CPU less often. PortAudio picks if None.
+        '''
+        if (capture_mode not in CAPTURE_MODES):
+            raise ValueError(f'capture_mode must be one of {CAPTURE_MODES}, but was {capture_mode}.')
+
+        if (buffer_seconds <= 0):
+            raise ValueError(f'buffer_seconds must be > 0, but was {buffer_seconds}.')
+
+        if (maximum_latency_seconds is not None and maximum_latency_seconds < 0):
+            raise ValueError(f'maximum_latency_seconds must be >= 0, but was {maximum_latency_seconds}.')
+
+        if (sample_rate is not None and sample_rate <= 0):
+            raise ValueError(f'sample_rate must be > 0, but was {sample_rate}.')
+
+        if (number_of_channels is not None and number_of_channels <= 0):
+            raise ValueError(f'number_of_channels must be > 0, but was {number_of_channels}.')
+
+        if (sample_format not in SAMPLE_FORMATS):
+            raise ValueError(f'sample_format must be one of {SAMPLE_FORMATS}, but was {sample_format}.')
+
+        if (frames_per_buffer is not None and frames_per_buffer <= 0):
+            raise ValueError(f'frames_per_buffer must be > 0, but was {frames_per_buffer}.')
+
+        self.__capture_mode = capture_mode
+        self.__buffer_seconds = buffer_seconds
+        self.__maximum_latency_seconds = maximum_latency_seconds
+        self.__dropped_frames = 0
+        self.__capture_time = math.nan
+
+        self.__device = device
+        self.__requested_sample_rate = sample_rate
+        self.__requested_number_of_channels = number_of_channels
+        self.__sample_format = sample_format
+        self.__dtype = SAMPLE_FORMAT_DTYPES[sample_format]
+        self.__frames_per_buffer = paFramesPerBufferUnspecified if (frames_per_buffer is None) else frames_per_buffer
+
+        self.__frames_available = threading.Condition()
+
     def open(self):
-        try:
-            self.__pyaudio = PyAudio()
+        self.__pyaudio = PyAudio()
 
-            DEFAULT_INPUT_DEVICE_INFO = self.__pyaudio.get_default_input_device_info()
+        DEVICE_INFO = self.__get_device_info()
 
-            self.__sample_rate = int(DEFAULT_INPUT_DEVICE_INFO["defaultSampleRate"])
-            NUMBER_OF_CHANNELS = DEFAULT_INPUT_DEVICE_INFO["maxInputChannels"]
-            FORMAT = paInt16
-            INPUT = True
+        self.__sample_rate = int(DEVICE_INFO["defaultSampleRate"] if (self.__requested_sample_rate is None) else self.__requested_sample_rate)
+        self.__number_of_channels = int(DEVICE_INFO["maxInputChannels"] if (self.__requested_number_of_channels is None)
+                                        else self.__requested_number_of_channels)
+        FORMAT = PYAUDIO_SAMPLE_FORMATS[self.__sample_format]
+        INPUT = True
+        INPUT_DEVICE_INDEX = None if (self.__device is None) else DEVICE_INFO['index']  # None is PortAudio's default device
 
-            self.__audio_stream = self.__pyaudio.open(self.__sample_rate, NUMBER_OF_CHANNELS, FORMAT, INPUT)
+        if (self.__capture_mode == CALLBACK_CAPTURE):
+            self.__ring_buffer = RingBuffer(max(int(self.__sample_rate * self.__buffer_seconds), 1), self.__number_of_channels,
+                                            self.__dtype)
+            self.__read_position = 0
+            self.__latest_capture = (0, math.nan)  # (frames_written, time.monotonic()) after the latest callback
 
-        except OSError:
-            raise OSError("No default input device was found. Make sure your Operating System has a default input device set.")
+            self.__audio_stream = self.__pyaudio.open(self.__sample_rate, self.__number_of_channels, FORMAT, INPUT,
+                                                      input_device_index=INPUT_DEVICE_INDEX,
+                                                      frames_per_buffer=self.__frames_per_buffer, stream_callback=self.__on_audio)
+
+        else:
+            self.__audio_stream = self.__pyaudio.open(self.__sample_rate, self.__number_of_channels, FORMAT, INPUT,
+                                                      input_device_index=INPUT_DEVICE_INDEX,
+                                                      frames_per_buffer=self.__frames_per_buffer)
+
+    def __get_device_description(self) -> str:
+        if (self.__device is None):
+            return 'the default input device'
+
+        if (isinstance(self.__device, int)):
+            return f'the input device with index {self.__device}'
+
+        return f'the input device whose name contains "{self.__device}"'
+
+    def __get_device_info(self) -> dict:
+        if (self.__device is None):
+            try:
+                return self.__pyaudio.get_default_input_device_info()
+
+            except OSError:
+                raise OSError("No default input device was found. Make sure your Operating System has a default input device set.")
+
+        if (isinstance(self.__device, int)):
+            try:
+                return self.__pyaudio.get_device_info_by_index(self.__device)
+
+            except (OSError, ValueError):
+                raise OSError(f'No input device has index {self.__device}.')
+
+        for index in range(self.__pyaudio.get_device_count()):
+            DEVICE_INFO = self.__pyaudio.get_device_info_by_index(index)
+
+            if (DEVICE_INFO['maxInputChannels'] > 0 and self.__device.lower() in DEVICE_INFO['name'].lower()):
+                return DEVICE_INFO
+
+        raise OSError(f'No input device name contains "{self.__device}".')
+
+    def __on_audio(self, in_data, frame_count, time_info, status):
+        self.__ring_buffer.write(in_data)
+        self.__latest_capture = (self.__ring_buffer.frames_written, time.monotonic())
+
+        with self.__frames_available:
+            self.__frames_available.notify_all()
+
+        return (None, paContinue)
+
+    def get_latest_samples(self, number_of_frames: int) -> numpy.ndarray:
+        '''
+            Never blocks. Only available in CALLBACK_CAPTURE.
+
+            Args:
+                `number_of_frames (int)`: The number of frames; fewer are returned if fewer were captured so far.
+
+            Returns:
+                `numpy.ndarray`: A (frames, channels) int16 view of the most recently captured samples. The view is
+                overwritten once `buffer_seconds` of newer audio has been captured.
+        '''
+        try:
+            return self.__ring_buffer.get_latest_frames(number_of_frames)
+
+        except AttributeError:
+            raise ValueError('No Audio In Stream was established in CALLBACK_CAPTURE. Did you remember to call open?')
 
     @property
     def input_source(self):
         try:
-            DEFAULT_INPUT_DEVICE_INFO = self.__pyaudio.get_default_input_device_info()
+            DEVICE_INFO = self.__get_device_info()
 
-            return DEFAULT_INPUT_DEVICE_INFO['name']
+            return DEVICE_INFO['name']
 
         except AttributeError:
             raise ValueError('No Audio In Stream was established. Did you remember to call open?')
 
         except OSError:
+            if (self.__device is not None):
+                raise
+
             raise OSError("No default input device was found. Make sure your Operating System has a default input device set.")
 
     def is_open(self):
@@ -79,6 +266,22 @@ class ProductionAudioInStream(AudioInStream):
         except AttributeError:
             raise ValueError('No Audio In Stream was established. Did you remember to call open?')
 
+    @property
+    def number_of_channels(self):
+        try:
+            return self.__number_of_channels
+
+        except AttributeError:
+            raise ValueError('No Audio In Stream was established. Did you remember to call open?')
+
+    @property
+    def dropped_frames(self):
+        return self.__dropped_frames
+
+    @property
+    def capture_time(self):
+        return self.__capture_time
+
     def close(self):
         try:
             self.__pyaudio.terminate()
@@ -94,10 +297,562 @@ class ProductionAudioInStream(AudioInStream):
 
     def read(self, number_of_frames):
         try:
-            return self.__audio_stream.read(number_of_frames)
+            if (self.__capture_mode == CALLBACK_CAPTURE):
+                return self.__read_ring_buffer(number_of_frames)
+
+            if (self.__maximum_latency_seconds is not None):
+                self.__drop_stale_frames(self.__audio_stream.get_read_available(), number_of_frames)
+
+            AUDIO_DATA = self.__audio_stream.read(number_of_frames)
+
+            # Frames still queued were captured after the chunk's last frame, so it was captured that long ago.
+            self.__capture_time = time.monotonic() - self.__audio_stream.get_read_available() / self.__sample_rate
+
+            SAMPLES = numpy.frombuffer(AUDIO_DATA, dtype=self.__dtype).reshape(-1, self.__number_of_channels)
+
+            return SAMPLES * FLOAT_SAMPLE_SCALE if (self.__dtype.kind == 'f') else SAMPLES
 
         except AttributeError:
             raise ValueError('No Audio In Stream was established. Did you remember to call open?')
 
         except OSError:
-            raise OSError(f'Could not read from default input source.')
+            raise OSError(f'Could not read from {self.__get_device_description()}.')
+
+    def __get_stale_frames(self, queued_frames: int, number_of_frames: int) -> int:
+        '''
+            Returns:
+                `int`: How many of the oldest `queued_frames` must be dropped so that, after reading `number_of_frames`,
+                no more than `maximum_latency_seconds` of audio is left queued.
+        '''
+        if (self.__maximum_latency_seconds is None):
+            return 0
+
+        MAXIMUM_QUEUED_FRAMES = int(self.__maximum_latency_seconds * self.__sample_rate)
+
+        return max(queued_frames - number_of_frames - MAXIMUM_QUEUED_FRAMES, 0)
+
+    def __drop_stale_frames(self, queued_frames: int, number_of_frames: int):
+        STALE_FRAMES = self.__get_stale_frames(queued_frames, number_of_frames)
+
+        if (STALE_FRAMES > 0):
+            # The stale audio is already late; an overflow while discarding it doesn't matter.
+            self.__audio_stream.read(STALE_FRAMES, exception_on_overflow=False)
+            self.__dropped_frames += STALE_FRAMES
+
+    def __read_ring_buffer(self, number_of_frames: int) -> numpy.ndarray:
+        if (number_of_frames > self.__ring_buffer.capacity):
+            raise ValueError(f'number_of_frames must be <= {self.__ring_buffer.capacity} in CALLBACK_CAPTURE, but was {number_of_frames}.')
+
+        with self.__frames_available:
+            while (self.__ring_buffer.frames_written < self.__read_position + number_of_frames):
+                if (not self.__audio_stream.is_active()):
+                    raise OSError()
+
+                self.__frames_available.wait(self.__buffer_seconds)
+
+        while True:
+            FRAMES_WRITTEN = self.__ring_buffer.frames_written
+
+            # Frames older than the ring buffer were overwritten while the caller was busy; resume from the oldest frames left.
+            POSITION = max(self.__read_position, FRAMES_WRITTEN - self.__ring_buffer.capacity)
+            POSITION += self.__get_stale_frames(FRAMES_WRITTEN - POSITION, number_of_frames)
+
+            try:
+                SAMPLES = self.__ring_buffer.get_frames(POSITION, number_of_frames).copy()
+
+                if (self.__dtype.kind == 'f'):
+                    SAMPLES *= FLOAT_SAMPLE_SCALE
+
+            except ValueError:
+                continue
+
+            # The callback may have overwritten the frames while they were being copied; if so, copy newer ones.
+            if (self.__ring_buffer.frames_written - self.__ring_buffer.capacity <= POSITION):
+                self.__dropped_frames += POSITION - self.__read_position
+                self.__read_position = POSITION + number_of_frames
+
+                # Frames are captured at the sample rate, so the last frame read was captured this long before the
+                # latest callback. That callback may not have stored its time yet, but it can't be in the future.
+                FRAMES_WRITTEN, CAPTURE_TIME = self.__latest_capture
+                self.__capture_time = min(CAPTURE_TIME - (FRAMES_WRITTEN - self.__read_position) / self.__sample_rate,
+                                          time.monotonic())
+
+                return SAMPLES
+
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+def _read_wav_header(path: str) -> Tuple[int, int, int, int]:
+    '''
+        Returns:
+            `Tuple[int, int, int, int]`: The sample rate, number of channels, byte offset and length (in frames) of the
+            samples in the 16-bit PCM WAV file at `path`.
+    '''
+    with open(path, 'rb') as file:
+        RIFF_ID, _, WAVE_ID = struct.unpack('<4sI4s', file.read(12))
+
+        if (RIFF_ID != b'RIFF' or WAVE_ID != b'WAVE'):
+            raise ValueError(f'{path} is not a WAV file.')
+
+        format_chunk: Optional[bytes] = None
+
+        while True:
+            CHUNK_HEADER = file.read(8)
+
+            if (len(CHUNK_HEADER) < 8):
+                raise ValueError(f'{path} has no data chunk.')
+
+            CHUNK_ID, CHUNK_SIZE = struct.unpack('<4sI', CHUNK_HEADER)
+
+            if (CHUNK_ID == b'fmt '):
+                format_chunk = file.read(CHUNK_SIZE + CHUNK_SIZE % 2)
+
+            elif (CHUNK_ID == b'data'):
+                if (format_chunk is None):
+                    raise ValueError(f'{path} has no fmt chunk before its data chunk.')
+
+                DATA_OFFSET = file.tell()
+                break
+
+            else:
+                file.seek(CHUNK_SIZE + CHUNK_SIZE % 2, 1)
+
+    AUDIO_FORMAT, NUMBER_OF_CHANNELS, SAMPLE_RATE, _, BLOCK_ALIGN, BITS_PER_SAMPLE = struct.unpack('<HHIIHH', format_chunk[:16])
+
+    if (AUDIO_FORMAT == WAVE_FORMAT_EXTENSIBLE and len(format_chunk) >= 26):
+        AUDIO_FORMAT, = struct.unpack('<H', format_chunk[24:26])  # the first 2 bytes of the sub format GUID
+
+    if (AUDIO_FORMAT != WAVE_FORMAT_PCM or BITS_PER_SAMPLE != 16):
+        raise ValueError(f'{path} must hold 16-bit PCM samples, but had format {AUDIO_FORMAT} with {BITS_PER_SAMPLE} bits per sample.')
+
+    # A data chunk that was never finalized (e.g. from an interrupted recording) can claim more bytes than the file holds.
+    with open(path, 'rb') as file:
+        FILE_SIZE = file.seek(0, 2)
+
+    return SAMPLE_RATE, NUMBER_OF_CHANNELS, DATA_OFFSET, min(CHUNK_SIZE, FILE_SIZE - DATA_OFFSET) // BLOCK_ALIGN
+
+
+class WavFileAudioInStream(AudioInStream):
+    def __init__(self, path: str, realtime: bool = True, loop: bool = False, sample_rate: Optional[int] = None,
+                 number_of_channels: Optional[int] = None):
+        '''
+            Reads a 16-bit PCM WAV file through a memory map, so `read` returns views of the file without copying.
+
+            Args:
+                `path (str)`: The WAV file.
+                `realtime (bool, optional)`: If True, `read` waits until each chunk would have been captured live. If
+                False, chunks are returned as fast as they are read, e.g. for benchmarks or rendering ahead of time.
+                `loop (bool, optional)`: If True, reading continues from the start at the end of the file; otherwise
+                `read` raises EOFError once the file is exhausted.
+                `sample_rate (int, optional)`: If given, `open` raises a ValueError unless the file has this sample rate.
+                `number_of_channels (int, optional)`: If given, `open` raises a ValueError unless the file has this
+                number of channels.
+        '''
+        self.__path = path
+        self.__realtime = realtime
+        self.__loop = loop
+        self.__expected_sample_rate = sample_rate
+        self.__expected_number_of_channels = number_of_channels
+
+        self.__capture_time = math.nan
+
+    @property
+    def input_source(self):
+        return self.__path
+
+    def is_open(self):
+        try:
+            return self.__samples is not None
+
+        except AttributeError:
+            return False
+
+    @property
+    def sample_rate(self):
+        try:
+            return self.__sample_rate
+
+        except AttributeError:
+            raise ValueError('No Audio In Stream was established. Did you remember to call open?')
+
+    @property
+    def number_of_channels(self):
+        try:
+            return self.__number_of_channels
+
+        except AttributeError:
+            raise ValueError('No Audio In Stream was established. Did you remember to call open?')
+
+    @property
+    def dropped_frames(self):
+        return 0
+
+    @property
+    def capture_time(self):
+        return self.__capture_time
+
+    def open(self):
+        SAMPLE_RATE, NUMBER_OF_CHANNELS, DATA_OFFSET, NUMBER_OF_FRAMES = _read_wav_header(self.__path)
+
+        # The stream is left closed, as the file can't be resampled or remixed.
+        if (self.__expected_sample_rate is not None and SAMPLE_RATE != self.__expected_sample_rate):
+            raise ValueError(f'{self.__path} has a sample rate of {SAMPLE_RATE}, but {self.__expected_sample_rate} was requested.')
+
+        if (self.__expected_number_of_channels is not None and NUMBER_OF_CHANNELS != self.__expected_number_of_channels):
+            raise ValueError(f'{self.__path} has {NUMBER_OF_CHANNELS} channels, but {self.__expected_number_of_channels} were requested.')
+
+        self.__sample_rate, self.__number_of_channels = SAMPLE_RATE, NUMBER_OF_CHANNELS
+
+        if (NUMBER_OF_FRAMES == 0):
+            raise ValueError(f'{self.__path} has no samples.')
+
+        self.__samples = numpy.memmap(self.__path, dtype='<i2', mode='r', offset=DATA_OFFSET,
+                                      shape=(NUMBER_OF_FRAMES, self.__number_of_channels))
+        self.__position = 0
+        self.__frames_read = 0
+        self.__start_time = time.monotonic()
+
+    def close(self):
+        try:
+            self.__samples = None
+
+        except AttributeError:
+            pass
+
+    def read(self, number_of_frames):
+        try:
+            NUMBER_OF_SAMPLE_FRAMES = len(self.__samples)
+
+        except (AttributeError, TypeError):
+            raise ValueError('No Audio In Stream was established. Did you remember to call open?')
+
+        if (self.__position + number_of_frames <= NUMBER_OF_SAMPLE_FRAMES):
+            SAMPLES = self.__samples[self.__position:self.__position + number_of_frames]
+
+        elif (self.__loop):
+            # Only a chunk that wraps around the end of the file is copied.
+            INDICES = numpy.arange(self.__position, self.__position + number_of_frames) % NUMBER_OF_SAMPLE_FRAMES
+            SAMPLES = numpy.take(self.__samples, INDICES, axis=0)
+
+        else:
+            raise EOFError(f'Reached the end of {self.__path}.')
+
+        self.__position += number_of_frames
+
+        if (self.__loop):
+            self.__position %= NUMBER_OF_SAMPLE_FRAMES
+        self.__frames_read += number_of_frames
+
+        if (self.__realtime):
+            # When the chunk's last frame would have been captured live.
+            self.__capture_time = self.__start_time + self.__frames_read / self.__sample_rate
+            DELAY = self.__capture_time - time.monotonic()
+
+            if (DELAY > 0):
+                time.sleep(DELAY)
+
+        else:
+            self.__capture_time = time.monotonic()
+
+        return SAMPLES
+
+
+TONES_SIGNAL = 'tones'
+SWEEP_SIGNAL = 'sweep'
+PINK_NOISE_SIGNAL = 'pink_noise'
+IMPULSE_SIGNAL = 'impulse'
+SIGNALS = (TONES_SIGNAL, SWEEP_SIGNAL, PINK_NOISE_SIGNAL, IMPULSE_SIGNAL)
+
+PINK_NOISE_ROWS = 16
+
+
+class SignalGeneratorAudioInStream(AudioInStream):
+    def __init__(self, signal: str, sample_rate: int = 44100, number_of_channels: int = 1, amplitude: float = 0.5,
+                 frequencies: Optional[Sequence[float]] = None, sweep_seconds: float = 10, impulses_per_second: float = 2,
+                 seed: int = 0, realtime: bool = False):
+        '''
+            Generates a test signal chunk by chunk, without a sound card. Every channel carries the same signal.
+
+            Args:
+                `signal (str)`: TONES_SIGNAL sums a sine for each of `frequencies`. SWEEP_SIGNAL repeats an exponential
+                sweep from `frequencies[0]` to `frequencies[-1]` every `sweep_seconds`. PINK_NOISE_SIGNAL is
+                Voss-McCartney pink noise. IMPULSE_SIGNAL is a single sample at `amplitude`, `impulses_per_second` times a second.
+                `sample_rate (int, optional)`: The sample rate in frames per second.
+                `number_of_channels (int, optional)`: The number of samples in each frame.
+                `amplitude (float, optional)`: The peak level of tones, sweeps & impulses and the RMS level of pink noise,
+                as a fraction of full scale.
+                `frequencies (Sequence[float], optional)`: The frequencies (in Hz) of TONES_SIGNAL and SWEEP_SIGNAL; by
+                default, 440 Hz for TONES_SIGNAL and 20 Hz to 20 kHz for SWEEP_SIGNAL.
+                `sweep_seconds (float, optional)`: The duration of one sweep.
+                `impulses_per_second (float, optional)`: The rate of IMPULSE_SIGNAL.
+                `seed (int, optional)`: The seed of PINK_NOISE_SIGNAL; the same seed & chunk sizes give the same samples.
+                `realtime (bool, optional)`: If True, `read` waits until each chunk would have been captured live;
+                otherwise chunks are generated as fast as they are read.
+        '''
+        if (signal not in SIGNALS):
+            raise ValueError(f'signal must be one of {SIGNALS}, but was {signal}.')
+
+        if (sample_rate <= 0):
+            raise ValueError(f'sample_rate must be > 0, but was {sample_rate}.')
+
+        if (number_of_channels <= 0):
+            raise ValueError(f'number_of_channels must be > 0, but was {number_of_channels}.')
+
+        if (frequencies is None):
+            frequencies = (20, 20000) if (signal == SWEEP_SIGNAL) else (440,)
+
+        if (len(frequencies) == 0 or min(frequencies) <= 0):
+            raise ValueError(f'frequencies must hold at least one frequency, all > 0, but was {frequencies}.')
+
+        if (sweep_seconds <= 0):
+            raise ValueError(f'sweep_seconds must be > 0, but was {sweep_seconds}.')
+
+        if (impulses_per_second <= 0):
+            raise ValueError(f'impulses_per_second must be > 0, but was {impulses_per_second}.')
+
+        self.__signal = signal
+        self.__sample_rate = sample_rate
+        self.__number_of_channels = number_of_channels
+        self.__amplitude = amplitude
+        self.__frequencies = numpy.asarray(frequencies, dtype=numpy.float64)
+        self.__sweep_seconds = sweep_seconds
+        self.__impulses_per_second = impulses_per_second
+        self.__seed = seed
+        self.__realtime = realtime
+
+        self.__is_open = False
+        self.__capture_time = math.nan
+
+    @property
+    def input_source(self):
+        return f'{self.__signal} generator'
+
+    def is_open(self):
+        return self.__is_open
+
+    @property
+    def sample_rate(self):
+        return self.__sample_rate
+
+    @property
+    def number_of_channels(self):
+        return self.__number_of_channels
+
+    @property
+    def dropped_frames(self):
+        return 0
+
+    @property
+    def capture_time(self):
+        return self.__capture_time
+
+    def open(self):
+        self.__position = 0
+        self.__start_time = time.monotonic()
+
+        self.__random = numpy.random.default_rng(self.__seed)
+        self.__pink_noise_rows = numpy.zeros(PINK_NOISE_ROWS)
+
+        self.__is_open = True
+
+    def close(self):
+        self.__is_open = False
+
+    def read(self, number_of_frames):
+        if (not self.__is_open):
+            raise ValueError('No Audio In Stream was established. Did you remember to call open?')
+
+        FRAMES = self.__position + numpy.arange(number_of_frames)
+
+        if (self.__signal == TONES_SIGNAL):
+            SECONDS = FRAMES / self.__sample_rate
+            signal = numpy.sin(2 * numpy.pi * SECONDS[:, numpy.newaxis] * self.__frequencies).mean(axis=1)
+
+        elif (self.__signal == SWEEP_SIGNAL):
+            signal = self.__get_sweep(FRAMES)
+
+        elif (self.__signal == PINK_NOISE_SIGNAL):
+            signal = self.__get_pink_noise(FRAMES)
+
+        else:
+            FRAMES_PER_IMPULSE = self.__sample_rate / self.__impulses_per_second
+            signal = (numpy.floor(FRAMES % FRAMES_PER_IMPULSE) == 0).astype(numpy.float64)
+
+        self.__position += number_of_frames
+
+        SAMPLES = numpy.clip(numpy.rint(signal * self.__amplitude * FLOAT_SAMPLE_SCALE), -32768, 32767).astype(numpy.int16)
+
+        if (self.__realtime):
+            self.__capture_time = self.__start_time + self.__position / self.__sample_rate
+            DELAY = self.__capture_time - time.monotonic()
+
+            if (DELAY > 0):
+                time.sleep(DELAY)
+
+        else:
+            self.__capture_time = time.monotonic()
+
+        return numpy.repeat(SAMPLES[:, numpy.newaxis], self.__number_of_channels, axis=1)
+
+    def __get_sweep(self, frames: numpy.ndarray) -> numpy.ndarray:
+        START_FREQUENCY, END_FREQUENCY = self.__frequencies[0], self.__frequencies[-1]
+        SECONDS = (frames / self.__sample_rate) % self.__sweep_seconds
+
+        if (START_FREQUENCY == END_FREQUENCY):
+            return numpy.sin(2 * numpy.pi * START_FREQUENCY * SECONDS)
+
+        # The phase of a sweep whose frequency rises exponentially from START_FREQUENCY to END_FREQUENCY.
+        RATE = math.log(END_FREQUENCY / START_FREQUENCY) / self.__sweep_seconds
+
+        return numpy.sin(2 * numpy.pi * START_FREQUENCY / RATE * numpy.expm1(RATE * SECONDS))
+
+    def __get_pink_noise(self, frames: numpy.ndarray) -> numpy.ndarray:
+        '''
+            Voss-McCartney: row k holds a random value for 2 ** k frames, and the rows (plus white noise) are summed.
+            Each row's value carries over from the previous chunk until its block of frames ends.
+        '''
+        noise = self.__random.standard_normal(len(frames))
+
+        for row in range(PINK_NOISE_ROWS):
+            BLOCKS = frames >> row
+            FIRST_BLOCK = frames[0] >> row
+
+            # A new block starts on the first frame only when that frame is a multiple of 2 ** row.
+            NEW_BLOCK = (FIRST_BLOCK << row) == frames[0]
+            values = self.__random.standard_normal(BLOCKS[-1] - FIRST_BLOCK + 1)
+
+            if (not NEW_BLOCK):
+                values[0] = self.__pink_noise_rows[row]
+
+            noise += values[BLOCKS - FIRST_BLOCK]
+            self.__pink_noise_rows[row] = values[-1]
+
+        return noise / math.sqrt(PINK_NOISE_ROWS + 1)
+
+
+STDIN_SOURCE = '-'
+UNIX_SOCKET_PREFIX = 'unix:'
+
+
+class PcmAudioInStream(AudioInStream):
+    def __init__(self, source: str, sample_rate: int, number_of_channels: int, sample_format: str = INT16_FORMAT,
+                 buffer_bytes: int = 1 << 16):
+        '''
+            Reads raw interleaved PCM that was decoded elsewhere, without an audio device.
+
+            Args:
+                `source (str)`: STDIN_SOURCE, the path of a FIFO (or file), or UNIX_SOCKET_PREFIX followed by the path
+                of a Unix stream socket to connect to.
+                `sample_rate (int)`: The sample rate of the PCM in frames per second.
+                `number_of_channels (int)`: The number of samples in each frame.
+                `sample_format (str, optional)`: INT16_FORMAT or FLOAT32_FORMAT (within [-1, 1]); both little endian.
+                Float samples are returned scaled to the int16 range, so levels match the other streams.
+                `buffer_bytes (int, optional)`: The size of the buffered reader in front of the source.
+        '''
+        if (sample_rate <= 0):
+            raise ValueError(f'sample_rate must be > 0, but was {sample_rate}.')
+
+        if (number_of_channels <= 0):
+            raise ValueError(f'number_of_channels must be > 0, but was {number_of_channels}.')
+
+        if (sample_format not in SAMPLE_FORMATS):
+            raise ValueError(f'sample_format must be one of {SAMPLE_FORMATS}, but was {sample_format}.')
+
+        self.__source = source
+        self.__sample_rate = sample_rate
+        self.__number_of_channels = number_of_channels
+        self.__dtype = SAMPLE_FORMAT_DTYPES[sample_format]
+        self.__buffer_bytes = buffer_bytes
+
+        self.__buffer = bytearray()
+        self.__capture_time = math.nan
+
+    @property
+    def input_source(self):
+        return self.__source
+
+    def is_open(self):
+        try:
+            return not self.__file.closed
+
+        except AttributeError:
+            return False
+
+    @property
+    def sample_rate(self):
+        return self.__sample_rate
+
+    @property
+    def number_of_channels(self):
+        return self.__number_of_channels
+
+    @property
+    def dropped_frames(self):
+        return 0
+
+    @property
+    def capture_time(self):
+        return self.__capture_time
+
+    def open(self):
+        if (self.__source == STDIN_SOURCE):
+            self.__file = os.fdopen(sys.stdin.fileno(), 'rb', buffering=self.__buffer_bytes, closefd=False)
+
+        elif (self.__source.startswith(UNIX_SOCKET_PREFIX)):
+            self.__socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.__socket.connect(self.__source[len(UNIX_SOCKET_PREFIX):])
+            self.__file = self.__socket.makefile('rb', buffering=self.__buffer_bytes)
+
+        else:
+            self.__file = open(self.__source, 'rb', buffering=self.__buffer_bytes)
+
+    def close(self):
+        try:
+            self.__file.close()
+
+        except AttributeError:
+            pass
+
+        try:
+            self.__socket.close()
+
+        except AttributeError:
+            pass
+
+    def read(self, number_of_frames):
+        '''
+            Returns:
+                `numpy.ndarray`: A view of a buffer that is reused, i.e. overwritten by the next call to `read`.
+        '''
+        NUMBER_OF_BYTES = number_of_frames * self.__number_of_channels * self.__dtype.itemsize
+
+        if (len(self.__buffer) < NUMBER_OF_BYTES):
+            self.__buffer = bytearray(NUMBER_OF_BYTES)
+
+        BUFFER_VIEW = memoryview(self.__buffer)[:NUMBER_OF_BYTES]
+        bytes_read = 0
+
+        try:
+            while (bytes_read < NUMBER_OF_BYTES):
+                # Pipes & sockets may return fewer bytes than asked for.
+                BYTES_READ = self.__file.readinto(BUFFER_VIEW[bytes_read:])
+
+                if (not BYTES_READ):
+                    raise EOFError(f'Reached the end of {self.__source}.')
+
+                bytes_read += BYTES_READ
+
+        except AttributeError:
+            raise ValueError('No Audio In Stream was established. Did you remember to call open?')
+
+        # The PCM was captured upstream; the time it arrived is the earliest this host could have it.
+        self.__capture_time = time.monotonic()
+
+        samples = numpy.frombuffer(self.__buffer, dtype=self.__dtype, count=NUMBER_OF_BYTES // self.__dtype.itemsize)
+
+        if (self.__dtype.kind == 'f'):
+            samples *= FLOAT_SAMPLE_SCALE
+
+        return samples.reshape(-1, self.__number_of_channels)
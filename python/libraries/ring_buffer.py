@@ -0,0 +1,101 @@
+import numpy
+
+
+class RingBuffer:
+    def __init__(self, number_of_frames: int, number_of_channels: int = 1, dtype=numpy.int16):
+        '''
+            A single writer, single reader ring buffer of audio frames. Every frame is stored twice (at `i` and at
+            `i + number_of_frames`), so that any run of up to `number_of_frames` recent frames is contiguous and can be
+            returned as a view without copying. The writer publishes frames by advancing `frames_written` only after
+            they are copied in, so readers never need a lock.
+
+            Args:
+                `number_of_frames (int)`: How many of the most recent frames are kept.
+                `number_of_channels (int, optional)`: The number of samples in each frame.
+                `dtype (optional)`: The sample type.
+        '''
+        if (number_of_frames <= 0):
+            raise ValueError(f'number_of_frames must be > 0, but was {number_of_frames}.')
+
+        if (number_of_channels <= 0):
+            raise ValueError(f'number_of_channels must be > 0, but was {number_of_channels}.')
+
+        self.__capacity = number_of_frames
+        self.__samples = numpy.zeros((2 * number_of_frames, number_of_channels), dtype=dtype)
+        self.__frames_written = 0
+
+    @property
+    def capacity(self) -> int:
+        return self.__capacity
+
+    @property
+    def number_of_channels(self) -> int:
+        return self.__samples.shape[1]
+
+    @property
+    def dtype(self) -> numpy.dtype:
+        return self.__samples.dtype
+
+    @property
+    def frames_written(self) -> int:
+        '''
+            Returns:
+                `int`: The number of frames written since the ring buffer was created; the newest frame's position.
+        '''
+        return self.__frames_written
+
+    def write(self, data):
+        '''
+            Args:
+                `data (bytes-like)`: Interleaved samples of `dtype`; a whole number of frames. Only the last `capacity`
+                frames are kept if more are given.
+        '''
+        FRAMES = numpy.frombuffer(data, dtype=self.__samples.dtype).reshape(-1, self.__samples.shape[1])[-self.__capacity:]
+        SKIPPED_FRAMES = len(data) // (self.__samples.dtype.itemsize * self.__samples.shape[1]) - len(FRAMES)
+
+        START = (self.__frames_written + SKIPPED_FRAMES) % self.__capacity
+        FIRST_LENGTH = min(len(FRAMES), self.__capacity - START)
+
+        # The primary copy wraps around at capacity; the mirror copy is the same frames shifted by capacity.
+        self.__samples[START:START + FIRST_LENGTH] = FRAMES[:FIRST_LENGTH]
+        self.__samples[START + self.__capacity:START + self.__capacity + FIRST_LENGTH] = FRAMES[:FIRST_LENGTH]
+        self.__samples[:len(FRAMES) - FIRST_LENGTH] = FRAMES[FIRST_LENGTH:]
+        self.__samples[self.__capacity:self.__capacity + len(FRAMES) - FIRST_LENGTH] = FRAMES[FIRST_LENGTH:]
+
+        self.__frames_written += SKIPPED_FRAMES + len(FRAMES)
+
+    def get_frames(self, start_frame: int, number_of_frames: int) -> numpy.ndarray:
+        '''
+            Args:
+                `start_frame (int)`: The position (see `frames_written`) of the first frame.
+                `number_of_frames (int)`: The number of frames.
+
+            Returns:
+                `numpy.ndarray`: A (number_of_frames, number_of_channels) view of the frames. The view is only valid until
+                the writer overwrites those frames, i.e. until `frames_written` passes `start_frame + capacity`.
+        '''
+        FRAMES_WRITTEN = self.__frames_written
+
+        if (number_of_frames < 0 or number_of_frames > self.__capacity):
+            raise ValueError(f'number_of_frames must be >= 0 and <= {self.__capacity}, but was {number_of_frames}.')
+
+        if (start_frame < FRAMES_WRITTEN - self.__capacity or start_frame + number_of_frames > FRAMES_WRITTEN):
+            raise ValueError(f'Frames [{start_frame}, {start_frame + number_of_frames}) are not in the ring buffer, which holds '
+                             f'frames [{max(FRAMES_WRITTEN - self.__capacity, 0)}, {FRAMES_WRITTEN}).')
+
+        START = start_frame % self.__capacity
+
+        return self.__samples[START:START + number_of_frames]
+
+    def get_latest_frames(self, number_of_frames: int) -> numpy.ndarray:
+        '''
+            Args:
+                `number_of_frames (int)`: The number of frames; fewer are returned if fewer were written.
+
+            Returns:
+                `numpy.ndarray`: A (number_of_frames, number_of_channels) view of the newest frames.
+        '''
+        FRAMES_WRITTEN = self.__frames_written
+        NUMBER_OF_FRAMES = min(number_of_frames, FRAMES_WRITTEN)
+
+        return self.get_frames(FRAMES_WRITTEN - NUMBER_OF_FRAMES, NUMBER_OF_FRAMES)
@@ -8,6 +8,11 @@ PARITY_NONE, PARITY_EVEN, PARITY_ODD, PARITY_MARK, PARITY_SPACE = 'N', 'E', 'O',
 STOPBITS_ONE, STOPBITS_ONE_POINT_FIVE, STOPBITS_TWO = (1, 1.5, 2)
 FIVEBITS, SIXBITS, SEVENBITS, EIGHTBITS = (5, 6, 7, 8)
 
+# Version 1 sends counts and group indices as 1 byte each; version 2 sends them as 2 bytes (little endian).
+PROTOCOL_VERSION_1 = 1
+PROTOCOL_VERSION_2 = 2
+PROTOCOL_VERSION = PROTOCOL_VERSION_2
+
 
 class SerialException(Exception):
     def __init__(self, message: str):
@@ -20,6 +25,11 @@ class Serial(ABC):
     def number_of_leds(self) -> int:
         pass
 
+    @property
+    @abstractmethod
+    def protocol_version(self) -> int:
+        pass
+
     @abstractmethod
     def is_open(self) -> bool:
         pass
@@ -62,6 +72,16 @@ class ProductionSerial(Serial):
             NUMBER_OF_BYTES = 2
             self.__number_of_leds = int.from_bytes(self.read(NUMBER_OF_BYTES), byteorder="little")
 
+            # The controller states the newest protocol version it supports; both sides then use the older of
+            # that version and ours.
+            CONTROLLER_PROTOCOL_VERSION = int.from_bytes(self.read(1), byteorder="little")
+
+            if (CONTROLLER_PROTOCOL_VERSION < PROTOCOL_VERSION_1):
+                raise SerialException(f"The serial connection stated an invalid protocol version ({CONTROLLER_PROTOCOL_VERSION}).")
+
+            self.__protocol_version = min(CONTROLLER_PROTOCOL_VERSION, PROTOCOL_VERSION)
+            self.write(self.__protocol_version.to_bytes(1, byteorder="little"))
+
         except serial.SerialException as err:
             raise SerialException(str(err))
 
@@ -73,6 +93,14 @@ class ProductionSerial(Serial):
         except AttributeError:
             raise SerialException(f"Did not receive the number of LEDs from the serial connection. {SERIAL_ERROR_MESSAGE}")
 
+    @property
+    def protocol_version(self) -> int:
+        try:
+            return self.__protocol_version
+
+        except AttributeError:
+            raise SerialException(f"Did not agree on a protocol version with the serial connection. {SERIAL_ERROR_MESSAGE}")
+
     def is_open(self):
         try:
             return self.__serial.is_open
@@ -107,14 +135,19 @@ class ProductionSerial(Serial):
 
 
 class FakeSerial(Serial):
-    def __init__(self, number_of_leds: int = 300):
+    def __init__(self, number_of_leds: int = 300, protocol_version: int = PROTOCOL_VERSION):
         self.__number_of_leds = number_of_leds
+        self.__protocol_version = protocol_version
         self.opened = False
 
     @property
     def number_of_leds(self) -> int:
         return self.__number_of_leds
 
+    @property
+    def protocol_version(self) -> int:
+        return self.__protocol_version
+
     def is_open(self):
         return self.opened
 
@@ -2,17 +2,25 @@ import argparse
 import json
 import sys
 import time
-from contextlib import closing
+from contextlib import ExitStack, closing
 from types import SimpleNamespace
-from typing import List
+from typing import List, Optional
 
 import spectrogram
 import text
+from band_filters import AutomaticGainControl, BandFilter, EnvelopeFilter
+from channel_mixer import check_band_channels, mix_channels
 from color_palette import ColorPalette
-from grouped_leds import GraphicGroupedLeds, GroupedLedsQueue, SerialGroupedLeds
-from libraries.audio_in_stream import ProductionAudioInStream
+from decimator import Decimator
+from grouped_leds import (ENCODINGS, LINEAR_EASING, PACKET_ENCODING, SMOOTHSTEP_EASING, AsyncGroupedLeds, FanOutGroupedLeds,
+                          GraphicGroupedLeds, GroupedLedsQueue, InterpolatedGroupedLeds, SerialGroupedLeds, split_group_led_ranges)
+from latency_statistics import LatencyStatistics
+from libraries.audio_in_stream import (BLOCKING_CAPTURE, CAPTURE_MODES, INT16_FORMAT, SAMPLE_FORMATS, SIGNALS, AudioInStream,
+                                       PcmAudioInStream, ProductionAudioInStream, SignalGeneratorAudioInStream, WavFileAudioInStream)
 from libraries.canvas_gui import ProductionCanvasGui
 from libraries.serial import EIGHTBITS, PARITY_NONE, STOPBITS_ONE, ProductionSerial
+from peak_hold import PeakHold
+from silence_gate import SilenceGate
 from util import RGB
 
 
@@ -49,6 +57,70 @@ def create_color_palette_groups(color_palettes: List[ColorPalette], groupings: L
     return color_palette_groups
 
 
+def create_band_filters(settings: SimpleNamespace) -> List[BandFilter]:
+    band_filters: List[BandFilter] = []
+
+    if (hasattr(settings, 'automatic_gain_control')):
+        band_filters.append(AutomaticGainControl(len(settings.bands), **settings.automatic_gain_control))
+
+    if (hasattr(settings, 'smoothing')):
+        smoothing_settings = SimpleNamespace(**settings.smoothing)
+
+        band_filters.append(EnvelopeFilter(len(settings.bands), smoothing_settings.attack_milliseconds,
+                                           smoothing_settings.release_milliseconds))
+
+    return band_filters
+
+
+def create_audio_in_stream(args: argparse.Namespace) -> AudioInStream:
+    MILLISECONDS_PER_SECOND = 1000
+
+    if (args.wav_file is not None):
+        return WavFileAudioInStream(args.wav_file, realtime=not args.unpaced, sample_rate=args.sample_rate,
+                                    number_of_channels=args.number_of_channels)
+
+    if (args.signal is not None):
+        # Only the options that were given, so the generator keeps its own defaults otherwise.
+        FORMAT = {name: value for name, value in (('sample_rate', args.sample_rate), ('number_of_channels', args.number_of_channels))
+                  if (value is not None)}
+
+        return SignalGeneratorAudioInStream(args.signal, realtime=not args.unpaced, **FORMAT)
+
+    if (args.pcm_source is not None):
+        return PcmAudioInStream(args.pcm_source, args.sample_rate, args.number_of_channels, args.sample_format)
+
+    MAXIMUM_LATENCY_SECONDS = None if (args.maximum_latency_milliseconds is None) else args.maximum_latency_milliseconds / MILLISECONDS_PER_SECOND
+
+    DEVICE = int(args.device) if (args.device is not None and args.device.isdigit()) else args.device
+
+    return ProductionAudioInStream(args.audio_capture, maximum_latency_seconds=MAXIMUM_LATENCY_SECONDS, device=DEVICE,
+                                   sample_rate=args.sample_rate, number_of_channels=args.number_of_channels,
+                                   sample_format=args.sample_format, frames_per_buffer=args.frames_per_buffer)
+
+
+def create_band_channels(settings: SimpleNamespace, number_of_channels: int) -> Optional[List[int]]:
+    '''
+        Returns:
+            `List[int] | None`: The audio channel each band is analysed from, or None if the bands share one mono signal.
+    '''
+    if (not hasattr(settings, 'band_channels')):
+        return None
+
+    check_band_channels(settings.band_channels, len(settings.bands), number_of_channels)
+
+    return settings.band_channels
+
+
+def create_peak_hold(settings: SimpleNamespace) -> Optional[PeakHold]:
+    if (not hasattr(settings, 'peak_hold')):
+        return None
+
+    peak_hold_settings = SimpleNamespace(**settings.peak_hold)
+
+    return PeakHold(len(settings.bands), peak_hold_settings.hold_milliseconds,
+                    peak_hold_settings.falloff_decibels_per_second, peak_hold_settings.color)
+
+
 if __name__ == '__main__':
     LED_CONFIG_FILE_ARG = 'led_config_file'
 
@@ -57,6 +129,25 @@ if __name__ == '__main__':
     SERIAL_PORT_OPT = ['-p', '--serial_port']
     BAUDRATE_OPT = ['-r', '--baudrate']
     BRIGHTNESS_OPT = ['-b', '--brightness']
+    FRAMES_PER_SECOND_OPT = ['-f', '--frames_per_second']
+    EASING_OPT = ['-e', '--easing']
+    SILENCE_GATE_OPT = ['-g', '--silence_gate']
+    SERIAL_ENCODING_OPT = ['-c', '--serial_encoding']
+    STATISTICS_SECONDS_OPT = ['-t', '--statistics_seconds']
+    AUDIO_CAPTURE_OPT = ['-a', '--audio_capture']
+    MAXIMUM_LATENCY_OPT = ['-l', '--maximum_latency_milliseconds']
+    CHANNEL_OPT = ['-n', '--channel']
+    WAV_FILE_OPT = ['-w', '--wav_file']
+    UNPACED_OPT = ['-u', '--unpaced']
+    SIGNAL_OPT = ['-i', '--signal']
+    PCM_SOURCE_OPT = ['-x', '--pcm_source']
+    SAMPLE_RATE_OPT = ['-z', '--sample_rate']
+    NUMBER_OF_CHANNELS_OPT = ['-k', '--number_of_channels']
+    SAMPLE_FORMAT_OPT = ['-o', '--sample_format']
+    DEVICE_OPT = ['-v', '--device']
+    FRAMES_PER_BUFFER_OPT = ['-j', '--frames_per_buffer']
+    DECIMATE_OPT = ['-y', '--decimate']
+    LATENCY_PERCENTILES_OPT = ['-q', '--latency_percentiles']
     # SONES_OPT = ['-s', '--sones']
 
     parser = argparse.ArgumentParser(formatter_class=argparse.RawTextHelpFormatter,
@@ -65,13 +156,42 @@ if __name__ == '__main__':
     parser.add_argument(LED_CONFIG_FILE_ARG)
     parser.add_argument(*MILLISECONDS_PER_AUDIO_CHUNK_OPT, type=int, default=55)
     parser.add_argument(*DURATION_OPT, type=int)
-    parser.add_argument(*SERIAL_PORT_OPT)
+    parser.add_argument(*SERIAL_PORT_OPT, nargs='+')
     parser.add_argument(*BAUDRATE_OPT, type=int, default=1999999)
     parser.add_argument(*BRIGHTNESS_OPT, type=int, default=20)
+    parser.add_argument(*FRAMES_PER_SECOND_OPT, type=int)
+    parser.add_argument(*EASING_OPT, choices=[LINEAR_EASING, SMOOTHSTEP_EASING], default=LINEAR_EASING)
+    parser.add_argument(*SERIAL_ENCODING_OPT, choices=ENCODINGS, default=PACKET_ENCODING)
+    parser.add_argument(*SILENCE_GATE_OPT, type=bool, action=argparse.BooleanOptionalAction, default=False)
+    parser.add_argument(*STATISTICS_SECONDS_OPT, type=float)
+    parser.add_argument(*AUDIO_CAPTURE_OPT, choices=CAPTURE_MODES, default=BLOCKING_CAPTURE)
+    parser.add_argument(*MAXIMUM_LATENCY_OPT, type=float)
+    parser.add_argument(*CHANNEL_OPT, type=int)
+    parser.add_argument(*WAV_FILE_OPT)
+    parser.add_argument(*UNPACED_OPT, type=bool, action=argparse.BooleanOptionalAction, default=False)
+    parser.add_argument(*SIGNAL_OPT, choices=SIGNALS)
+    parser.add_argument(*PCM_SOURCE_OPT)
+    parser.add_argument(*SAMPLE_RATE_OPT, type=int)
+    parser.add_argument(*NUMBER_OF_CHANNELS_OPT, type=int)
+    parser.add_argument(*SAMPLE_FORMAT_OPT, choices=SAMPLE_FORMATS, default=INT16_FORMAT)
+    parser.add_argument(*DEVICE_OPT)
+    parser.add_argument(*FRAMES_PER_BUFFER_OPT, type=int)
+    parser.add_argument(*DECIMATE_OPT, type=bool, action=argparse.BooleanOptionalAction, default=False)
+    parser.add_argument(*LATENCY_PERCENTILES_OPT, type=float, nargs='+')
     # parser.add_argument(*SONES_OPT, type=bool, action=argparse.BooleanOptionalAction, default=False)
 
     args = parser.parse_args()
 
+    if (args.pcm_source is not None and (args.sample_rate is None or args.number_of_channels is None)):
+        parser.error(f'{PCM_SOURCE_OPT[1]} requires {SAMPLE_RATE_OPT[1]} and {NUMBER_OF_CHANNELS_OPT[1]}.')
+
+    if (args.latency_percentiles is not None):
+        if (args.statistics_seconds is None):
+            parser.error(f'{LATENCY_PERCENTILES_OPT[1]} requires {STATISTICS_SECONDS_OPT[1]}.')
+
+        if (any(percentile < 0 or percentile > 100 for percentile in args.latency_percentiles)):
+            parser.error(f'Every latency percentile must be >= 0 and <= 100, but was {args.latency_percentiles}.')
+
     settings = SimpleNamespace()
 
     with open(args.led_config_file) as file:
@@ -82,33 +202,83 @@ if __name__ == '__main__':
     color_palettes = create_color_palettes(color_settings.color_palettes, color_settings.upper_amplitudes)
     color_palette_groups = create_color_palette_groups(color_palettes, color_settings.groupings)
 
+    band_filters = create_band_filters(settings)
+    peak_hold = create_peak_hold(settings)
+
     grouped_leds_queue = GroupedLedsQueue()
 
-    with (closing(ProductionAudioInStream()) as audio_in_stream,
-          closing(ProductionCanvasGui()) as canvas_gui,
-          closing(ProductionSerial()) as serial):
+    MILLISECONDS_PER_SECOND = 1000
+
+    # Latency is only tracked when it is logged.
+    latency_statistics = None if (args.latency_percentiles is None) else LatencyStatistics()
+
+    with ExitStack() as exit_stack:
+        audio_in_stream = exit_stack.enter_context(closing(create_audio_in_stream(args)))
+        canvas_gui = exit_stack.enter_context(closing(ProductionCanvasGui()))
+        serials: List[ProductionSerial] = []
+        serial_grouped_leds: List[SerialGroupedLeds] = []
 
         if (args.serial_port is not None):
             READ_TIMEOUT = 10
             WRITE_TIMEOUT = 10
 
-            serial.open(args.serial_port, args.baudrate, PARITY_NONE, STOPBITS_ONE, EIGHTBITS, READ_TIMEOUT, WRITE_TIMEOUT)
-            grouped_leds_queue = GroupedLedsQueue(SerialGroupedLeds(settings.led_range, settings.led_groups, serial, args.brightness))
+            for serial_port in args.serial_port:
+                serial = exit_stack.enter_context(closing(ProductionSerial()))
+                serial.open(serial_port, args.baudrate, PARITY_NONE, STOPBITS_ONE, EIGHTBITS, READ_TIMEOUT, WRITE_TIMEOUT)
+                serials.append(serial)
+
+            if (len(serials) == 1):
+                serial_grouped_leds.append(SerialGroupedLeds(settings.led_range, settings.led_groups, serials[0], args.brightness,
+                                                             args.serial_encoding))
+
+                # Serial writes happen on their own thread so that a slow link never delays reading audio.
+                transport = exit_stack.enter_context(closing(AsyncGroupedLeds(serial_grouped_leds[0], latency_statistics)))
+
+            else:
+                # The controllers are chained in the order their ports were given.
+                SPLITS = split_group_led_ranges(settings.led_range, settings.led_groups, [serial.number_of_leds for serial in serials])
+                serial_grouped_leds.extend(SerialGroupedLeds(led_range, group_led_ranges, serial, args.brightness, args.serial_encoding)
+                                           for serial, (led_range, group_led_ranges) in zip(serials, SPLITS))
+
+                transport = exit_stack.enter_context(closing(FanOutGroupedLeds(settings.led_range, settings.led_groups,
+                                                                               serial_grouped_leds, latency_statistics)))
+
+            grouped_leds = transport
+
+            if (args.frames_per_second is not None):
+                SECONDS_PER_TRANSITION = args.milliseconds_per_audio_chunk / MILLISECONDS_PER_SECOND
+
+                grouped_leds = exit_stack.enter_context(closing(InterpolatedGroupedLeds(grouped_leds, args.frames_per_second,
+                                                                                        SECONDS_PER_TRANSITION, args.easing)))
+
+            grouped_leds_queue = GroupedLedsQueue(grouped_leds, latency_statistics)
 
         else:
             canvas_gui.open()
-            grouped_leds_queue = GroupedLedsQueue(GraphicGroupedLeds(settings.led_range, settings.led_groups, canvas_gui))
+            grouped_leds_queue = GroupedLedsQueue(GraphicGroupedLeds(settings.led_range, settings.led_groups, canvas_gui),
+                                                  latency_statistics)
 
         try:
             audio_in_stream.open()
 
         except OSError as err:
-            print('No default input device was found. Make sure your Operating System has a default input device set.', file=sys.stderr)
+            print(err, file=sys.stderr)
             exit(1)
 
-        MILLISECONDS_PER_SECOND = 1000
         FRAMES_PER_MILLISECOND = audio_in_stream.sample_rate / MILLISECONDS_PER_SECOND
         NUMBER_OF_FRAMES = int(FRAMES_PER_MILLISECOND * args.milliseconds_per_audio_chunk)
+        SECONDS_PER_AUDIO_CHUNK = NUMBER_OF_FRAMES / audio_in_stream.sample_rate
+
+        BAND_CHANNELS = create_band_channels(settings, audio_in_stream.number_of_channels)
+
+        # Bands that stop well below the Nyquist frequency are analysed from fewer samples, at the same resolution.
+        MAXIMUM_BAND_FREQUENCY = max(band[1] for band in settings.bands)
+        decimator = Decimator(audio_in_stream.sample_rate, MAXIMUM_BAND_FREQUENCY) if (args.decimate) else None
+
+        statistics_deadline = None if (args.statistics_seconds is None) else time.monotonic() + args.statistics_seconds
+
+        silence_gate = SilenceGate() if (args.silence_gate) else None
+        is_idle = False
 
         color_palette_group_deadline = time.time() if (args.duration is None) else time.time() + args.duration
         color_palette_group_index = 0
@@ -128,23 +298,66 @@ if __name__ == '__main__':
 
                 AUDIO_CHUNK = audio_in_stream.read(NUMBER_OF_FRAMES)
 
+                if (statistics_deadline is not None and time.monotonic() >= statistics_deadline):
+                    for serial_port, output in zip(args.serial_port or [], serial_grouped_leds):
+                        print(f'{serial_port}: {output.statistics.get_summary(args.baudrate)}', file=sys.stderr)
+                        output.statistics.reset()
+
+                    if (len(serial_grouped_leds) > 0):
+                        print(f'{transport.frames_dropped} of {transport.frames_written + transport.frames_dropped} frames dropped so far',
+                              file=sys.stderr)
+
+                    print(f'{audio_in_stream.dropped_frames} audio frames dropped so far', file=sys.stderr)
+
+                    if (latency_statistics is not None):
+                        print(latency_statistics.get_summary(args.latency_percentiles), file=sys.stderr)
+                        latency_statistics.reset()
+
+                    statistics_deadline = time.monotonic() + args.statistics_seconds
+
+                if (silence_gate is not None and silence_gate.is_silent(AUDIO_CHUNK, SECONDS_PER_AUDIO_CHUNK)):
+                    if (not is_idle):
+                        grouped_leds_queue.turn_off()
+                        is_idle = True
+
+                    continue
+
+                is_idle = False
+
+                # With band_channels, every band reads its own channel, so the chunk is analysed without mixing.
+                SAMPLES = AUDIO_CHUNK if (BAND_CHANNELS is not None) else mix_channels(AUDIO_CHUNK, args.channel)
+                SAMPLE_RATE = audio_in_stream.sample_rate
+
+                if (decimator is not None):
+                    SAMPLES = decimator.decimate(SAMPLES)
+                    SAMPLE_RATE = decimator.output_sample_rate
+
                 # if (args.sones):
-                #     spectrogram.update_sones(grouped_leds_queue, AUDIO_CHUNK, NUMBER_OF_FRAMES, audio_in_stream.sample_rate,
+                #     spectrogram.update_sones(grouped_leds_queue, SAMPLES, NUMBER_OF_FRAMES, audio_in_stream.sample_rate,
                 #                    settings.bands, color_palette_groups[color_palette_group_index], sones)
 
-                spectrogram.update(grouped_leds_queue, AUDIO_CHUNK, NUMBER_OF_FRAMES, audio_in_stream.sample_rate,
-                                   settings.bands, color_palette_groups[color_palette_group_index])
+                spectrogram.update(grouped_leds_queue, SAMPLES, len(SAMPLES), SAMPLE_RATE, settings.bands,
+                                   color_palette_groups[color_palette_group_index], band_filters, peak_hold,
+                                   BAND_CHANNELS, audio_in_stream.capture_time)
 
             except KeyboardInterrupt:
-                if (serial.is_open()):
+                if (any(serial.is_open() for serial in serials)):
                     for i in range(3):
                         grouped_leds_queue.turn_off()
 
                 print("\nShutting down.")
                 break
 
+            except EOFError:
+                if (any(serial.is_open() for serial in serials)):
+                    for i in range(3):
+                        grouped_leds_queue.turn_off()
+
+                print(f'Finished reading {audio_in_stream.input_source}.')
+                break
+
             except Exception as e:
-                if (serial.is_open()):
+                if (any(serial.is_open() for serial in serials)):
                     for i in range(3):
                         grouped_leds_queue.turn_off()
 
@@ -0,0 +1,86 @@
+from typing import Iterable, Sequence, Union
+
+import numpy
+from util import RGB
+
+
+class PeakHold:
+    def __init__(self, number_of_bands: int, hold_milliseconds: Union[float, Sequence[float]],
+                 falloff_decibels_per_second: Union[float, Sequence[float]], color: Iterable[int]):
+        '''
+            Tracks the peak amplitude of each band. A peak is held for `hold_milliseconds`, after which it falls
+            by `falloff_decibels_per_second` until a louder amplitude replaces it.
+
+            Args:
+                `number_of_bands (int)`: The number of bands.
+                `hold_milliseconds (float | Sequence[float])`: How long a peak is held, for every band or for each band.
+                `falloff_decibels_per_second (float | Sequence[float])`: How fast a peak falls once it is no longer held,
+                for every band or for each band.
+                `color (Iterable[int])`: The RGB color used to render peaks.
+        '''
+        MILLISECONDS_PER_SECOND = 1000
+
+        self.__hold_seconds = numpy.broadcast_to(numpy.asarray(hold_milliseconds, dtype=numpy.float64) / MILLISECONDS_PER_SECOND,
+                                                 (number_of_bands,)).copy()
+        self.__falloff_rates = numpy.broadcast_to(numpy.asarray(falloff_decibels_per_second, dtype=numpy.float64),
+                                                  (number_of_bands,)).copy()
+
+        if (numpy.any(self.__hold_seconds < 0)):
+            raise ValueError(f'hold_milliseconds must be >= 0, but was {hold_milliseconds}.')
+
+        if (numpy.any(self.__falloff_rates < 0)):
+            raise ValueError(f'falloff_decibels_per_second must be >= 0, but was {falloff_decibels_per_second}.')
+
+        self.__color = RGB(*color)
+
+        self.__peaks = numpy.full(number_of_bands, -numpy.inf)
+        self.__hold_seconds_remaining = numpy.zeros(number_of_bands)
+
+    @property
+    def color(self) -> RGB:
+        return self.__color
+
+    @property
+    def peaks(self) -> numpy.ndarray:
+        return self.__peaks.copy()
+
+    def update(self, amplitudes: numpy.ndarray, seconds: float):
+        '''
+            Args:
+                `amplitudes (numpy.ndarray)`: The amplitude (in decibels) of each band.
+                `seconds (float)`: The duration of the audio chunk the amplitudes were calculated from.
+        '''
+        NEW_PEAKS = amplitudes >= self.__peaks
+
+        self.__hold_seconds_remaining -= seconds
+        FALLING = ~NEW_PEAKS & (self.__hold_seconds_remaining < 0)
+
+        FALLEN_PEAKS = numpy.maximum(self.__peaks - self.__falloff_rates * numpy.minimum(seconds, -self.__hold_seconds_remaining),
+                                     amplitudes)
+
+        self.__peaks = numpy.where(NEW_PEAKS, amplitudes, numpy.where(FALLING, FALLEN_PEAKS, self.__peaks))
+        self.__hold_seconds_remaining = numpy.where(NEW_PEAKS, self.__hold_seconds, self.__hold_seconds_remaining)
+
+    def get_peak_positions(self, lower_amplitudes: numpy.ndarray, upper_amplitudes: numpy.ndarray,
+                           numbers_of_groups: numpy.ndarray) -> numpy.ndarray:
+        '''
+            Maps each band's peak onto one of the band's groups, treating the groups as a bar that ranges from
+            `lower_amplitudes` (the first group) to `upper_amplitudes` (the last group).
+
+            Args:
+                `lower_amplitudes (numpy.ndarray)`: The amplitude represented by the first group of each band.
+                `upper_amplitudes (numpy.ndarray)`: The amplitude represented by the last group of each band.
+                `numbers_of_groups (numpy.ndarray)`: The number of groups in each band.
+
+            Returns:
+                `numpy.ndarray`: The index of the group (within its band) that should display each band's peak, or -1 if
+                a band's peak is not above its lower amplitude.
+        '''
+        SPANS = upper_amplitudes - lower_amplitudes
+
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            FRACTIONS = numpy.where(SPANS > 0, (self.__peaks - lower_amplitudes) / SPANS, 1)
+
+        POSITIONS = numpy.rint(numpy.clip(FRACTIONS, 0, 1) * (numbers_of_groups - 1)).astype(numpy.int64)
+
+        return numpy.where((self.__peaks > lower_amplitudes) & (numbers_of_groups > 0), POSITIONS, -1)
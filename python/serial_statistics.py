@@ -0,0 +1,127 @@
+import threading
+import time
+from typing import Optional
+
+from histogram import Histogram, exponential_upper_bounds
+
+# 0.1 ms up to ~3.3 s
+SECONDS_UPPER_BOUNDS = exponential_upper_bounds(0.0001, 2, 16)
+
+BITS_PER_BYTE_ON_THE_WIRE = 10  # 8N1: start bit, 8 data bits, stop bit
+MILLISECONDS_PER_SECOND = 1000
+
+
+class SerialStatistics:
+    def __init__(self):
+        '''
+            Counters and histograms of the traffic written to one serial connection. They are updated by whichever
+            thread writes to the connection and may be read from any thread.
+        '''
+        self.__lock = threading.Lock()
+
+        self.__write_seconds = Histogram(SECONDS_UPPER_BOUNDS)
+        self.__acknowledgement_seconds = Histogram(SECONDS_UPPER_BOUNDS)
+
+        self.reset()
+
+    @property
+    def elapsed_seconds(self) -> float:
+        '''
+            Returns:
+                `float`: The time since these statistics were created or last reset.
+        '''
+        return time.monotonic() - self.__start_time
+
+    @property
+    def bytes_sent(self) -> int:
+        return self.__bytes_sent
+
+    @property
+    def messages_sent(self) -> int:
+        '''
+            Returns:
+                `int`: The number of messages sent; each call to `set_colors` sends one message.
+        '''
+        return self.__messages_sent
+
+    @property
+    def window_stalls(self) -> int:
+        '''
+            Returns:
+                `int`: How many times the writer had to stop and wait for an acknowledgement because the window was full.
+        '''
+        return self.__window_stalls
+
+    @property
+    def bytes_per_second(self) -> float:
+        return self.__bytes_sent / max(self.elapsed_seconds, 1e-9)
+
+    def get_write_seconds_quantile(self, quantile: float) -> float:
+        '''
+            Returns:
+                `float`: A quantile of how long it took to write each message, including waiting for its acknowledgement.
+        '''
+        with self.__lock:
+            return self.__write_seconds.quantile(quantile)
+
+    def get_acknowledgement_seconds_quantile(self, quantile: float) -> float:
+        '''
+            Returns:
+                `float`: A quantile of the round trip time between writing bytes and receiving their acknowledgement.
+        '''
+        with self.__lock:
+            return self.__acknowledgement_seconds.quantile(quantile)
+
+    def on_bytes_sent(self, number_of_bytes: int):
+        with self.__lock:
+            self.__bytes_sent += number_of_bytes
+
+    def on_message_sent(self, seconds: float):
+        with self.__lock:
+            self.__messages_sent += 1
+            self.__write_seconds.add(seconds)
+
+    def on_window_stall(self):
+        with self.__lock:
+            self.__window_stalls += 1
+
+    def on_acknowledgement(self, seconds: float):
+        with self.__lock:
+            self.__acknowledgement_seconds.add(seconds)
+
+    def reset(self):
+        with self.__lock:
+            self.__start_time = time.monotonic()
+
+            self.__bytes_sent = 0
+            self.__messages_sent = 0
+            self.__window_stalls = 0
+
+            self.__write_seconds.clear()
+            self.__acknowledgement_seconds.clear()
+
+    def get_summary(self, baud_rate: Optional[int] = None) -> str:
+        '''
+            Args:
+                `baud_rate (int, optional)`: If given, the throughput is also stated as a percentage of it.
+
+            Returns:
+                `str`: One line describing every counter, with times in milliseconds.
+        '''
+        QUANTILES = (0.5, 0.99, 1)
+
+        with self.__lock:
+            BYTES_PER_SECOND = self.__bytes_sent / max(time.monotonic() - self.__start_time, 1e-9)
+
+            WRITE_MILLISECONDS = '/'.join(f'{MILLISECONDS_PER_SECOND * self.__write_seconds.quantile(quantile):.2f}'
+                                          for quantile in QUANTILES)
+            ACKNOWLEDGEMENT_MILLISECONDS = '/'.join(f'{MILLISECONDS_PER_SECOND * self.__acknowledgement_seconds.quantile(quantile):.2f}'
+                                                    for quantile in QUANTILES)
+
+            summary = f'{self.__bytes_sent} bytes in {self.__messages_sent} messages, {BYTES_PER_SECOND:.0f} bytes/s'
+
+            if (baud_rate is not None):
+                summary += f' ({100 * BYTES_PER_SECOND * BITS_PER_BYTE_ON_THE_WIRE / baud_rate:.1f}% of {baud_rate} baud)'
+
+            return (f'{summary}, {self.__window_stalls} window stalls, write ms p50/p99/max {WRITE_MILLISECONDS}, '
+                    f'ack ms p50/p99/max {ACKNOWLEDGEMENT_MILLISECONDS}')
@@ -0,0 +1,66 @@
+import math
+
+import numpy
+
+
+class SilenceGate:
+    def __init__(self, margin_decibels: float = 6, half_life_seconds: float = 30, maximum_noise_floor_decibels: float = 30):
+        '''
+            Decides whether an audio chunk is silence by comparing its RMS level (in decibels relative to one int16 step)
+            against an estimate of the noise floor. The noise floor drops immediately to quieter levels. It only rises
+            (towards louder levels, with `half_life_seconds`) on chunks that are silence themselves, so it follows a
+            slowly drifting noise floor but can't climb onto sustained music, no matter how quiet or long. It starts at,
+            and never exceeds, `maximum_noise_floor_decibels`, so music that is louder than that plus the margin is
+            never silence, even from startup.
+
+            Args:
+                `margin_decibels (float, optional)`: How far above the noise floor a chunk must be to not be silence.
+                `half_life_seconds (float, optional)`: How slowly the noise floor rises.
+                `maximum_noise_floor_decibels (float, optional)`: The noise floor's upper bound. The default, 30 dB, is
+                about -60 dBFS.
+        '''
+        if (margin_decibels < 0):
+            raise ValueError(f'margin_decibels must be >= 0, but was {margin_decibels}.')
+
+        if (half_life_seconds <= 0):
+            raise ValueError(f'half_life_seconds must be > 0, but was {half_life_seconds}.')
+
+        self.__margin_decibels = margin_decibels
+        self.__half_life_seconds = half_life_seconds
+        self.__maximum_noise_floor_decibels = maximum_noise_floor_decibels
+
+        self.__noise_floor_decibels = maximum_noise_floor_decibels
+
+    @property
+    def noise_floor_decibels(self) -> float:
+        return self.__noise_floor_decibels
+
+    def is_silent(self, samples: numpy.ndarray, seconds: float) -> bool:
+        '''
+            Args:
+                `samples (numpy.ndarray)`: The int16 samples of an audio chunk, of any shape (e.g. (frames, channels)).
+                `seconds (float)`: The duration of the audio chunk.
+
+            Returns:
+                `bool`: True if the audio chunk is silence.
+        '''
+        SAMPLES = numpy.ravel(samples).astype(numpy.float32)
+
+        if (len(SAMPLES) == 0):
+            return True
+
+        MEAN_SQUARE = float(numpy.dot(SAMPLES, SAMPLES)) / len(SAMPLES)
+        LEVEL_DECIBELS = 10 * math.log10(max(MEAN_SQUARE, 1))  # anything quieter than one int16 step is 0 dB
+
+        IS_SILENT = LEVEL_DECIBELS <= self.__noise_floor_decibels + self.__margin_decibels
+
+        if (LEVEL_DECIBELS < self.__noise_floor_decibels):
+            self.__noise_floor_decibels = LEVEL_DECIBELS
+
+        elif (IS_SILENT):
+            RISE = 1 - 0.5 ** (seconds / self.__half_life_seconds)
+            self.__noise_floor_decibels += (LEVEL_DECIBELS - self.__noise_floor_decibels) * RISE
+
+        self.__noise_floor_decibels = min(self.__noise_floor_decibels, self.__maximum_noise_floor_decibels)
+
+        return IS_SILENT
@@ -1,10 +1,11 @@
 import math
-import statistics
-from typing import List, Union
+from typing import Iterable, List, Optional, Sequence, Union
 
 import numpy
+from band_filters import BandFilter
 from color_palette import ColorPalette
 from grouped_leds import GroupedLedsQueue
+from peak_hold import PeakHold
 from phons import Sones
 
 # ================================================================== Some useful formulas ==================================================================
@@ -36,62 +37,123 @@ from phons import Sones
 # ============================================================================================================================================================
 
 
-def _get_fft_amplitude(fft_value: complex, number_of_fft_values: int) -> float:
-    hypotenuse = math.sqrt(fft_value.real**2 + fft_value.imag**2).real
+def _get_fft_index(frequency: Union[int, float, numpy.ndarray], sampling_rate: int, number_of_frames: int) -> Union[int, numpy.ndarray]:
+    return numpy.rint(numpy.divide(frequency, sampling_rate / number_of_frames)).astype(numpy.int64)
 
-    try:
-        return 20 * math.log10(hypotenuse / number_of_fft_values)
 
-    except ValueError:
-        return 0
+def _get_band_amplitudes(samples: numpy.ndarray, number_of_frames: int, sampling_rate: int, bands: List[List[int]],
+                         band_channels: Optional[Sequence[int]] = None) -> numpy.ndarray:
+    '''
+        Args:
+            `samples (numpy.ndarray)`: The (frames,) mono samples or the (frames, channels) samples of an audio chunk.
+            `band_channels (Sequence[int], optional)`: The channel of `samples` each band is analysed from. Required
+            when `samples` has channels.
 
+        Returns:
+            `numpy.ndarray`: The average amplitude (in decibels) of each band's fft values, where the amplitude of
+            an fft value is 20 * log10(abs(fft_value) / fft_length) (or 0 if abs(fft_value) is 0).
+    '''
+    if (samples.ndim == 1):
+        samples = samples[:, numpy.newaxis]
+        BAND_CHANNELS = numpy.zeros(len(bands), dtype=numpy.int64)
 
-def _get_fft_index(frequency: Union[int, float], sampling_rate: int, number_of_frames: int) -> int:
-    return round(frequency / (sampling_rate / number_of_frames))
+    else:
+        # Only the channels some band is analysed from are transformed, all of them in one batched call.
+        CHANNELS, BAND_CHANNELS = numpy.unique(numpy.asarray(band_channels, dtype=numpy.int64), return_inverse=True)
+        samples = samples[:, CHANNELS]
 
+    fft: numpy.ndarray = numpy.fft.rfft(samples, axis=0)  # only the first half of the fft; the 2nd half is a mirror copy
 
-def update(grouped_leds: GroupedLedsQueue, audio_data: bytes, number_of_frames: int, sampling_rate: int,
-           bands: List[List[int]], color_palette_groups: List[ColorPalette]):
+    fft_length = math.ceil(len(samples) / 2)
 
-    audio_data_decimal: bytes = numpy.frombuffer(audio_data, dtype=numpy.int16)
-    fft: numpy.ndarray = numpy.fft.fft(audio_data_decimal)
+    BAND_EDGES = numpy.array([band[0:2] for band in bands], dtype=numpy.float64).reshape(-1, 2)
+    BAND_EDGE_INDICES = _get_fft_index(BAND_EDGES, sampling_rate, number_of_frames)
+    START_INDICES, END_INDICES = BAND_EDGE_INDICES[:, 0], BAND_EDGE_INDICES[:, 1]
 
-    fft_length = math.ceil(len(fft) / 2)  # the first half of the fft is a mirror copy of the 2nd half; we can ignore the 2nd half
+    # An empty band would average to nan, and a band beyond the fft would index past its end.
+    EMPTY_BANDS = numpy.flatnonzero(END_INDICES <= START_INDICES)
+
+    if (len(EMPTY_BANDS) > 0):
+        BAND = EMPTY_BANDS[0]
+        raise ValueError(f'bands[{BAND}] ({BAND_EDGES[BAND, 0]} Hz - {BAND_EDGES[BAND, 1]} Hz) must contain at least one fft frequency, '
+                         f'but the fft frequencies are {sampling_rate / number_of_frames} Hz apart.')
+
+    OUT_OF_RANGE_BANDS = numpy.flatnonzero((START_INDICES < 0) | (END_INDICES > len(fft)))
+
+    if (len(OUT_OF_RANGE_BANDS) > 0):
+        BAND = OUT_OF_RANGE_BANDS[0]
+        raise ValueError(f'bands[{BAND}] ({BAND_EDGES[BAND, 0]} Hz - {BAND_EDGES[BAND, 1]} Hz) must be within 0 Hz and '
+                         f'{len(fft) * sampling_rate / number_of_frames} Hz.')
+
+    hypotenuses = numpy.abs(fft[:END_INDICES.max(initial=0)])
+
+    with numpy.errstate(divide='ignore'):
+        amplitudes = numpy.where(hypotenuses > 0, 20 * numpy.log10(hypotenuses / fft_length), 0)
+
+    cumulative_amplitudes = numpy.concatenate((numpy.zeros((1, amplitudes.shape[1])), numpy.cumsum(amplitudes, axis=0)))
+
+    return ((cumulative_amplitudes[END_INDICES, BAND_CHANNELS] - cumulative_amplitudes[START_INDICES, BAND_CHANNELS]) /
+            (END_INDICES - START_INDICES))
+
+
+def _get_peak_positions(peak_hold: PeakHold, bands: List[List[int]], color_palette_groups: List[ColorPalette]) -> List[int]:
+    lower_amplitudes: List[float] = []
+    upper_amplitudes: List[float] = []
 
     for band in bands:
-        frequency_start_index = _get_fft_index(band[0], sampling_rate, number_of_frames)
-        frequency_end_index = _get_fft_index(band[1], sampling_rate, number_of_frames)
+        amp_upper_bounds = color_palette_groups[band[2]].amp_upper_bounds or [0]
+
+        lower_amplitudes.append(amp_upper_bounds[0])
+        upper_amplitudes.append(amp_upper_bounds[-1])
+
+    NUMBERS_OF_GROUPS = numpy.array([len(band) - 3 for band in bands])
 
-        average_amplitude = statistics.mean(_get_fft_amplitude(fft[i], fft_length)
-                                            for i in range(frequency_start_index, frequency_end_index))
+    return peak_hold.get_peak_positions(numpy.array(lower_amplitudes, dtype=numpy.float64),
+                                        numpy.array(upper_amplitudes, dtype=numpy.float64), NUMBERS_OF_GROUPS).tolist()
 
+
+def update(grouped_leds: GroupedLedsQueue, samples: numpy.ndarray, number_of_frames: int, sampling_rate: int,
+           bands: List[List[int]], color_palette_groups: List[ColorPalette], band_filters: Iterable[BandFilter] = (),
+           peak_hold: Optional[PeakHold] = None, band_channels: Optional[Sequence[int]] = None,
+           capture_time: Optional[float] = None):
+
+    average_amplitudes = _get_band_amplitudes(samples, number_of_frames, sampling_rate, bands, band_channels)
+
+    SECONDS = number_of_frames / sampling_rate
+
+    for band_filter in band_filters:
+        average_amplitudes = band_filter.apply(average_amplitudes, SECONDS)
+
+    peak_positions = [-1] * len(bands)
+
+    if (peak_hold is not None):
+        peak_hold.update(average_amplitudes, SECONDS)
+        peak_positions = _get_peak_positions(peak_hold, bands, color_palette_groups)
+
+    for band, average_amplitude, peak_position in zip(bands, average_amplitudes.tolist(), peak_positions):
         colors = color_palette_groups[band[2]].get_colors(average_amplitude)
 
+        if (peak_position >= 0):
+            colors = list(colors)
+            colors[peak_position] = peak_hold.color
+
         for i in range(3, len(band)):
             if (not grouped_leds.group_is_color(band[i], colors[i - 3])):
                 grouped_leds.enqueue_color(band[i], colors[i - 3])
 
-    grouped_leds.show_queued_colors()
+    grouped_leds.show_queued_colors(capture_time)
     grouped_leds.clear_queued_colors()
 
 
-def update_sones(grouped_leds: GroupedLedsQueue, audio_data: bytes, number_of_frames: int, sampling_rate: int,
+def update_sones(grouped_leds: GroupedLedsQueue, samples: numpy.ndarray, number_of_frames: int, sampling_rate: int,
                  bands: List[List[int]], color_palette_groups: List[ColorPalette], amp_to_sones: List[Sones]):
 
-    audio_data_decimal: bytes = numpy.frombuffer(audio_data, dtype=numpy.int16)
-    fft: numpy.ndarray = numpy.fft.fft(audio_data_decimal)
-
-    fft_length = math.ceil(len(fft) / 2)  # the first half of the fft is a mirror copy of the 2nd half; we can ignore the 2nd half
+    average_amplitudes = _get_band_amplitudes(samples, number_of_frames, sampling_rate, bands)
 
     for band_number in range(len(bands)):
         band = bands[band_number]
-        frequency_start_index = _get_fft_index(band[0], sampling_rate, number_of_frames)
-        frequency_end_index = _get_fft_index(band[1], sampling_rate, number_of_frames)
-
-        average_amplitude = statistics.mean(_get_fft_amplitude(fft[i], fft_length)
-                                            for i in range(frequency_start_index, frequency_end_index))
 
-        sones = amp_to_sones[band_number].from_amplitude(average_amplitude)
+        sones = amp_to_sones[band_number].from_amplitude(average_amplitudes[band_number])
 
         colors = color_palette_groups[band[2]].get_colors(sones)
 